@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Benchmark e-commerce API page streaming against a local stand-in server.
+
+Starts a small paginated ``/products`` endpoint on localhost with a fixed
+per-page latency, then streams the whole collection three ways: one fresh
+connection per page, the pooled client fetching one page at a time, and the
+pooled client with page prefetch.
+
+Usage:
+    python scripts/benchmark_ecommerce_client.py --products 50000 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import orjson
+import uvicorn
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from recommendation_service.infrastructure.http.ecommerce import EcommerceClient
+
+
+def stand_in_app(total: int, latency: float):
+    """ASGI app serving ``total`` products, ``limit`` per ``page``."""
+    products = [
+        orjson.dumps(
+            {
+                "id": f"product-{i}",
+                "name": f"Product {i}",
+                "priceCents": 1999 + i % 500,
+                "stock": i % 40,
+                "isActive": True,
+                "category": {"name": f"category-{i % 30}"},
+                "updatedAt": "2026-10-19T09:30:00.000Z",
+            }
+        )
+        for i in range(total)
+    ]
+
+    async def app(scope, _receive, send):
+        if scope["type"] != "http":
+            return
+        params = dict(
+            pair.split("=", 1) for pair in scope["query_string"].decode().split("&") if pair
+        )
+        page, limit = int(params["page"]), int(params["limit"])
+        await asyncio.sleep(latency)
+        body = b'{"data":[' + b",".join(products[(page - 1) * limit : page * limit]) + b"]}"
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def start_server(app) -> tuple[uvicorn.Server, str]:
+    """Run the app on a free localhost port in a background thread."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def unpooled(base_url: str, page_size: int) -> int:
+    """One new connection per page, sequentially."""
+    count, page = 0, 1
+    while True:
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            response = await client.get("/products", params={"page": page, "limit": page_size})
+        items = orjson.loads(response.content)["data"]
+        count += len(items)
+        if len(items) < page_size:
+            return count
+        page += 1
+
+
+async def pooled(base_url: str, page_size: int, prefetch: int) -> int:
+    client = EcommerceClient(base_url=base_url, page_size=page_size, prefetch_pages=prefetch)
+    try:
+        return sum([len(page) async for page in client.iter_pages("/products")])
+    finally:
+        await client.aclose()
+
+
+async def run(args: argparse.Namespace, base_url: str) -> None:
+    runs = [
+        ("new connection per page", unpooled(base_url, args.page_size)),
+        ("pooled, no prefetch", pooled(base_url, args.page_size, 1)),
+        (f"pooled, prefetch {args.prefetch}", pooled(base_url, args.page_size, args.prefetch)),
+    ]
+    for label, coro in runs:
+        start = time.perf_counter()
+        count = await coro
+        seconds = time.perf_counter() - start
+        print(f"{label:26s} {count / seconds:10.0f} products/s ({seconds:.2f}s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Server time per page")
+    parser.add_argument("--prefetch", type=int, default=4)
+    args = parser.parse_args()
+
+    server, base_url = start_server(stand_in_app(args.products, args.latency_ms / 1000))
+    print(f"{args.products} products, {args.page_size} per page, {args.latency_ms:.0f} ms/page")
+    try:
+        asyncio.run(run(args, base_url))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Compare embedding backends: startup time, peak memory and CPU throughput.
+
+Each backend runs in a fresh subprocess so import/load time and peak RSS are
+measured in isolation:
+
+- torch: sentence-transformers on PyTorch
+- onnx: exported fp32 model on ONNX Runtime
+- onnx-int8: dynamic-int8 quantized export
+- mock: hash-seeded vectors (a floor for everything that is not the model)
+
+Usage:
+    python scripts/export_onnx_model.py        # once, to create the ONNX files
+    python scripts/benchmark_embedding_backends.py --count 2000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKENDS = {
+    "torch": {"EMBEDDING_BACKEND": "torch"},
+    "onnx": {"EMBEDDING_BACKEND": "onnx", "EMBEDDING_ONNX_QUANTIZED": "false"},
+    "onnx-int8": {"EMBEDDING_BACKEND": "onnx", "EMBEDDING_ONNX_QUANTIZED": "true"},
+    "mock": {"EMBEDDING_BACKEND": "mock"},
+}
+
+
+def run_worker(count: int, seed: int) -> None:
+    """Measure the backend selected by the environment and print JSON."""
+    import resource
+
+    start = time.perf_counter()
+    sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+    from recommendation_service.config import get_settings
+    from recommendation_service.infrastructure.vector.batching import encode_bucketed
+    from recommendation_service.infrastructure.vector.embeddings import get_embedding_model
+
+    model = get_embedding_model()
+    if model is None:
+        print(json.dumps({"error": "backend unavailable"}))
+        return
+    model.encode(["warmup"], convert_to_numpy=True)
+    startup_seconds = time.perf_counter() - start
+
+    from benchmark_embedding_batching import synthetic_catalog
+
+    settings = get_settings()
+    texts = synthetic_catalog(count, seed)
+    start = time.perf_counter()
+    encode_bucketed(
+        lambda batch: model.encode(batch, batch_size=len(batch), convert_to_numpy=True),
+        texts,
+        token_budget=settings.embedding_token_budget,
+        max_batch_size=settings.embedding_max_batch_size,
+        tokenizer=getattr(model, "tokenizer", None),
+    )
+    encode_seconds = time.perf_counter() - start
+
+    print(
+        json.dumps(
+            {
+                "startup_seconds": startup_seconds,
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                "texts_per_second": count / encode_seconds,
+            }
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000, help="Texts to encode")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.count, args.seed)
+        return
+
+    print(f"{'backend':<10} {'startup s':>10} {'peak RSS MB':>12} {'texts/sec':>10}")
+    for backend in args.backends:
+        env = {**os.environ, **BACKENDS[backend]}
+        completed = subprocess.run(
+            [sys.executable, __file__, "--worker", "--count", str(args.count), "--seed", str(args.seed)],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        try:
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+        except (IndexError, json.JSONDecodeError):
+            print(f"{backend:<10} failed: {completed.stderr.strip().splitlines()[-1:]}")
+            continue
+        if "error" in result:
+            print(f"{backend:<10} {result['error']}")
+            continue
+        print(
+            f"{backend:<10} {result['startup_seconds']:>10.2f} "
+            f"{result['peak_rss_mb']:>12.0f} {result['texts_per_second']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Benchmark fixed-size vs length-bucketed batching for product embedding encodes.
+
+Builds a synthetic catalog whose text lengths mimic real products (short names,
+optional descriptions up to 500 characters), then encodes it twice on CPU:
+
+- fixed: chunks of 50 texts in catalog order (the previous backfill behaviour)
+- bucketed: length-sorted batches packed under EMBEDDING_TOKEN_BUDGET
+
+Usage:
+    python scripts/benchmark_embedding_batching.py --count 5000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.vector.batching import (
+    encode_bucketed,
+    estimate_token_lengths,
+    padding_efficiency,
+    plan_batches,
+)
+from recommendation_service.services.embedding import EmbeddingService, get_embedding_model
+
+CATEGORIES = ["Electronics", "Garden", "Home & Kitchen", "Fashion", "Toys", "Beauty"]
+WORDS = [
+    "durable",
+    "lightweight",
+    "premium",
+    "compact",
+    "wireless",
+    "stainless",
+    "ergonomic",
+    "portable",
+    "rechargeable",
+    "waterproof",
+    "adjustable",
+    "organic",
+    "handmade",
+    "classic",
+    "modern",
+    "vintage",
+]
+
+
+def synthetic_catalog(count: int, seed: int) -> list[str]:
+    """Generate product texts with a realistic length distribution."""
+    rng = random.Random(seed)
+    service = EmbeddingService()
+    texts = []
+    for _ in range(count):
+        name = " ".join(rng.choices(WORDS, k=rng.randint(2, 5))).title()
+        # Roughly a third of products have no description, the rest vary widely
+        description = None
+        if rng.random() > 0.33:
+            description = " ".join(rng.choices(WORDS, k=rng.randint(5, 90)))
+        product = {
+            "name": name,
+            "category": rng.choice(CATEGORIES),
+            "description": description,
+            "price_cents": rng.randint(500, 90000),
+        }
+        texts.append(service.create_product_text(product))
+    return texts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=5000, help="Number of products")
+    parser.add_argument("--fixed-batch-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    model = get_embedding_model()
+    if model is None:
+        print("Embedding model not available; install sentence-transformers")
+        sys.exit(1)
+
+    settings = get_settings()
+    tokenizer = getattr(model, "tokenizer", None)
+    texts = synthetic_catalog(args.count, args.seed)
+    lengths = estimate_token_lengths(texts, tokenizer)
+
+    def encode(batch: list[str]) -> np.ndarray:
+        return model.encode(batch, batch_size=len(batch), convert_to_numpy=True)
+
+    # Warm up so neither run pays for lazy initialisation
+    encode(texts[:8])
+
+    fixed_batches = [
+        np.arange(i, min(i + args.fixed_batch_size, len(texts)))
+        for i in range(0, len(texts), args.fixed_batch_size)
+    ]
+    start = time.perf_counter()
+    for batch in fixed_batches:
+        encode([texts[i] for i in batch])
+    fixed_seconds = time.perf_counter() - start
+
+    bucketed_batches = plan_batches(
+        lengths, settings.embedding_token_budget, settings.embedding_max_batch_size
+    )
+    start = time.perf_counter()
+    encode_bucketed(
+        encode,
+        texts,
+        token_budget=settings.embedding_token_budget,
+        max_batch_size=settings.embedding_max_batch_size,
+        tokenizer=tokenizer,
+    )
+    bucketed_seconds = time.perf_counter() - start
+
+    print(f"Products:         {len(texts)}")
+    print(f"Mean tokens:      {lengths.mean():.1f} (max {lengths.max()})")
+    print()
+    print(f"{'strategy':<10} {'batches':>8} {'padding eff.':>13} {'seconds':>9} {'texts/sec':>10}")
+    for label, batches, seconds in (
+        ("fixed", fixed_batches, fixed_seconds),
+        ("bucketed", bucketed_batches, bucketed_seconds),
+    ):
+        print(
+            f"{label:<10} {len(batches):>8} "
+            f"{padding_efficiency(lengths, batches):>12.1%} "
+            f"{seconds:>9.2f} {len(texts) / seconds:>10.1f}"
+        )
+    print()
+    print(f"Speedup: {fixed_seconds / bucketed_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Measure import time of the service entry points.
+
+Each entry point is imported in a fresh interpreter with ``-X importtime`` so
+the numbers include everything pulled in at module level. Prints the total
+wall time per entry point and its slowest top-level imports, which is how
+heavy modules accidentally imported at module level show up.
+
+Usage:
+    python scripts/benchmark_imports.py
+    python scripts/benchmark_imports.py --modules recommendation_service.main --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+ENTRY_POINTS = [
+    "recommendation_service.main",
+    "sync_worker.main",
+    "email_worker.main",
+]
+
+
+def import_profile(module: str) -> tuple[float, list[tuple[int, str]]]:
+    """Import a module in a fresh interpreter; return wall seconds and slowest packages."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(SRC_DIR), os.environ.get("PYTHONPATH", "")])}
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_seconds = time.perf_counter() - start
+
+    # Lines look like: "import time:  self [us] | cumulative | <indent>imported.module".
+    # Attribute time to third-party/stdlib packages by their top-level name,
+    # keeping the largest cumulative figure (the import that actually loaded it).
+    own_package = module.split(".")[0]
+    packages: dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split("|"))
+        package = name.split(".")[0]
+        if package in (own_package, "recommendation_service"):
+            continue
+        packages[package] = max(packages.get(package, 0), int(cumulative))
+
+    ranked = sorted(((us, name) for name, us in packages.items()), reverse=True)
+    return wall_seconds, ranked
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=ENTRY_POINTS)
+    parser.add_argument("--top", type=int, default=10, help="Slowest packages to list")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        wall_seconds, ranked = import_profile(module)
+        print(f"{module}: {wall_seconds * 1000:.0f} ms wall")
+        for cumulative_us, name in ranked[: args.top]:
+            print(f"  {cumulative_us / 1000:>8.1f} ms  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
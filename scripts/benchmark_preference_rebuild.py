@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Benchmark the set-based user preference reduction on synthetic data, fully offline.
+
+Product vectors come from the deterministic mock embedding model and
+interactions are generated in memory, so the reduction step of
+``UserPreferenceService.rebuild_all_users`` can be timed without a database.
+Compares it against the per-user path's in-Python work: parsing each
+interaction's stored embedding and aggregating one user at a time.
+
+Usage:
+    python scripts/benchmark_preference_rebuild.py --users 100000 --products 20000
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.vector.embeddings import MockEmbeddingModel
+from recommendation_service.infrastructure.vector.ops import stack_vectors, to_json
+from recommendation_service.services.user_preference import (
+    ProductMatrix,
+    UserPreferenceService,
+)
+
+
+def synthetic_interactions(
+    users: int, products: int, per_user: int, now: datetime, seed: int
+) -> list[SimpleNamespace]:
+    """Interaction rows grouped by user, newest first, like the rebuild query."""
+    rng = np.random.default_rng(seed)
+    kinds = list(UserPreferenceService.INTERACTION_WEIGHTS)
+    rows = []
+    for user in range(users):
+        count = int(rng.integers(3, 2 * per_user))
+        ages = np.sort(rng.uniform(0, 90, count))
+        for product, kind, age in zip(
+            rng.integers(0, products, count), rng.integers(0, len(kinds), count), ages, strict=True
+        ):
+            rows.append(
+                SimpleNamespace(
+                    external_user_id=f"user-{user:07d}",
+                    external_product_id=f"product-{product}",
+                    interaction_type=kinds[kind],
+                    created_at=now - timedelta(days=float(age)),
+                )
+            )
+    return rows
+
+
+def per_user_aggregate(
+    service: UserPreferenceService,
+    rows: list[SimpleNamespace],
+    stored: dict[str, str],
+    products: ProductMatrix,
+    now: datetime,
+) -> str:
+    """The in-Python work ``update_user_preference`` does for one user's rows."""
+    embeddings, _ = stack_vectors(stored[r.external_product_id] for r in rows)
+    base_weights = np.array(
+        [service.INTERACTION_WEIGHTS.get(r.interaction_type, 1.0) for r in rows], dtype=np.float32
+    )
+    days_old = np.array([(now - r.created_at).days for r in rows], dtype=np.float32)
+    weights = base_weights * service._calculate_recency_weights(days_old)
+    categories: dict[str, int] = defaultdict(int)
+    for r in rows:
+        categories[products.categories[products.index[r.external_product_id]]] += 1
+    sorted(categories.items(), key=lambda x: x[1], reverse=True)[:5]
+    return to_json(service._aggregate_weighted_embeddings(embeddings, weights))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--per-user", type=int, default=10, help="Mean interactions per user")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    service = UserPreferenceService(session=None)
+    now = datetime.now()
+    model = MockEmbeddingModel(get_settings().embedding_dimension)
+    products = ProductMatrix(
+        index={f"product-{i}": i for i in range(args.products)},
+        vectors=model.encode([f"product {i}" for i in range(args.products)]),
+        categories=[f"category-{i % 40}" for i in range(args.products)],
+        price_cents=np.arange(args.products, dtype=np.int64) * 7 % 20000,
+    )
+    rows = synthetic_interactions(args.users, args.products, args.per_user, now, args.seed)
+    print(f"{args.users} users, {len(rows)} interactions, {args.products} products")
+
+    start = time.perf_counter()
+    out: list[dict] = []
+    chunk = service.BULK_CHUNK_ROWS
+    position = 0
+    while position < len(rows):
+        end = min(position + chunk, len(rows))
+        # Extend to the end of the last user, as the streaming rebuild does
+        while end < len(rows) and rows[end].external_user_id == rows[end - 1].external_user_id:
+            end += 1
+        service._reduce_chunk(rows[position:end], products, now, out)
+        position = end
+    bulk_seconds = time.perf_counter() - start
+
+    # The per-user path parses each interaction's stored JSON embedding
+    stored = {product_id: to_json(products.vectors[i]) for product_id, i in products.index.items()}
+    sample = rows[: min(len(rows), 20000)]
+    start = time.perf_counter()
+    current: list[SimpleNamespace] = []
+    sample_users = 0
+    for row in [*sample, None]:
+        if current and (row is None or row.external_user_id != current[0].external_user_id):
+            per_user_aggregate(service, current, stored, products, now)
+            sample_users += 1
+            current = []
+        if row is not None:
+            current.append(row)
+    per_user_seconds = (time.perf_counter() - start) / sample_users
+
+    print(f"bulk reduce:   {bulk_seconds / args.users * 1e6:8.1f} us/user ({bulk_seconds:.2f}s total)")
+    print(f"per-user loop: {per_user_seconds * 1e6:8.1f} us/user, excluding its query and commit")
+
+
+if __name__ == "__main__":
+    main()
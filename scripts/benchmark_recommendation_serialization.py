@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Benchmark per-request serialisation of recommendation responses, fully offline.
+
+Compares the model path the endpoints used to take (a ``RecommendedProduct``
+per item, a ``RecommendationResponse``, then FastAPI's ``response_model``
+re-validation and JSON encoding) with the orjson fast path in
+``render_recommendations``.
+
+Usage:
+    python scripts/benchmark_recommendation_serialization.py --items 50
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from recommendation_service.api.v1.recommendations import (
+    RecommendationResponse,
+    RecommendedProduct,
+    render_recommendations,
+)
+
+RESPONSE_ADAPTER = TypeAdapter(RecommendationResponse)
+
+
+def engine_result(items: int) -> dict:
+    """An engine result shaped like ``get_homepage_recommendations`` output."""
+    return {
+        "recommendations": [
+            {
+                "product_id": f"product-{i}",
+                "external_product_id": f"product-{i}",
+                "name": f"Product number {i}",
+                "category": f"category-{i % 12}",
+                "price": 19.99 + i,
+                "stock": i * 3,
+                "image_url": None,
+                "score": 1.0 - i / (items + 1),
+                "signal": "content",
+                "content_score": 0.8,
+                "position": i + 1,
+            }
+            for i in range(items)
+        ],
+        "request_id": "6f1c1f1e-6e0e-4c2a-9d55-2f0b5f9f4b1a",
+        "context": "homepage",
+        "user_id": "user-0000042",
+        "generated_at": "2026-10-19T11:00:00+00:00",
+    }
+
+
+def model_path(result: dict) -> bytes:
+    """Build the response models, then validate and encode as ``response_model`` does."""
+    response = RecommendationResponse(
+        recommendations=[RecommendedProduct(**p) for p in result["recommendations"]],
+        request_id=result["request_id"],
+        context=result["context"],
+        user_id=result["user_id"],
+        generated_at=result["generated_at"],
+    )
+    validated = RESPONSE_ADAPTER.validate_python(response.model_dump())
+    content = RESPONSE_ADAPTER.dump_python(validated, mode="json")
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_path(result: dict) -> bytes:
+    return render_recommendations(result).body
+
+
+def time_per_call(fn: Callable[[dict], bytes], result: dict, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(result)
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    result = engine_result(args.items)
+    assert json.loads(model_path(result)) == json.loads(fast_path(result))
+
+    for fn in (model_path, fast_path):
+        fn(result)  # warm up
+    model_seconds = time_per_call(model_path, result, args.iterations)
+    fast_seconds = time_per_call(fast_path, result, args.iterations)
+
+    print(f"{args.items} items per response, {args.iterations} iterations")
+    print(f"model path: {model_seconds * 1e6:8.1f} us/request")
+    print(f"fast path:  {fast_seconds * 1e6:8.1f} us/request ({model_seconds / fast_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
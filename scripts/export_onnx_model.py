@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Export the configured embedding model to ONNX for the CPU-only backend.
+
+Writes ``model.onnx`` (fp32), ``model_quantized.onnx`` (dynamic int8) and the
+fast tokenizer files into the output directory, which is what
+``EMBEDDING_BACKEND=onnx`` loads from ``EMBEDDING_ONNX_PATH``.
+
+Requires torch, transformers and onnxruntime on the export machine only.
+
+Usage:
+    python scripts/export_onnx_model.py
+    python scripts/export_onnx_model.py --output models/all-MiniLM-L6-v2-onnx --no-quantize
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.vector.onnx_backend import (
+    FP32_MODEL_FILE,
+    QUANTIZED_MODEL_FILE,
+)
+
+
+def export(model_name: str, output_dir: Path, opset: int) -> Path:
+    """Export the transformer (without pooling) to ONNX with dynamic axes."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["An example product | Category: Garden"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    model_path = output_dir / FP32_MODEL_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    return model_path
+
+
+def quantize(model_path: Path) -> Path:
+    """Apply dynamic int8 quantization to the exported model."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized_path = model_path.with_name(QUANTIZED_MODEL_FILE)
+    quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=settings.embedding_model)
+    parser.add_argument("--output", type=Path, default=Path(settings.embedding_onnx_path))
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 export")
+    args = parser.parse_args()
+
+    print(f"Exporting {args.model} to {args.output}")
+    model_path = export(args.model, args.output, args.opset)
+    print(f"  fp32:      {model_path} ({model_path.stat().st_size / 1e6:.1f} MB)")
+
+    if not args.no_quantize:
+        quantized_path = quantize(model_path)
+        print(f"  int8:      {quantized_path} ({quantized_path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
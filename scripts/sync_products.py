@@ -25,7 +25,7 @@ async def main():
         # Sync products
         sync_service = ProductSyncService(session)
         logger.info("Syncing products from e-commerce database")
-        sync_result = await sync_service.sync_all_products(batch_size=100)
+        sync_result = await sync_service.sync_all_products()
         logger.info("Product sync completed", **sync_result)
 
         # Generate embeddings
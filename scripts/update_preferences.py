@@ -22,7 +22,7 @@ async def main():
 
         result = await service.update_all_active_users(
             min_interactions=3,
-            batch_size=100,
+            batch_size=1000,
         )
 
         print("=== Results ===")
@@ -0,0 +1 @@
+"""Interaction worker consuming the Redis interaction stream."""
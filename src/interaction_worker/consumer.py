@@ -0,0 +1,232 @@
+"""Consumer-group reader for the interaction stream."""
+
+import asyncio
+import os
+import socket
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+import structlog
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from recommendation_service.config import get_settings
+from recommendation_service.core.metrics import INTERACTION_ROWS_REJECTED
+from recommendation_service.infrastructure.redis.client import get_redis
+from recommendation_service.services.interaction_buffer import (
+    InteractionRecord,
+    copy_interactions,
+    is_row_error,
+)
+from recommendation_service.services.interaction_stream import (
+    ENTRY_FIELD,
+    apply_incremental_updates,
+    decode_interaction,
+)
+
+logger = structlog.get_logger()
+
+StreamEntry = tuple[bytes, dict[bytes, bytes]]
+
+
+class InteractionStreamConsumer:
+    """
+    Reads interaction batches from the stream's consumer group and persists them.
+
+    Each batch is written with one COPY, its incremental updates are applied,
+    and only then are the entries acknowledged. Entries of a consumer that died
+    mid-batch stay pending and are claimed by a live consumer once they have
+    been idle for ``claim_idle_ms``, so delivery is at-least-once. Run more
+    worker processes to scale out; each joins the group under its own name.
+
+    A batch whose write keeps failing is retried entry by entry once it has
+    been delivered ``max_deliveries`` times; entries the database rejects on
+    their own are moved to the dead-letter stream, so one bad entry cannot
+    hold back the rest.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None = None,
+        consumer_name: str | None = None,
+        batch_size: int | None = None,
+        block_ms: int | None = None,
+        claim_idle_ms: int | None = None,
+        max_deliveries: int | None = None,
+        writer: Callable[
+            [Sequence[InteractionRecord]], Awaitable[list[InteractionRecord]]
+        ] = copy_interactions,
+        updater: Callable[[Sequence[InteractionRecord]], Awaitable[Any]] = apply_incremental_updates,
+    ):
+        settings = get_settings()
+        self.redis = redis or get_redis()
+        self.stream = settings.interaction_stream_key
+        self.group = settings.interaction_stream_group
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size or settings.interaction_stream_batch_size
+        self.block_ms = settings.interaction_stream_block_ms if block_ms is None else block_ms
+        self.claim_idle_ms = (
+            settings.interaction_stream_claim_idle_ms if claim_idle_ms is None else claim_idle_ms
+        )
+        self.max_deliveries = max_deliveries or settings.interaction_stream_max_deliveries
+        self.dead_letter_stream = settings.interaction_stream_dead_letter_key
+        self.stream_maxlen = settings.interaction_stream_maxlen
+        self.writer = writer
+        self.updater = updater
+
+    async def ensure_group(self) -> None:
+        """Create the consumer group (and the stream) if they do not exist."""
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def read_batch(self) -> list[StreamEntry]:
+        """Claim stale pending entries first, otherwise block for new ones."""
+        _, claimed, *_ = await self.redis.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer_name,
+            min_idle_time=self.claim_idle_ms,
+            count=self.batch_size,
+        )
+        if claimed:
+            return claimed
+
+        response = await self.redis.xreadgroup(
+            self.group,
+            self.consumer_name,
+            {self.stream: ">"},
+            count=self.batch_size,
+            block=self.block_ms,
+        )
+        return response[0][1] if response else []
+
+    async def process(self, entries: list[StreamEntry]) -> int:
+        """
+        Persist one batch of entries and acknowledge it.
+
+        Undecodable entries are dead-lettered and acknowledged so they cannot
+        block the group. A failed write leaves the batch pending for
+        redelivery until it has been delivered ``max_deliveries`` times; then
+        it is written entry by entry (see :meth:`write_each`).
+
+        Returns:
+            Number of interactions written
+        """
+        decoded: list[tuple[bytes, InteractionRecord]] = []
+        for entry_id, fields in entries:
+            try:
+                decoded.append((entry_id, decode_interaction(fields[ENTRY_FIELD])))
+            except Exception as e:
+                await self.dead_letter(entry_id, fields, e)
+
+        records = [record for _, record in decoded]
+        if records:
+            # Rows with an already registered event id are dropped by the writer
+            try:
+                records = await self.writer(records)
+            except Exception as e:
+                if await self.delivery_count(entries) < self.max_deliveries:
+                    raise
+                logger.warning(
+                    "Interaction batch keeps failing, writing entries one by one",
+                    entries=len(entries),
+                    error=str(e),
+                )
+                records = await self.write_each(decoded, dict(entries))
+        if records:
+            try:
+                await self.updater(records)
+            except Exception as e:
+                # The rows are committed; the periodic preference rebuild catches up
+                logger.error("Incremental interaction updates failed", error=str(e))
+
+        await self.redis.xack(self.stream, self.group, *(entry_id for entry_id, _ in entries))
+        return len(records)
+
+    async def delivery_count(self, entries: list[StreamEntry]) -> int:
+        """Highest number of times any of the entries was delivered (XPENDING).
+
+        Each entry is looked up by its own id in this consumer's pending list:
+        claimed entries are not contiguous there, and a range query limited to
+        ``len(entries)`` could be used up by other pending entries.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for entry_id, _ in entries:
+                pipe.xpending_range(
+                    self.stream,
+                    self.group,
+                    min=entry_id,
+                    max=entry_id,
+                    count=1,
+                    consumername=self.consumer_name,
+                )
+            pending = await pipe.execute()
+        return max((p["times_delivered"] for found in pending for p in found), default=0)
+
+    async def write_each(
+        self,
+        decoded: list[tuple[bytes, InteractionRecord]],
+        fields_by_id: dict[bytes, dict[bytes, bytes]],
+    ) -> list[InteractionRecord]:
+        """
+        Write entries one at a time, dead-lettering those the database rejects.
+
+        An error that is not caused by the entry itself (see
+        :func:`~recommendation_service.services.interaction_buffer.is_row_error`)
+        propagates; entries handled up to then are acknowledged so they are
+        not written twice.
+
+        Returns:
+            The rows actually written
+        """
+        written: list[InteractionRecord] = []
+        handled: list[bytes] = []
+        try:
+            for entry_id, record in decoded:
+                try:
+                    written.extend(await self.writer([record]))
+                except Exception as e:
+                    if not is_row_error(e):
+                        raise
+                    await self.dead_letter(entry_id, fields_by_id[entry_id], e)
+                handled.append(entry_id)
+        finally:
+            if handled and len(handled) < len(decoded):
+                await self.redis.xack(self.stream, self.group, *handled)
+        return written
+
+    async def dead_letter(
+        self, entry_id: bytes, fields: dict[bytes, bytes], error: Exception
+    ) -> None:
+        """Copy an entry to the dead-letter stream with its error (the caller acknowledges it)."""
+        INTERACTION_ROWS_REJECTED.labels(stage="stream").inc()
+        logger.error("Dead-lettering interaction entry", entry_id=entry_id, error=str(error))
+        await self.redis.xadd(
+            self.dead_letter_stream,
+            {**fields, b"entry_id": entry_id, b"error": str(error).encode()},
+            maxlen=self.stream_maxlen,
+            approximate=True,
+        )
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Consume until ``stop`` is set, finishing the batch in progress."""
+        await self.ensure_group()
+        logger.info(
+            "Interaction consumer started",
+            stream=self.stream,
+            group=self.group,
+            consumer=self.consumer_name,
+        )
+        while not stop.is_set():
+            try:
+                entries = await self.read_batch()
+                if entries:
+                    written = await self.process(entries)
+                    logger.debug("Interaction batch written", entries=len(entries), written=written)
+            except Exception as e:
+                logger.error("Interaction consumer error", error=str(e))
+                await asyncio.sleep(1)
+        logger.info("Interaction consumer stopped", consumer=self.consumer_name)
@@ -0,0 +1,36 @@
+"""Interaction worker entry point.
+
+Runs one :class:`InteractionStreamConsumer` per process until SIGINT/SIGTERM.
+"""
+
+import asyncio
+import signal
+
+import structlog
+
+from interaction_worker.consumer import InteractionStreamConsumer
+from recommendation_service.infrastructure.redis.client import close_redis
+
+logger = structlog.get_logger()
+
+
+async def main() -> None:
+    """Consume the interaction stream until asked to stop."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await InteractionStreamConsumer().run(stop)
+    finally:
+        await close_redis()
+
+
+def run() -> None:
+    """Run the interaction stream consumer."""
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()
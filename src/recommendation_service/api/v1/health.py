@@ -8,6 +8,7 @@ from pydantic import BaseModel
 
 from recommendation_service import __version__
 from recommendation_service.config import get_settings
+from recommendation_service.core.warmup import get_warmup_state
 
 router = APIRouter()
 
@@ -58,11 +59,15 @@ async def readiness_check() -> ReadinessResponse:
     """
     Readiness check endpoint.
 
-    Verifies that all dependencies are connected and ready.
+    Verifies that all dependencies are connected and ready and that
+    startup warmup has finished.
     This endpoint is used by Kubernetes readiness probes.
     """
     checks: dict[str, bool] = {}
 
+    # Models, clients and connections are loaded during startup warmup
+    checks["warmup"] = not get_settings().warmup_enabled or get_warmup_state().completed
+
     # TODO: Implement actual dependency checks
     # Check PostgreSQL connection
     try:
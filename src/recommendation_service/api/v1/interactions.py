@@ -1,11 +1,38 @@
 """User interaction tracking API endpoints."""
 
-from datetime import datetime, timezone
+from datetime import UTC, datetime
 from enum import Enum
 from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel, Field
+import structlog
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter
+from redis.exceptions import RedisError
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.database.connection import get_db_session
+from recommendation_service.services.event_dedup import get_event_deduplicator
+from recommendation_service.services.interaction_buffer import (
+    InteractionBufferFullError,
+    InteractionRecord,
+    get_interaction_buffer,
+    interaction_record,
+)
+from recommendation_service.services.interaction_bulk import (
+    BulkInteractionLoader,
+    iter_lines,
+    naive_timestamp,
+)
+from recommendation_service.services.interaction_history import (
+    InvalidCursorError,
+    decode_cursor,
+    stream_history,
+)
+from recommendation_service.services.interaction_stream import publish_interactions
+from recommendation_service.services.user_preference import UserPreferenceService
+
+logger = structlog.get_logger()
 
 router = APIRouter()
 
@@ -31,20 +58,30 @@ class InteractionType(str, Enum):
 class InteractionRequest(BaseModel):
     """Request model for tracking a user interaction."""
 
-    user_id: str = Field(..., description="User identifier")
-    product_id: str | None = Field(None, description="Product identifier (required for most interactions)")
+    user_id: str = Field(..., max_length=255, description="User identifier")
+    product_id: str | None = Field(
+        None, max_length=255, description="Product identifier (required for most interactions)"
+    )
     interaction_type: InteractionType = Field(..., description="Type of interaction")
     search_query: str | None = Field(None, description="Search query (for search interactions)")
     recommendation_context: str | None = Field(
         None,
+        max_length=50,
         description="Context where recommendation was shown (homepage, product_page, cart, email)",
     )
     recommendation_position: int | None = Field(
         None,
         description="Position of clicked/viewed recommendation in the list",
     )
-    session_id: str | None = Field(None, description="Session identifier for grouping interactions")
+    session_id: str | None = Field(
+        None, max_length=255, description="Session identifier for grouping interactions"
+    )
     metadata: dict[str, Any] | None = Field(default_factory=dict, description="Additional metadata")
+    event_id: str | None = Field(
+        None,
+        max_length=64,
+        description="Client-generated unique event id; retries with the same id are recorded once",
+    )
 
 
 class InteractionResponse(BaseModel):
@@ -53,6 +90,7 @@ class InteractionResponse(BaseModel):
     success: bool
     interaction_id: str
     recorded_at: str
+    duplicate: bool = False
 
 
 class BatchInteractionRequest(BaseModel):
@@ -72,6 +110,174 @@ class BatchInteractionResponse(BaseModel):
     recorded_count: int
     failed_count: int
     recorded_at: str
+    duplicate_count: int = 0
+
+
+class BulkInteractionLine(InteractionRequest):
+    """One line of a bulk NDJSON upload."""
+
+    occurred_at: datetime | None = Field(
+        None, description="When the interaction happened (defaults to upload time)"
+    )
+
+
+class BulkInteractionError(BaseModel):
+    """A line of a bulk upload that was not recorded."""
+
+    line: int
+    error: str
+
+
+class BulkInteractionResponse(BaseModel):
+    """Response after a bulk NDJSON upload."""
+
+    success: bool
+    line_count: int
+    recorded_count: int
+    duplicate_count: int
+    failed_count: int
+    errors: list[BulkInteractionError] = Field(
+        default_factory=list, description="Failed lines (truncated to the first few)"
+    )
+
+
+# =============================================================================
+# Validation and ingestion
+# =============================================================================
+
+PRODUCT_INTERACTIONS = {
+    InteractionType.VIEW,
+    InteractionType.CART_ADD,
+    InteractionType.CART_REMOVE,
+    InteractionType.PURCHASE,
+    InteractionType.WISHLIST_ADD,
+    InteractionType.RECOMMENDATION_CLICK,
+    InteractionType.RECOMMENDATION_VIEW,
+}
+
+
+def validate_interaction(interaction: InteractionRequest) -> str | None:
+    """Return why an interaction cannot be recorded, or None if it is valid."""
+    if interaction.interaction_type in PRODUCT_INTERACTIONS and not interaction.product_id:
+        return f"product_id is required for {interaction.interaction_type.value} interactions"
+    if interaction.interaction_type == InteractionType.SEARCH and not interaction.search_query:
+        return "search_query is required for search interactions"
+    return None
+
+
+def to_record(interaction: InteractionRequest, created_at: datetime) -> InteractionRecord:
+    """Build the ``user_interactions`` row for a validated interaction."""
+    return interaction_record(
+        user_id=interaction.user_id,
+        product_id=interaction.product_id,
+        interaction_type=interaction.interaction_type.value.upper(),
+        search_query=interaction.search_query,
+        recommendation_context=interaction.recommendation_context,
+        recommendation_position=interaction.recommendation_position,
+        session_id=interaction.session_id,
+        metadata=interaction.metadata,
+        event_id=interaction.event_id,
+        created_at=created_at,
+    )
+
+
+async def is_duplicate(interaction: InteractionRequest) -> bool:
+    """Whether the interaction's client event id was already recorded."""
+    deduplicator = get_event_deduplicator()
+    if deduplicator is None or not interaction.event_id:
+        return False
+    try:
+        return await deduplicator.is_duplicate(interaction.event_id)
+    except Exception as e:
+        # The writer still drops repeats; only the early answer is lost
+        logger.warning("Event dedup check failed", event_id=interaction.event_id, error=str(e))
+        return False
+
+
+async def ingest_interactions(interactions: list[InteractionRequest]) -> None:
+    """Queue interactions for persistence, all or none.
+
+    Depending on ``INTERACTION_INGEST_MODE`` rows go to the in-process batched
+    writer or to the Redis interaction stream.
+
+    Raises:
+        HTTPException: 503 if the buffer is full or the stream is unavailable
+    """
+    recorded_at = datetime.now()  # Use naive datetime for DB
+    records = [to_record(interaction, recorded_at) for interaction in interactions]
+    if not records:
+        return
+    try:
+        if get_settings().interaction_ingest_mode == "stream":
+            await publish_interactions(records)
+        else:
+            get_interaction_buffer().add_many(records)
+    except (InteractionBufferFullError, RedisError) as e:
+        logger.warning("Interaction ingestion overloaded", rejected=len(records), error=str(e))
+        raise HTTPException(
+            status_code=503,
+            detail="Interaction ingestion is overloaded, retry shortly",
+            headers={"Retry-After": "1"},
+        ) from e
+
+
+# =============================================================================
+# Preference updates
+# =============================================================================
+
+
+async def _apply_preference_update(
+    user_id: str, product_id: str, interaction_type: str, occurred_at: datetime
+) -> None:
+    """Apply one interaction to the user's preference vector in its own session."""
+    try:
+        async with get_db_session() as session:
+            await UserPreferenceService(session).apply_interaction(
+                user_id, product_id, interaction_type, occurred_at
+            )
+    except Exception as e:
+        logger.error("Online preference update failed", user_id=user_id, error=str(e))
+
+
+def _enqueue_preference_update(
+    user_id: str, product_id: str, interaction_type: str, occurred_at: datetime
+) -> None:
+    """Hand one interaction to the sync worker's preference task."""
+    from sync_worker.main import app as celery_app
+
+    try:
+        celery_app.send_task(
+            "sync_worker.tasks.update_embeddings.apply_user_interaction",
+            args=[user_id, product_id, interaction_type, occurred_at.isoformat()],
+        )
+    except Exception as e:
+        logger.error("Failed to enqueue preference update", user_id=user_id, error=str(e))
+
+
+def schedule_preference_update(
+    background_tasks: BackgroundTasks, interaction: InteractionRequest
+) -> None:
+    """Schedule the O(1) preference update for a tracked interaction.
+
+    Runs after the response is sent, so tracking latency is unaffected.
+    """
+    settings = get_settings()
+    mode = settings.preference_online_updates
+    interaction_type = interaction.interaction_type.value.upper()
+    if (
+        mode == "off"
+        # Stream consumers apply the update once the interaction is persisted
+        or settings.interaction_ingest_mode == "stream"
+        or not interaction.product_id
+        or interaction_type not in UserPreferenceService.INTERACTION_WEIGHTS
+    ):
+        return
+
+    occurred_at = datetime.now()  # Use naive datetime for DB
+    task = _apply_preference_update if mode == "api" else _enqueue_preference_update
+    background_tasks.add_task(
+        task, interaction.user_id, interaction.product_id, interaction_type, occurred_at
+    )
 
 
 # =============================================================================
@@ -80,7 +286,9 @@ class BatchInteractionResponse(BaseModel):
 
 
 @router.post("", response_model=InteractionResponse)
-async def track_interaction(interaction: InteractionRequest) -> InteractionResponse:
+async def track_interaction(
+    interaction: InteractionRequest, background_tasks: BackgroundTasks
+) -> InteractionResponse:
     """
     Track a single user interaction.
 
@@ -105,34 +313,22 @@ async def track_interaction(interaction: InteractionRequest) -> InteractionRespo
     - Track `recommendation_click` when user clicks a recommendation
     - Include `recommendation_context` and `recommendation_position` for attribution
     """
-    # Validate that product_id is provided for product interactions
-    product_interactions = {
-        InteractionType.VIEW,
-        InteractionType.CART_ADD,
-        InteractionType.CART_REMOVE,
-        InteractionType.PURCHASE,
-        InteractionType.WISHLIST_ADD,
-        InteractionType.RECOMMENDATION_CLICK,
-        InteractionType.RECOMMENDATION_VIEW,
-    }
-
-    if interaction.interaction_type in product_interactions and not interaction.product_id:
-        raise HTTPException(
-            status_code=400,
-            detail=f"product_id is required for {interaction.interaction_type.value} interactions",
+    error = validate_interaction(interaction)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+    if await is_duplicate(interaction):
+        return InteractionResponse(
+            success=True,
+            interaction_id=interaction.event_id,
+            recorded_at=datetime.now(UTC).isoformat(),
+            duplicate=True,
         )
 
-    if interaction.interaction_type == InteractionType.SEARCH and not interaction.search_query:
-        raise HTTPException(
-            status_code=400,
-            detail="search_query is required for search interactions",
-        )
+    # Persisted in batches off the request path; 503 when ingestion is overloaded
+    await ingest_interactions([interaction])
 
-    # TODO: Implement actual interaction recording
-    # 1. Validate user exists
-    # 2. Validate product exists (if applicable)
-    # 3. Insert into user_interactions table
-    # 4. Publish event for async processing (user preference update)
+    schedule_preference_update(background_tasks, interaction)
 
     from uuid import uuid4
 
@@ -141,13 +337,14 @@ async def track_interaction(interaction: InteractionRequest) -> InteractionRespo
     return InteractionResponse(
         success=True,
         interaction_id=interaction_id,
-        recorded_at=datetime.now(timezone.utc).isoformat(),
+        recorded_at=datetime.now(UTC).isoformat(),
     )
 
 
 @router.post("/batch", response_model=BatchInteractionResponse)
 async def track_interactions_batch(
     request: BatchInteractionRequest,
+    background_tasks: BackgroundTasks,
 ) -> BatchInteractionResponse:
     """
     Track multiple user interactions in a single request.
@@ -168,19 +365,96 @@ async def track_interactions_batch(
             detail="interactions list must not be empty",
         )
 
-    # TODO: Implement batch interaction recording
-    # 1. Validate all interactions
-    # 2. Batch insert into database
-    # 3. Publish events for async processing
+    valid = [i for i in request.interactions if validate_interaction(i) is None]
+    new = [i for i in valid if not await is_duplicate(i)]
 
-    recorded_count = len(request.interactions)
-    failed_count = 0
+    await ingest_interactions(new)
+
+    for interaction in new:
+        schedule_preference_update(background_tasks, interaction)
+
+    recorded_count = len(new)
+    failed_count = len(request.interactions) - len(valid)
 
     return BatchInteractionResponse(
         success=failed_count == 0,
         recorded_count=recorded_count,
         failed_count=failed_count,
-        recorded_at=datetime.now(timezone.utc).isoformat(),
+        recorded_at=datetime.now(UTC).isoformat(),
+        duplicate_count=len(valid) - len(new),
+    )
+
+
+_BULK_LINES = TypeAdapter(list[BulkInteractionLine])
+
+
+@router.post("/bulk", response_model=BulkInteractionResponse)
+async def upload_interactions_bulk(request: Request) -> BulkInteractionResponse:
+    """
+    Load interactions from a newline-delimited JSON body of any size.
+
+    Each line is one interaction object (the single-interaction fields plus an
+    optional `occurred_at`). Send `Content-Encoding: gzip` for compressed
+    uploads.
+
+    Use this endpoint for:
+    - Backfilling historical events from the e-commerce platform
+    - Replaying exported interaction logs
+
+    **Behavior:**
+    - The body is parsed as it arrives and written in COPY batches, so memory
+      use does not grow with the upload
+    - Invalid lines, and lines the database rejects, are skipped and reported by
+      line number; the rest are recorded
+    - Lines whose `event_id` was already recorded are skipped and counted as duplicates
+    - Rows are written directly, bypassing the live ingestion buffer, and no
+      online preference updates are applied; the periodic rebuild picks them up
+    """
+    settings = get_settings()
+    recorded_at = datetime.now()  # Use naive datetime for DB
+
+    def parse(line: BulkInteractionLine) -> InteractionRecord | str:
+        return validate_interaction(line) or to_record(
+            line, naive_timestamp(line.occurred_at) or recorded_at
+        )
+
+    loader = BulkInteractionLoader(
+        _BULK_LINES,
+        parse,
+        chunk_size=settings.interaction_bulk_chunk_size,
+        max_errors=settings.interaction_bulk_max_errors,
+    )
+    gzipped = request.headers.get("content-encoding", "").lower() == "gzip"
+    try:
+        result = await loader.load(iter_lines(request.stream(), gzipped=gzipped))
+    except Exception as e:
+        logger.error(
+            "Bulk interaction upload failed",
+            lines=loader.result.lines,
+            recorded=loader.result.recorded,
+            error=str(e),
+        )
+        raise HTTPException(
+            status_code=503,
+            detail=(
+                f"Bulk upload stopped near line {loader.result.lines} after recording "
+                f"{loader.result.recorded} interactions"
+            ),
+        ) from e
+
+    logger.info(
+        "Bulk interactions loaded",
+        lines=result.lines,
+        recorded=result.recorded,
+        failed=result.failed,
+    )
+    return BulkInteractionResponse(
+        success=result.failed == 0,
+        line_count=result.lines,
+        recorded_count=result.recorded,
+        duplicate_count=result.duplicates,
+        failed_count=result.failed,
+        errors=result.errors,
     )
 
 
@@ -188,23 +462,35 @@ async def track_interactions_batch(
 async def get_user_interaction_history(
     user_id: str,
     interaction_type: Annotated[InteractionType | None, Query()] = None,
-    limit: Annotated[int, Query(ge=1, le=100)] = 50,
-    offset: Annotated[int, Query(ge=0)] = 0,
-) -> dict:
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    cursor: Annotated[str | None, Query()] = None,
+) -> StreamingResponse:
     """
-    Get interaction history for a user.
+    Get interaction history for a user, newest first.
+
+    Pages are keyset-paginated: pass the ``next_cursor`` of one page as
+    ``cursor`` to get the next, so deep pages cost the same as the first.
+    ``next_cursor`` is null on the last page.
 
     Useful for:
     - Debugging user preferences
     - Building user activity feeds
     - Customer support investigations
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid
     """
-    # TODO: Implement interaction history retrieval
-
-    return {
-        "user_id": user_id,
-        "interactions": [],
-        "total_count": 0,
-        "limit": limit,
-        "offset": offset,
-    }
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return StreamingResponse(
+        stream_history(
+            user_id,
+            limit,
+            interaction_type=interaction_type.name if interaction_type else None,
+            after=after,
+        ),
+        media_type="application/json",
+    )
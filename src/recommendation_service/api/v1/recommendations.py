@@ -1,10 +1,11 @@
 """Recommendation API endpoints."""
 
 from datetime import datetime, timezone
-from typing import Annotated
+from typing import Annotated, Any
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -40,13 +41,45 @@ class RecommendationResponse(BaseModel):
     generated_at: str
 
 
+def render_recommendations(result: dict[str, Any]) -> Response:
+    """
+    Serialise an engine result straight to JSON bytes.
+
+    Produces the same document as ``RecommendationResponse`` without building
+    a model per item or letting FastAPI validate and re-encode the response:
+    each candidate is projected onto the ``RecommendedProduct`` fields
+    (dropping scoring internals such as ``signal``) and dumped once with orjson.
+    The routes keep ``response_model`` for the OpenAPI schema.
+    """
+    payload = {
+        "recommendations": [
+            {
+                "product_id": str(p["product_id"]),
+                "external_product_id": str(p["external_product_id"]),
+                "name": str(p["name"]),
+                "category": str(p["category"]),
+                "price": float(p["price"]),
+                "image_url": p.get("image_url"),
+                "score": float(p["score"]),
+                "position": int(p["position"]),
+            }
+            for p in result["recommendations"]
+        ],
+        "request_id": result["request_id"],
+        "context": result["context"],
+        "user_id": result["user_id"],
+        "generated_at": result["generated_at"],
+    }
+    return Response(orjson.dumps(payload), media_type="application/json")
+
+
 @router.get("/homepage", response_model=RecommendationResponse)
 async def get_homepage_recommendations(
     user_id: Annotated[str, Query(description="User ID for personalization")],
     limit: Annotated[int, Query(ge=1, le=50)] = 12,
     session: AsyncSession = Depends(get_session),
     settings: Settings = Depends(get_settings),
-) -> RecommendationResponse:
+) -> Response:
     """
     Get personalized homepage recommendations for a user.
 
@@ -66,15 +99,7 @@ async def get_homepage_recommendations(
     engine = HybridRecommendationEngine(session)
     result = await engine.get_homepage_recommendations(user_id=user_id, limit=limit)
 
-    return RecommendationResponse(
-        recommendations=[
-            RecommendedProduct(**p) for p in result["recommendations"]
-        ],
-        request_id=result["request_id"],
-        context=result["context"],
-        user_id=result["user_id"],
-        generated_at=result["generated_at"],
-    )
+    return render_recommendations(result)
 
 
 @router.get("/product/{product_id}", response_model=RecommendationResponse)
@@ -84,7 +109,7 @@ async def get_similar_products(
     limit: Annotated[int, Query(ge=1, le=50)] = 8,
     session: AsyncSession = Depends(get_session),
     settings: Settings = Depends(get_settings),
-) -> RecommendationResponse:
+) -> Response:
     """
     Get similar products for a product page.
 
@@ -106,15 +131,7 @@ async def get_similar_products(
         product_id=product_id, user_id=user_id, limit=limit
     )
 
-    return RecommendationResponse(
-        recommendations=[
-            RecommendedProduct(**p) for p in result["recommendations"]
-        ],
-        request_id=result["request_id"],
-        context=result["context"],
-        user_id=result["user_id"],
-        generated_at=result["generated_at"],
-    )
+    return render_recommendations(result)
 
 
 @router.get("/cart", response_model=RecommendationResponse)
@@ -124,7 +141,7 @@ async def get_cart_recommendations(
     limit: Annotated[int, Query(ge=1, le=20)] = 6,
     session: AsyncSession = Depends(get_session),
     settings: Settings = Depends(get_settings),
-) -> RecommendationResponse:
+) -> Response:
     """
     Get recommendations based on cart contents.
 
@@ -153,15 +170,7 @@ async def get_cart_recommendations(
         user_id=user_id, cart_product_ids=cart_product_ids, limit=limit
     )
 
-    return RecommendationResponse(
-        recommendations=[
-            RecommendedProduct(**p) for p in result["recommendations"]
-        ],
-        request_id=result["request_id"],
-        context=result["context"],
-        user_id=result["user_id"],
-        generated_at=result["generated_at"],
-    )
+    return render_recommendations(result)
 
 
 @router.get(
@@ -173,7 +182,7 @@ async def get_frequently_bought_together(
     limit: Annotated[int, Query(ge=1, le=10)] = 4,
     session: AsyncSession = Depends(get_session),
     settings: Settings = Depends(get_settings),
-) -> RecommendationResponse:
+) -> Response:
     """
     Get frequently bought together products.
 
@@ -195,12 +204,4 @@ async def get_frequently_bought_together(
         product_id=product_id, limit=limit
     )
 
-    return RecommendationResponse(
-        recommendations=[
-            RecommendedProduct(**p) for p in result["recommendations"]
-        ],
-        request_id=result["request_id"],
-        context=result["context"],
-        user_id=result["user_id"],
-        generated_at=result["generated_at"],
-    )
+    return render_recommendations(result)
@@ -34,9 +34,19 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in v.split(",")]
         return v
 
+    # Startup warmup (readiness reports not-ready until it has finished)
+    warmup_enabled: bool = True
+    warmup_timeout_seconds: float = 120.0
+
     ecommerce_api_base_url: str = "https://gateway-ecommerce.reemioltd.com"
     ecommerce_api_key: str = ""
     ecommerce_api_timeout: int = 30
+    # Keep-alive connection pool, page size, page requests in flight while
+    # streaming a collection, and attempts per request (jittered backoff)
+    ecommerce_api_max_connections: int = 10
+    ecommerce_api_page_size: int = 500
+    ecommerce_api_prefetch_pages: int = 4
+    ecommerce_api_max_attempts: int = 5
 
     postgres_host: str = "localhost"
     postgres_port: int = 5432
@@ -44,6 +54,10 @@ class Settings(BaseSettings):
     postgres_password: str = ""
     postgres_db: str = "reemio_recommender"
 
+    # Connection pool (0 = NullPool, a fresh connection per session)
+    db_pool_size: int = 0
+    db_max_overflow: int = 10
+
     @property
     def database_url(self) -> str:
         """Construct PostgreSQL connection URL."""
@@ -63,6 +77,37 @@ class Settings(BaseSettings):
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
     embedding_dimension: int = 384
 
+    # Model backend: "torch" (sentence-transformers), "onnx" (exported model on CPU)
+    # or "mock" (deterministic hash-seeded vectors for tests and load tests)
+    embedding_backend: Literal["torch", "onnx", "mock"] = "torch"
+    embedding_onnx_path: str = "models/all-MiniLM-L6-v2-onnx"
+    embedding_onnx_quantized: bool = False
+    embedding_onnx_threads: int = 0
+
+    # Async encoder pool (0 workers = run on a background thread in-process;
+    # Celery prefork children always do, as they may not start processes)
+    embedding_pool_workers: int = 1
+    embedding_pool_max_queue: int = 64
+    embedding_pool_torch_threads: int = 1
+    embedding_pool_queue_timeout_seconds: float = 5.0
+
+    # Length-bucketed batching: padded tokens and texts per forward pass
+    embedding_token_budget: int = 8192
+    embedding_max_batch_size: int = 128
+
+    # Bulk embedding backfill pipeline
+    embedding_backfill_read_batch_size: int = 1000
+    embedding_backfill_encode_batch_size: int = 64
+    embedding_backfill_write_batch_size: int = 1000
+    embedding_backfill_queue_size: int = 4
+
+    # In-process catalog embedding matrix used for similarity search (TTL 0 = disabled)
+    catalog_cache_ttl_seconds: float = 300.0
+    catalog_cache_max_products: int = 20000
+    # Redis pub/sub channel product sync publishes stock/price changes and
+    # invalidations on, applied to every API process's cache (empty = disabled)
+    catalog_update_channel: str = "reemio:catalog-updates"
+
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_password: str = ""
@@ -112,6 +157,33 @@ class Settings(BaseSettings):
     # -------------------------------------------------------------------------
     sync_products_interval_minutes: int = 60
     sync_orders_interval_minutes: int = 30
+    # Products per set-based upsert statement during product sync
+    product_sync_batch_size: int = 1000
+    # Read products from the shared database or page them from the e-commerce API
+    product_sync_source: Literal["database", "api"] = "database"
+    # Product sync restarts this far before its updatedAt watermark, to pick
+    # up rows committed late with an older timestamp
+    product_sync_overlap_seconds: int = 60
+    # The product change listener waits this long after the first change
+    # notification of a burst, then syncs every product changed meanwhile
+    product_listener_debounce_seconds: float = 1.0
+    # Product ids the listener keeps pending; further notifications are ignored
+    # and left to a catch-up sync queued once the backlog drains
+    product_listener_max_pending: int = 100_000
+    # Failed syncs of a product on its own before the listener drops it
+    product_listener_max_attempts: int = 3
+    # Orders per page during order sync (interactions and co-purchase counts
+    # of a page are written in one transaction)
+    order_sync_batch_size: int = 500
+    # Order sync restarts this far before its createdAt watermark
+    order_sync_overlap_seconds: int = 60
+    # Shard tasks per preference / embedding rebuild (a Celery chord)
+    sync_rebuild_shards: int = 8
+    # Monthly user_interactions partitions: months created ahead, months of raw
+    # rows kept (older months become daily counts), months of daily counts kept
+    interaction_partition_premake_months: int = 3
+    interaction_raw_retention_months: int = 6
+    interaction_daily_retention_months: int = 36
 
     # -------------------------------------------------------------------------
     # Recommendation Settings
@@ -120,6 +192,51 @@ class Settings(BaseSettings):
     max_recommendation_limit: int = 50
     rerank_candidates_multiplier: int = 2
     attribution_window_days: int = 7
+    # Fold each tracked interaction into the user's preference vector: in the API
+    # process after the response ("api"), via the sync worker ("celery"), or not
+    # at all ("off", preferences change only when the batch rebuild runs)
+    preference_online_updates: Literal["off", "api", "celery"] = "api"
+    # Multi-interest homepage retrieval: up to N k-means centroids per user;
+    # clusters holding less than this share of the user's weight are dropped
+    preference_max_interests: int = 3
+    preference_min_interest_share: float = 0.15
+    # Dirty-user preference rebuilds: users per chunk and chunks in flight
+    preference_rebuild_chunk_size: int = 5000
+    preference_rebuild_concurrency: int = 4
+    # How often the API refreshes the dirty-user backlog gauge (0 disables)
+    preference_dirty_gauge_interval_seconds: float = 60.0
+    # Tracked interactions are buffered in-process and written in COPY batches
+    # by size or interval; once max_size rows are waiting the API answers 503
+    interaction_buffer_max_size: int = 50000
+    interaction_buffer_flush_size: int = 2000
+    interaction_buffer_flush_interval_seconds: float = 1.0
+    interaction_buffer_shutdown_timeout_seconds: float = 10.0
+    # Attempts at writing a single row the database rejects (bad value) before
+    # it is logged and dropped, so one bad row cannot block ingestion
+    interaction_row_write_attempts: int = 3
+    # "buffer" writes from the API process; "stream" XADDs to a Redis stream that
+    # interaction_worker consumers persist (they also apply the online preference
+    # and popularity updates, so the API schedules none in that mode)
+    interaction_ingest_mode: Literal["buffer", "stream"] = "buffer"
+    interaction_stream_key: str = "reemio:interactions"
+    interaction_stream_group: str = "interaction-writers"
+    interaction_stream_maxlen: int = 1000000
+    interaction_stream_batch_size: int = 1000
+    interaction_stream_block_ms: int = 1000
+    interaction_stream_claim_idle_ms: int = 60000
+    # A batch delivered this many times is written entry by entry; entries the
+    # database still rejects go to the dead-letter stream and are acknowledged
+    interaction_stream_max_deliveries: int = 5
+    interaction_stream_dead_letter_key: str = "reemio:interactions:dead"
+    # Bulk NDJSON uploads: lines validated and written per COPY, failed lines reported
+    interaction_bulk_chunk_size: int = 5000
+    interaction_bulk_max_errors: int = 100
+    # Client event id dedup: Bloom filter in process memory or shared in Redis
+    # ("off" disables the request-path check; the writer always drops repeats)
+    interaction_dedup_backend: Literal["off", "memory", "redis"] = "memory"
+    interaction_dedup_window_seconds: float = 86400.0
+    interaction_dedup_capacity: int = 1000000
+    interaction_dedup_false_positive_rate: float = 0.001
 
     # -------------------------------------------------------------------------
     # Email Campaign Settings
@@ -0,0 +1,129 @@
+"""Prometheus metrics shared across the recommendation service.
+
+Metrics are defined once at module level so every importer observes the same
+collectors. They are exposed by the API under ``/metrics``.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Latency buckets tuned for in-process work (sub-millisecond to tens of seconds)
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+# =============================================================================
+# Embedding Encoder
+# =============================================================================
+
+EMBEDDING_ENCODE_QUEUE_WAIT = Histogram(
+    "reemio_embedding_encode_queue_wait_seconds",
+    "Time an encode request waited for a free encoder process",
+    buckets=LATENCY_BUCKETS,
+)
+
+EMBEDDING_ENCODE_COMPUTE = Histogram(
+    "reemio_embedding_encode_compute_seconds",
+    "Time spent inside the encoder process running the model forward pass",
+    buckets=LATENCY_BUCKETS,
+)
+
+EMBEDDING_ENCODE_TEXTS = Counter(
+    "reemio_embedding_encode_texts_total",
+    "Number of texts encoded by the encoder pool",
+)
+
+EMBEDDING_ENCODE_REJECTED = Counter(
+    "reemio_embedding_encode_rejected_total",
+    "Encode requests rejected because the encoder queue was full",
+)
+
+EMBEDDING_ENCODE_QUEUE_DEPTH = Gauge(
+    "reemio_embedding_encode_queue_depth",
+    "Encode requests waiting for or running on an encoder process",
+)
+
+# =============================================================================
+# User Preferences
+# =============================================================================
+
+PREFERENCE_DIRTY_USERS = Gauge(
+    "reemio_preference_dirty_users",
+    "Users with interactions written since their preference vector was last rebuilt",
+)
+
+# =============================================================================
+# Interaction Ingestion
+# =============================================================================
+
+INTERACTION_BUFFER_DEPTH = Gauge(
+    "reemio_interaction_buffer_depth",
+    "Tracked interactions waiting in the buffer to be written",
+)
+
+INTERACTION_BUFFER_REJECTED = Counter(
+    "reemio_interaction_buffer_rejected_total",
+    "Interactions rejected because the buffer was full",
+)
+
+INTERACTION_FLUSH_LATENCY = Histogram(
+    "reemio_interaction_flush_seconds",
+    "Time to write one batch of buffered interactions",
+    buckets=LATENCY_BUCKETS,
+)
+
+INTERACTION_FLUSH_ROWS = Counter(
+    "reemio_interaction_flush_rows_total",
+    "Interactions written by the buffer writer",
+)
+
+INTERACTION_FLUSH_FAILURES = Counter(
+    "reemio_interaction_flush_failures_total",
+    "Interaction batches that failed to write and were kept for retry",
+)
+
+INTERACTION_ROWS_REJECTED = Counter(
+    "reemio_interaction_rows_rejected_total",
+    "Interactions dropped or dead-lettered because they could not be written, by writer",
+    ["stage"],
+)
+
+INTERACTION_DEDUP_CHECKS = Counter(
+    "reemio_interaction_dedup_checks_total",
+    "Tracked interactions with a client event id checked for duplicates",
+)
+
+INTERACTION_DEDUP_BLOOM_HITS = Counter(
+    "reemio_interaction_dedup_bloom_hits_total",
+    "Event ids the Bloom filter flagged as possibly seen (confirmed against the database)",
+)
+
+INTERACTION_DUPLICATES = Counter(
+    "reemio_interaction_duplicates_total",
+    "Duplicate interactions dropped, by where they were caught (api or writer)",
+    ["stage"],
+)
+
+ECOMMERCE_API_LATENCY = Histogram(
+    "reemio_ecommerce_api_request_seconds",
+    "Latency of e-commerce API page requests, including retries",
+    buckets=LATENCY_BUCKETS,
+)
+
+ECOMMERCE_API_RETRIES = Counter(
+    "reemio_ecommerce_api_retries_total",
+    "E-commerce API requests retried after a transport error, 429 or 5xx",
+)
@@ -0,0 +1,147 @@
+"""Startup warmup for the API service.
+
+Loading the embedding model, creating the Pinecone client, opening the first
+database connections and loading the catalog vector cache are slow one-off
+costs. Running them from the application lifespan keeps them off the first real
+request, and the readiness probe reports not-ready until warmup has finished so
+traffic only reaches warm instances.
+
+Heavy libraries (sentence-transformers, torch, pinecone) are still imported
+lazily inside the steps, so CLI and worker entry points that import this package
+without running warmup do not pay for them.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import structlog
+from sqlalchemy import text
+
+from recommendation_service.config import get_settings
+
+logger = structlog.get_logger()
+
+WarmupStep = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class WarmupState:
+    """Progress of the startup warmup, read by the readiness probe."""
+
+    completed: bool = False
+    steps: dict[str, str] = field(default_factory=dict)
+    duration_seconds: float | None = None
+
+
+_state = WarmupState()
+
+
+def get_warmup_state() -> WarmupState:
+    """Return the current warmup state."""
+    return _state
+
+
+async def warm_database() -> None:
+    """Open database connections so the pool (and dialect setup) is ready."""
+    from recommendation_service.infrastructure.database.connection import get_db_session
+
+    async def ping() -> None:
+        async with get_db_session() as session:
+            await session.execute(text("SELECT 1"))
+
+    # Hold several sessions at once so the pool actually opens that many connections
+    await asyncio.gather(*(ping() for _ in range(max(1, get_settings().db_pool_size))))
+
+
+async def warm_embedding_encoder() -> None:
+    """Start the encoder pool and run a dummy encode on every worker."""
+    from recommendation_service.infrastructure.vector.encoder_pool import get_async_encoder
+
+    encoder = get_async_encoder()
+    encoder.start()
+    # One request per worker so each process has loaded the model before traffic arrives
+    await asyncio.gather(
+        *(encoder.encode("warmup") for _ in range(max(1, encoder.max_workers)))
+    )
+
+
+async def warm_reranker() -> None:
+    """Create the Pinecone client used for reranking."""
+    from recommendation_service.services.reranker import get_pinecone_client
+
+    await asyncio.to_thread(get_pinecone_client)
+
+
+async def warm_catalog_cache() -> None:
+    """Load the catalog vector matrix used by similarity search."""
+    from recommendation_service.infrastructure.database.connection import get_db_session
+    from recommendation_service.services.catalog_cache import get_catalog_cache
+
+    cache = get_catalog_cache()
+    if not cache.enabled:
+        return
+    async with get_db_session() as session:
+        await cache.get(session)
+
+
+WARMUP_STEPS: dict[str, WarmupStep] = {
+    "database": warm_database,
+    "catalog_cache": warm_catalog_cache,
+    "embedding_encoder": warm_embedding_encoder,
+    "reranker": warm_reranker,
+}
+
+
+async def run_warmup(
+    steps: dict[str, WarmupStep] | None = None, timeout: float | None = None
+) -> WarmupState:
+    """
+    Run all warmup steps concurrently.
+
+    A failing or timed-out step is logged and recorded but does not stop the
+    others; the service then falls back to lazy initialisation for that
+    dependency, exactly as it would without warmup.
+
+    Args:
+        steps: Steps to run by name (defaults to ``WARMUP_STEPS``)
+        timeout: Per-step timeout in seconds (defaults to settings)
+
+    Returns:
+        The updated warmup state
+    """
+    settings = get_settings()
+    steps = WARMUP_STEPS if steps is None else steps
+    timeout = settings.warmup_timeout_seconds if timeout is None else timeout
+
+    _state.completed = False
+    _state.steps = dict.fromkeys(steps, "pending")
+    started_at = time.perf_counter()
+
+    async def run_step(name: str, step: WarmupStep) -> None:
+        step_started_at = time.perf_counter()
+        try:
+            async with asyncio.timeout(timeout):
+                await step()
+        except Exception as e:
+            _state.steps[name] = "failed"
+            logger.warning("Warmup step failed", step=name, error=str(e) or type(e).__name__)
+            return
+        _state.steps[name] = "ok"
+        logger.info(
+            "Warmup step completed",
+            step=name,
+            seconds=round(time.perf_counter() - step_started_at, 3),
+        )
+
+    await asyncio.gather(*(run_step(name, step) for name, step in steps.items()))
+
+    _state.duration_seconds = time.perf_counter() - started_at
+    _state.completed = True
+    logger.info(
+        "Warmup completed",
+        seconds=round(_state.duration_seconds, 3),
+        steps=_state.steps,
+    )
+    return _state
@@ -10,8 +10,20 @@ from recommendation_service.config import get_settings
 
 
 def get_async_engine():
-    """Create async database engine."""
+    """Create async database engine.
+
+    Uses a connection pool when ``DB_POOL_SIZE`` is set so warm connections are
+    reused across requests; otherwise falls back to NullPool.
+    """
     settings = get_settings()
+    if settings.db_pool_size > 0:
+        return create_async_engine(
+            settings.database_url,
+            echo=settings.debug,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_pre_ping=True,
+        )
     return create_async_engine(
         settings.database_url,
         echo=settings.debug,
@@ -0,0 +1,31 @@
+"""add_preference_running_state
+
+Revision ID: 2cb5cb7c1325
+Revises: 016b2a819b85
+Create Date: 2026-10-19 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '2cb5cb7c1325'
+down_revision: Union[str, None] = '016b2a819b85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Decayed running sum of weighted product vectors, its total weight and the
+    # time both were decayed to; lets each interaction update the preference in O(1)
+    op.add_column('user_preference_embeddings', sa.Column('weighted_sum', sa.JSON(), nullable=True), schema='recommender')
+    op.add_column('user_preference_embeddings', sa.Column('total_weight', sa.Float(), nullable=True), schema='recommender')
+    op.add_column('user_preference_embeddings', sa.Column('decay_updated_at', sa.DateTime(), nullable=True), schema='recommender')
+
+
+def downgrade() -> None:
+    op.drop_column('user_preference_embeddings', 'decay_updated_at', schema='recommender')
+    op.drop_column('user_preference_embeddings', 'total_weight', schema='recommender')
+    op.drop_column('user_preference_embeddings', 'weighted_sum', schema='recommender')
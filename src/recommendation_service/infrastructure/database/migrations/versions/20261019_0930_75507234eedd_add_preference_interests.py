@@ -0,0 +1,29 @@
+"""add_preference_interests
+
+Revision ID: 75507234eedd
+Revises: 2cb5cb7c1325
+Create Date: 2026-10-19 09:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '75507234eedd'
+down_revision: Union[str, None] = '2cb5cb7c1325'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Up to PREFERENCE_MAX_INTERESTS unit centroids packed as float16 rows, and
+    # their decayed weights (used as retrieval quotas)
+    op.add_column('user_preference_embeddings', sa.Column('interest_centroids', sa.LargeBinary(), nullable=True), schema='recommender')
+    op.add_column('user_preference_embeddings', sa.Column('interest_weights', sa.JSON(), nullable=True), schema='recommender')
+
+
+def downgrade() -> None:
+    op.drop_column('user_preference_embeddings', 'interest_weights', schema='recommender')
+    op.drop_column('user_preference_embeddings', 'interest_centroids', schema='recommender')
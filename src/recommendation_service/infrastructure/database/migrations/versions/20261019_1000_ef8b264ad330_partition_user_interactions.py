@@ -0,0 +1,140 @@
+"""partition_user_interactions
+
+Revision ID: ef8b264ad330
+Revises: 75507234eedd
+Create Date: 2026-10-19 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = 'ef8b264ad330'
+down_revision: Union[str, None] = '75507234eedd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INTERACTION_TYPE = postgresql.ENUM(
+    'VIEW', 'CART_ADD', 'CART_REMOVE', 'PURCHASE', 'WISHLIST_ADD', 'SEARCH',
+    'RECOMMENDATION_CLICK', 'RECOMMENDATION_VIEW',
+    name='interactiontype', schema='recommender', create_type=False,
+)
+
+INDEXES = [
+    ('ix_recommender_user_interactions_created_at', ['created_at']),
+    ('ix_recommender_user_interactions_external_product_id', ['external_product_id']),
+    ('ix_recommender_user_interactions_external_user_id', ['external_user_id']),
+    ('ix_recommender_user_interactions_interaction_type', ['interaction_type']),
+    ('ix_user_interactions_user_type_created', ['external_user_id', 'interaction_type', 'created_at']),
+]
+
+
+def _interaction_columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('recommender.user_interactions_id_seq')"), nullable=False),
+        sa.Column('external_user_id', sa.String(length=255), nullable=False),
+        sa.Column('external_product_id', sa.String(length=255), nullable=True),
+        sa.Column('interaction_type', INTERACTION_TYPE, nullable=False),
+        sa.Column('search_query', sa.Text(), nullable=True),
+        sa.Column('recommendation_context', sa.String(length=50), nullable=True),
+        sa.Column('recommendation_position', sa.Integer(), nullable=True),
+        sa.Column('recommendation_request_id', sa.String(length=255), nullable=True),
+        sa.Column('session_id', sa.String(length=255), nullable=True),
+        sa.Column('extra_data', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    ]
+
+
+def _drop_old_indexes(table: str) -> None:
+    op.execute(f'ALTER TABLE recommender.{table} DROP CONSTRAINT user_interactions_pkey')
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name=table, schema='recommender')
+
+
+def _create_indexes() -> None:
+    for name, columns in INDEXES:
+        op.create_index(name, 'user_interactions', columns, unique=False, schema='recommender')
+
+
+def upgrade() -> None:
+    # Swap the heap table for one range-partitioned by month on created_at, so
+    # time-bounded queries only scan the partitions they need and old months
+    # can be rolled up and dropped as a whole
+    op.rename_table('user_interactions', 'user_interactions_legacy', schema='recommender')
+    _drop_old_indexes('user_interactions_legacy')
+
+    op.create_table('user_interactions',
+    *_interaction_columns(),
+    # The partition key has to be part of the primary key
+    sa.PrimaryKeyConstraint('id', 'created_at', name='user_interactions_pkey'),
+    schema='recommender',
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    _create_indexes()
+
+    # Monthly partitions from the oldest stored interaction to three months ahead;
+    # the maintenance task keeps creating them from here on
+    op.execute("""
+        DO $$
+        DECLARE
+            month date;
+            last_month date := (date_trunc('month', now()) + interval '3 months')::date;
+        BEGIN
+            SELECT date_trunc('month', COALESCE(MIN(created_at), now()))::date
+            INTO month FROM recommender.user_interactions_legacy;
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE recommender.%I PARTITION OF recommender.user_interactions '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'user_interactions_p' || to_char(month, 'YYYYMM'),
+                    month,
+                    (month + interval '1 month')::date
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+    # Catches rows outside every monthly partition (e.g. very old backfills)
+    op.execute('CREATE TABLE recommender.user_interactions_default PARTITION OF recommender.user_interactions DEFAULT')
+
+    op.execute('INSERT INTO recommender.user_interactions SELECT * FROM recommender.user_interactions_legacy')
+    op.execute('ALTER SEQUENCE recommender.user_interactions_id_seq OWNED BY recommender.user_interactions.id')
+    op.drop_table('user_interactions_legacy', schema='recommender')
+
+    # Daily counts that replace raw interactions once their partition expires
+    op.create_table('user_interaction_daily',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('external_user_id', sa.String(length=255), nullable=False),
+    sa.Column('external_product_id', sa.String(length=255), nullable=True),
+    sa.Column('interaction_type', INTERACTION_TYPE, nullable=False),
+    sa.Column('interaction_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    schema='recommender'
+    )
+    op.create_index(op.f('ix_recommender_user_interaction_daily_day'), 'user_interaction_daily', ['day'], unique=False, schema='recommender')
+    op.create_index('ix_user_interaction_daily_user_day', 'user_interaction_daily', ['external_user_id', 'day'], unique=False, schema='recommender')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_interaction_daily_user_day', table_name='user_interaction_daily', schema='recommender')
+    op.drop_index(op.f('ix_recommender_user_interaction_daily_day'), table_name='user_interaction_daily', schema='recommender')
+    op.drop_table('user_interaction_daily', schema='recommender')
+
+    op.rename_table('user_interactions', 'user_interactions_partitioned', schema='recommender')
+    _drop_old_indexes('user_interactions_partitioned')
+
+    op.create_table('user_interactions',
+    *_interaction_columns(),
+    sa.PrimaryKeyConstraint('id', name='user_interactions_pkey'),
+    schema='recommender'
+    )
+    _create_indexes()
+
+    op.execute('INSERT INTO recommender.user_interactions SELECT * FROM recommender.user_interactions_partitioned')
+    op.execute('ALTER SEQUENCE recommender.user_interactions_id_seq OWNED BY recommender.user_interactions.id')
+    # Dropping the parent drops every partition
+    op.drop_table('user_interactions_partitioned', schema='recommender')
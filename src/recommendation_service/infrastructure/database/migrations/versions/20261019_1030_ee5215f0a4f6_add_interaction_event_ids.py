@@ -0,0 +1,37 @@
+"""add_interaction_event_ids
+
+Revision ID: ee5215f0a4f6
+Revises: ef8b264ad330
+Create Date: 2026-10-19 10:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'ee5215f0a4f6'
+down_revision: Union[str, None] = 'ef8b264ad330'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Optional client event id so retried submissions are recorded once
+    op.add_column('user_interactions', sa.Column('event_id', sa.String(length=64), nullable=True), schema='recommender')
+
+    # Registered event ids; the primary key is the authoritative duplicate check
+    op.create_table('interaction_event_ids',
+    sa.Column('event_id', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('event_id'),
+    schema='recommender'
+    )
+    op.create_index(op.f('ix_recommender_interaction_event_ids_created_at'), 'interaction_event_ids', ['created_at'], unique=False, schema='recommender')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_recommender_interaction_event_ids_created_at'), table_name='interaction_event_ids', schema='recommender')
+    op.drop_table('interaction_event_ids', schema='recommender')
+    op.drop_column('user_interactions', 'event_id', schema='recommender')
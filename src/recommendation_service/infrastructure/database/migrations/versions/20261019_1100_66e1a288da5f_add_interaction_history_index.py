@@ -0,0 +1,25 @@
+"""add_interaction_history_index
+
+Revision ID: 66e1a288da5f
+Revises: ee5215f0a4f6
+Create Date: 2026-10-19 11:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '66e1a288da5f'
+down_revision: Union[str, None] = 'ee5215f0a4f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination of a user's history on (created_at, id), newest first
+    op.create_index('ix_user_interactions_user_created_id', 'user_interactions', ['external_user_id', 'created_at', 'id'], unique=False, schema='recommender')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_interactions_user_created_id', table_name='user_interactions', schema='recommender')
@@ -0,0 +1,26 @@
+"""add_product_content_fingerprint
+
+Revision ID: d063ac046f95
+Revises: 66e1a288da5f
+Create Date: 2026-10-19 11:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd063ac046f95'
+down_revision: Union[str, None] = '66e1a288da5f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Hash of the embedding text, so sync only re-embeds products whose text changed
+    op.add_column('product_embeddings', sa.Column('content_fingerprint', sa.String(length=32), nullable=True), schema='recommender')
+
+
+def downgrade() -> None:
+    op.drop_column('product_embeddings', 'content_fingerprint', schema='recommender')
@@ -0,0 +1,36 @@
+"""add_product_copurchase_counts
+
+Revision ID: 0bd887f1884d
+Revises: d063ac046f95
+Create Date: 2026-10-19 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0bd887f1884d'
+down_revision: Union[str, None] = 'd063ac046f95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Orders containing both products, maintained incrementally by order sync;
+    # each pair is stored in both directions
+    op.create_table('product_copurchase_counts',
+    sa.Column('product_id', sa.String(length=255), nullable=False),
+    sa.Column('co_product_id', sa.String(length=255), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('product_id', 'co_product_id'),
+    schema='recommender'
+    )
+    op.create_index('ix_product_copurchase_counts_top', 'product_copurchase_counts', ['product_id', sa.text('order_count DESC')], unique=False, schema='recommender')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_copurchase_counts_top', table_name='product_copurchase_counts', schema='recommender')
+    op.drop_table('product_copurchase_counts', schema='recommender')
@@ -0,0 +1,51 @@
+"""notify_product_changes
+
+Revision ID: 5a3f9c2e7b14
+Revises: 0bd887f1884d
+Create Date: 2026-10-19 12:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '5a3f9c2e7b14'
+down_revision: Union[str, None] = '0bd887f1884d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NOTIFY the product listener with the id of every inserted, deleted or
+    # changed e-commerce product; notifications are delivered on commit and
+    # identical ones within a transaction are folded into one
+    op.execute("""
+        CREATE FUNCTION recommender.notify_product_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify(
+                'recommender_product_changes',
+                CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER recommender_notify_product_insert_delete
+        AFTER INSERT OR DELETE ON public.products
+        FOR EACH ROW EXECUTE FUNCTION recommender.notify_product_change()
+    """)
+    op.execute("""
+        CREATE TRIGGER recommender_notify_product_update
+        AFTER UPDATE OF name, description, "priceCents", stock, "isActive", "categoryId"
+        ON public.products
+        FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+        EXECUTE FUNCTION recommender.notify_product_change()
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS recommender_notify_product_update ON public.products')
+    op.execute('DROP TRIGGER IF EXISTS recommender_notify_product_insert_delete ON public.products')
+    op.execute('DROP FUNCTION IF EXISTS recommender.notify_product_change()')
@@ -0,0 +1,40 @@
+"""add_preference_dirty_users
+
+Revision ID: 7a45eb177d6e
+Revises: 5a3f9c2e7b14
+Create Date: 2026-10-19 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '7a45eb177d6e'
+down_revision: Union[str, None] = '5a3f9c2e7b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Users whose preference vector needs a rebuild, marked when their
+    # interactions are written
+    op.create_table('preference_dirty_users',
+    sa.Column('external_user_id', sa.String(length=255), nullable=False),
+    sa.Column('marked_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('external_user_id'),
+    schema='recommender'
+    )
+    # Every user active within the default lookback gets one rebuild
+    op.execute("""
+        INSERT INTO recommender.preference_dirty_users (external_user_id, marked_at)
+        SELECT DISTINCT external_user_id, LOCALTIMESTAMP
+        FROM recommender.user_interactions
+        WHERE created_at >= LOCALTIMESTAMP - INTERVAL '90 days'
+        AND external_product_id IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('preference_dirty_users', schema='recommender')
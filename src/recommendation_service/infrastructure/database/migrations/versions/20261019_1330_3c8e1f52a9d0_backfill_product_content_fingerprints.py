@@ -0,0 +1,83 @@
+"""backfill_product_content_fingerprints
+
+Revision ID: 3c8e1f52a9d0
+Revises: 7a45eb177d6e
+Create Date: 2026-10-19 13:30:00.000000+00:00
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3c8e1f52a9d0'
+down_revision: Union[str, None] = '7a45eb177d6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def stored_product_text(name: str | None, category: str | None, price_cents: int | None) -> str:
+    """EmbeddingService.stored_product_text as of this revision."""
+    parts = []
+    if name:
+        parts.append(name)
+    if category:
+        parts.append(f'Category: {category}')
+    price_cents = price_cents or 0
+    if price_cents > 0:
+        price = price_cents / 100
+        if price < 25:
+            parts.append('Budget friendly')
+        elif price < 100:
+            parts.append('Mid-range')
+        elif price < 500:
+            parts.append('Premium')
+        else:
+            parts.append('Luxury')
+    return ' | '.join(parts)
+
+
+def content_fingerprint(name: str | None, category: str | None, price_cents: int | None) -> str:
+    """EmbeddingService.content_fingerprint as of this revision."""
+    text = stored_product_text(name, category, price_cents)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def upgrade() -> None:
+    # Fingerprint every row from its stored fields, taking the current embedding
+    # as built from them. A NULL fingerprint would make the next content change
+    # of an untouched row look unchanged, and it would never be re-embedded.
+    connection = op.get_bind()
+    after_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                'SELECT id, name, category, price_cents FROM recommender.product_embeddings '
+                'WHERE id > :after_id ORDER BY id LIMIT :limit'
+            ),
+            {'after_id': after_id, 'limit': BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            sa.text(
+                'UPDATE recommender.product_embeddings pe SET content_fingerprint = f.fingerprint '
+                'FROM unnest(CAST(:ids AS integer[]), CAST(:fingerprints AS text[])) '
+                'AS f(id, fingerprint) WHERE pe.id = f.id'
+            ),
+            {
+                'ids': [row.id for row in rows],
+                'fingerprints': [
+                    content_fingerprint(row.name, row.category, row.price_cents) for row in rows
+                ],
+            },
+        )
+        after_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.execute('UPDATE recommender.product_embeddings SET content_fingerprint = NULL')
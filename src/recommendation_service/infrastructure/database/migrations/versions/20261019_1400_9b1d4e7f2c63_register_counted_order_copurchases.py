@@ -0,0 +1,36 @@
+"""register_counted_order_copurchases
+
+Revision ID: 9b1d4e7f2c63
+Revises: 3c8e1f52a9d0
+Create Date: 2026-10-19 14:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '9b1d4e7f2c63'
+down_revision: Union[str, None] = '3c8e1f52a9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Order sync now deduplicates co-purchase counting by order key
+    # ('copurchase:' || md5(order id)); register the orders up to the current
+    # watermark that a re-read overlap could reach, so they are not counted twice
+    op.execute("""
+        INSERT INTO recommender.interaction_event_ids (event_id, created_at)
+        SELECT 'copurchase:' || md5(o.id::text), LOCALTIMESTAMP
+        FROM public.orders o
+        JOIN recommender.sync_status s ON s.id = 'orders'
+        WHERE s.last_sync_cursor IS NOT NULL
+        AND o."createdAt" <= split_part(s.last_sync_cursor, '|', 1)::timestamp
+        AND o."createdAt" >= split_part(s.last_sync_cursor, '|', 1)::timestamp - INTERVAL '1 day'
+        ON CONFLICT (event_id) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM recommender.interaction_event_ids WHERE event_id LIKE 'copurchase:%'")
@@ -4,7 +4,7 @@ These models are stored in the 'recommender' schema, separate from the
 e-commerce tables but in the same database for efficient joins.
 """
 
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum as PyEnum
 from typing import Any, Optional
 
@@ -18,15 +18,18 @@ except ImportError:
 from sqlalchemy import (
     JSON,
     Boolean,
+    Date,
     DateTime,
     Enum,
     Float,
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
     String,
     Text,
     func,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -119,6 +122,10 @@ class ProductEmbedding(Base):
     # Popularity score (0-1, updated periodically)
     popularity_score: Mapped[float] = mapped_column(Float, default=0.0)
 
+    # Hash of the text the embedding is generated from; a change marks the
+    # embedding stale (embedding_updated_at is cleared)
+    content_fingerprint: Mapped[Optional[str]] = mapped_column(String(32))
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
@@ -166,6 +173,16 @@ class UserPreferenceEmbedding(Base):
     avg_price_max: Mapped[Optional[float]] = mapped_column(Float)
     interaction_count: Mapped[int] = mapped_column(Integer, default=0)
 
+    # Running state for online updates: decayed weighted sum of product vectors
+    # and its total weight, both as of decay_updated_at
+    weighted_sum: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+    total_weight: Mapped[Optional[float]] = mapped_column(Float)
+    decay_updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    # Interest centroids (float16 rows, see ops.pack_vectors) and their weights
+    interest_centroids: Mapped[Optional[bytes]] = mapped_column(LargeBinary)
+    interest_weights: Mapped[Optional[list]] = mapped_column(JSON)
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
@@ -178,6 +195,21 @@ class UserPreferenceEmbedding(Base):
     __table_args__ = ({"schema": SCHEMA},)
 
 
+class PreferenceDirtyUser(Base):
+    """Users with interactions written since their preference vector was last rebuilt.
+
+    Marked in the same transaction as the interaction COPY and cleared by the
+    periodic rebuild, unless the user was marked again in the meantime.
+    """
+
+    __tablename__ = "preference_dirty_users"
+
+    external_user_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    marked_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = ({"schema": SCHEMA},)
+
+
 # =============================================================================
 # User Interactions (Recommendation-specific tracking)
 # =============================================================================
@@ -188,6 +220,9 @@ class UserInteraction(Base):
 
     This supplements the e-commerce events table with recommendation-specific
     data like recommendation context, position, and attribution.
+
+    Range-partitioned by month on ``created_at``; expired months are rolled up
+    into ``UserInteractionDaily`` and dropped by the partition maintenance task.
     """
 
     __tablename__ = "user_interactions"
@@ -216,9 +251,12 @@ class UserInteraction(Base):
     # Additional data
     extra_data: Mapped[Optional[dict]] = mapped_column(JSON, default=dict)
 
-    # Timestamp
+    # Client-supplied id used to drop retried submissions (see InteractionEventId)
+    event_id: Mapped[Optional[str]] = mapped_column(String(64))
+
+    # Timestamp (partition key, so part of the primary key)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, server_default=func.now(), nullable=False, index=True
+        DateTime, server_default=func.now(), primary_key=True, index=True
     )
 
     __table_args__ = (
@@ -228,6 +266,63 @@ class UserInteraction(Base):
             "interaction_type",
             "created_at",
         ),
+        Index(
+            "ix_user_interactions_user_created_id",
+            "external_user_id",
+            "created_at",
+            "id",
+        ),
+        {"schema": SCHEMA, "postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class InteractionEventId(Base):
+    """Client event ids already recorded, kept for the dedup window.
+
+    A unique index on ``user_interactions`` would have to include the partition
+    key, so retries (with a new ``created_at``) are caught here instead.
+    """
+
+    __tablename__ = "interaction_event_ids"
+
+    event_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class UserInteractionDaily(Base):
+    """Daily interaction counts kept after raw interaction partitions expire."""
+
+    __tablename__ = "user_interaction_daily"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    external_user_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    external_product_id: Mapped[Optional[str]] = mapped_column(String(255))
+    interaction_type: Mapped[InteractionType] = mapped_column(Enum(InteractionType), nullable=False)
+    interaction_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_user_interaction_daily_user_day", "external_user_id", "day"),
+        {"schema": SCHEMA},
+    )
+
+
+class ProductCopurchaseCount(Base):
+    """Number of orders containing both products (stored in both directions).
+
+    Maintained incrementally by order sync and read by "frequently bought
+    together" instead of scanning order history per request.
+    """
+
+    __tablename__ = "product_copurchase_counts"
+
+    product_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    co_product_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_product_copurchase_counts_top", "product_id", text("order_count DESC")),
         {"schema": SCHEMA},
     )
 
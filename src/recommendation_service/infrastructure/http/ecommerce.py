@@ -0,0 +1,271 @@
+"""Pooled async client for the e-commerce API.
+
+One ``httpx.AsyncClient`` per process keeps a bounded pool of keep-alive
+connections to ``ECOMMERCE_API_BASE_URL``. Collections answer either a JSON
+list or an object with the items under ``data``; a page shorter than
+``limit`` is the last one.
+
+Collections sorted by ``updatedAt`` (products, orders) are read with a
+keyset cursor (:meth:`EcommerceClient.iter_keyset`): each request asks for
+the items after the last one received, by ``updatedSince`` and ``afterId``,
+so rows updated during the run move behind the cursor instead of shifting
+later pages and being skipped. The next page is requested as soon as a page
+arrives, overlapping the caller writing it.
+
+:meth:`EcommerceClient.iter_pages` pages with ``page`` (1-based) and
+``limit`` while keeping up to ``ECOMMERCE_API_PREFETCH_PAGES`` requests in
+flight; it is only safe for collections whose order does not change while
+they are read. Transport errors, 429 and 5xx responses are retried with
+jittered exponential backoff.
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+
+import httpx
+import orjson
+import structlog
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from recommendation_service.config import get_settings
+from recommendation_service.core.metrics import ECOMMERCE_API_LATENCY, ECOMMERCE_API_RETRIES
+
+logger = structlog.get_logger()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed request is worth retrying (transport error, 429 or 5xx)."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+def _log_retry(state: RetryCallState) -> None:
+    ECOMMERCE_API_RETRIES.inc()
+    logger.warning(
+        "Retrying e-commerce API request",
+        attempt=state.attempt_number,
+        error=str(state.outcome.exception()),
+    )
+
+
+class EcommerceClient:
+    """Async e-commerce API client with connection pooling, retries and page prefetch."""
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        api_key: str | None = None,
+        timeout: float | None = None,
+        max_connections: int | None = None,
+        page_size: int | None = None,
+        prefetch_pages: int | None = None,
+        max_attempts: int | None = None,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            base_url: API root (defaults to ``ECOMMERCE_API_BASE_URL``)
+            api_key: Sent as ``X-API-Key`` when set
+            timeout: Seconds per request attempt
+            max_connections: Size of the keep-alive connection pool
+            page_size: Items requested per page
+            prefetch_pages: Page requests kept in flight while iterating
+            max_attempts: Attempts per request, including the first
+            backoff_seconds: Base of the jittered exponential backoff
+            max_backoff_seconds: Cap on a single backoff
+            transport: Custom transport (tests use ``httpx.MockTransport``)
+        """
+        settings = get_settings()
+        api_key = settings.ecommerce_api_key if api_key is None else api_key
+        max_connections = max_connections or settings.ecommerce_api_max_connections
+        self.page_size = page_size or settings.ecommerce_api_page_size
+        self.prefetch_pages = max(1, prefetch_pages or settings.ecommerce_api_prefetch_pages)
+        self.max_attempts = max_attempts or settings.ecommerce_api_max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        headers = {"Accept": "application/json"}
+        if api_key:
+            headers["X-API-Key"] = api_key
+        self._client = httpx.AsyncClient(
+            base_url=base_url or settings.ecommerce_api_base_url,
+            headers=headers,
+            timeout=timeout or settings.ecommerce_api_timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        await self._client.aclose()
+
+    async def get_json(self, path: str, params: dict[str, Any] | None = None) -> Any:
+        """
+        GET a JSON document, retrying transient failures.
+
+        Raises:
+            httpx.HTTPError: If the request still fails after the last attempt
+        """
+        started_at = time.perf_counter()
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception(is_retryable),
+                wait=wait_random_exponential(
+                    multiplier=self.backoff_seconds, max=self.max_backoff_seconds
+                ),
+                stop=stop_after_attempt(self.max_attempts),
+                before_sleep=_log_retry,
+                reraise=True,
+            ):
+                with attempt:
+                    response = await self._client.get(path, params=params)
+                    response.raise_for_status()
+                    return orjson.loads(response.content)
+        finally:
+            ECOMMERCE_API_LATENCY.observe(time.perf_counter() - started_at)
+
+    async def get_page(self, path: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+        """Fetch one page of a collection."""
+        body = await self.get_json(path, params)
+        return body if isinstance(body, list) else body.get("data") or []
+
+    async def iter_pages(
+        self, path: str, params: dict[str, Any] | None = None
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Stream a collection page by page, in order, with bounded prefetch.
+
+        Offsets shift when items are inserted or re-sorted during the read,
+        so use :meth:`iter_keyset` for collections that change. Up to ``prefetch_pages`` requests are in flight (and at most that many
+        pages buffered) ahead of the consumer. Requests still in flight when
+        the iteration ends or fails are cancelled.
+
+        Args:
+            path: Collection path, e.g. ``/products``
+            params: Extra query parameters (filters)
+
+        Yields:
+            Non-empty pages of items
+        """
+        pending: deque[asyncio.Task] = deque()
+        next_page = 1
+
+        def schedule() -> None:
+            nonlocal next_page
+            page_params = {**(params or {}), "page": next_page, "limit": self.page_size}
+            pending.append(asyncio.create_task(self.get_page(path, page_params)))
+            next_page += 1
+
+        try:
+            for _ in range(self.prefetch_pages):
+                schedule()
+            while pending:
+                items = await pending.popleft()
+                if items:
+                    yield items
+                if len(items) < self.page_size:
+                    break
+                schedule()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def iter_keyset(
+        self,
+        path: str,
+        params: dict[str, Any] | None = None,
+        updated_since: datetime | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Stream a collection in ``(updatedAt, id)`` order with a keyset cursor.
+
+        The API sorts by ``updatedAt`` and breaks ties by ``id``. After the
+        first page, each request passes the last item's ``updatedAt`` as
+        ``updatedSince`` and its ``id`` as ``afterId``, which the API answers
+        with the items strictly after that position. The next request is
+        started as soon as a page arrives, so one request is in flight while
+        the caller handles the page.
+
+        Args:
+            path: Collection path, e.g. ``/products``
+            params: Extra query parameters (filters)
+            updated_since: Only items updated at or after this time
+
+        Yields:
+            Non-empty pages of items
+        """
+        base = {**(params or {}), "sort": "updatedAt", "order": "asc", "limit": self.page_size}
+
+        def request(cursor: dict[str, Any]) -> asyncio.Task:
+            return asyncio.create_task(self.get_page(path, {**base, **cursor}))
+
+        task = request(
+            {"updatedSince": updated_since.isoformat()} if updated_since is not None else {}
+        )
+        try:
+            while task is not None:
+                items = await task
+                task = None
+                if len(items) == self.page_size:
+                    last = items[-1]
+                    task = request({"updatedSince": last["updatedAt"], "afterId": last["id"]})
+                if items:
+                    yield items
+        finally:
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    def iter_products(
+        self, updated_since: datetime | None = None
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Stream products, oldest change first, optionally only those updated since a time."""
+        return self.iter_keyset("/products", updated_since=updated_since)
+
+    def iter_orders(
+        self, updated_since: datetime | None = None
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Stream orders with their items, oldest change first."""
+        return self.iter_keyset("/orders", {"include": "items"}, updated_since=updated_since)
+
+
+# Global client, created on first use
+_ecommerce_client: EcommerceClient | None = None
+
+
+def get_ecommerce_client() -> EcommerceClient:
+    """Get or create the process-wide e-commerce client (connections are pooled)."""
+    global _ecommerce_client
+    if _ecommerce_client is None:
+        _ecommerce_client = EcommerceClient()
+    return _ecommerce_client
+
+
+async def close_ecommerce_client() -> None:
+    """Close the process-wide e-commerce client, if one was created."""
+    global _ecommerce_client
+    if _ecommerce_client is not None:
+        await _ecommerce_client.aclose()
+        _ecommerce_client = None
@@ -0,0 +1,24 @@
+"""Shared asyncio Redis client."""
+
+from redis.asyncio import Redis
+
+from recommendation_service.config import get_settings
+
+# Global client, created on first use
+_redis: Redis | None = None
+
+
+def get_redis() -> Redis:
+    """Get or create the process-wide Redis client (connections are pooled)."""
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(get_settings().redis_url)
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the process-wide Redis client, if one was created."""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -0,0 +1,115 @@
+"""Length-bucketed dynamic batching for embedding encodes.
+
+Transformer encoders pad every sequence in a batch to the longest one, so a batch
+mixing short product names with long descriptions spends most of its compute on
+padding. These helpers sort texts by token length, pack them into batches whose
+padded size stays under a token budget, and restore the caller's order after
+encoding.
+"""
+
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+
+# Rough characters-per-token ratio for English WordPiece/BPE vocabularies
+_CHARS_PER_TOKEN = 4
+# [CLS] and [SEP]
+_SPECIAL_TOKENS = 2
+
+
+def estimate_token_lengths(texts: Sequence[str], tokenizer: Any = None) -> np.ndarray:
+    """
+    Return the token length of each text.
+
+    Uses the model's tokenizer when available, otherwise a character-based
+    approximation that is good enough for bucketing.
+
+    Args:
+        texts: Texts to measure
+        tokenizer: Optional Hugging Face tokenizer
+
+    Returns:
+        int array of token lengths
+    """
+    if tokenizer is not None:
+        encoded = tokenizer(list(texts), add_special_tokens=True, truncation=True)
+        return np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64)
+
+    return np.fromiter(
+        (len(t) // _CHARS_PER_TOKEN + _SPECIAL_TOKENS for t in texts), dtype=np.int64
+    )
+
+
+def plan_batches(
+    lengths: np.ndarray, token_budget: int, max_batch_size: int
+) -> list[np.ndarray]:
+    """
+    Group text indices into length-sorted batches under a padded-token budget.
+
+    A batch's padded cost is ``len(batch) * max(lengths in batch)``. Texts are
+    visited shortest first, so the running maximum is always the newest text.
+
+    Args:
+        lengths: Token length of each text
+        token_budget: Maximum padded tokens per batch
+        max_batch_size: Maximum texts per batch regardless of budget
+
+    Returns:
+        List of index arrays, one per batch
+    """
+    order = np.argsort(lengths, kind="stable")
+    batches: list[np.ndarray] = []
+    start = 0
+
+    for position in range(len(order)):
+        size = position - start + 1
+        padded = size * int(lengths[order[position]])
+        if size > 1 and (padded > token_budget or size > max_batch_size):
+            batches.append(order[start:position])
+            start = position
+
+    if start < len(order):
+        batches.append(order[start:])
+    return batches
+
+
+def encode_bucketed(
+    encode: Callable[[list[str]], Any],
+    texts: Sequence[str],
+    token_budget: int,
+    max_batch_size: int,
+    tokenizer: Any = None,
+) -> np.ndarray:
+    """
+    Encode texts in length-bucketed batches and return rows in input order.
+
+    Args:
+        encode: Function encoding a list of texts into a 2-D array
+        texts: Texts to encode
+        token_budget: Maximum padded tokens per batch
+        max_batch_size: Maximum texts per batch
+        tokenizer: Optional tokenizer for exact token lengths
+
+    Returns:
+        float32 array of shape ``(len(texts), dimension)``
+    """
+    lengths = estimate_token_lengths(texts, tokenizer)
+    result: np.ndarray | None = None
+
+    for indices in plan_batches(lengths, token_budget, max_batch_size):
+        embeddings = np.asarray(encode([texts[i] for i in indices]), dtype=np.float32)
+        if result is None:
+            result = np.empty((len(texts), embeddings.shape[1]), dtype=np.float32)
+        result[indices] = embeddings
+
+    if result is None:
+        return np.empty((0, 0), dtype=np.float32)
+    return result
+
+
+def padding_efficiency(lengths: np.ndarray, batches: list[np.ndarray]) -> float:
+    """Fraction of padded tokens that are real tokens for a batch plan."""
+    real = int(lengths.sum())
+    padded = sum(len(b) * int(lengths[b].max()) for b in batches if len(b))
+    return real / padded if padded else 1.0
@@ -1,158 +1,148 @@
-"""Embedding generation for vector search."""
+"""Embedding model loading for vector search.
 
-from functools import lru_cache
+Holds the process-wide embedding model for the configured backend. The model is
+loaded lazily on first use so importing this module stays cheap; every backend
+exposes the same ``encode(texts, batch_size=..., convert_to_numpy=True)``
+interface returning float32 arrays.
+"""
+
+import hashlib
 from typing import Any
 
+import numpy as np
 import structlog
 
 from recommendation_service.config import get_settings
 
 logger = structlog.get_logger()
 
+# Lazy-loaded model to avoid loading on import
+_embedding_model = None
+
+
+def get_embedding_model():
+    """Get or initialize the embedding model for the configured backend."""
+    global _embedding_model
+    if _embedding_model is None:
+        settings = get_settings()
+        if settings.embedding_backend == "onnx":
+            _embedding_model = _load_onnx_model()
+        elif settings.embedding_backend == "mock":
+            logger.info("Using mock embedding model", dimension=settings.embedding_dimension)
+            _embedding_model = MockEmbeddingModel(settings.embedding_dimension)
+        else:
+            _embedding_model = _load_sentence_transformer()
+    return _embedding_model
+
+
+def _load_sentence_transformer():
+    """Load the PyTorch sentence-transformers model."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning(
+            "sentence-transformers not installed, embeddings will be unavailable"
+        )
+        return None
+
+    settings = get_settings()
+    model_name = settings.embedding_model
+    logger.info("Loading embedding model", model=model_name)
+    model = SentenceTransformer(model_name)
+    logger.info(
+        "Embedding model loaded",
+        model=model_name,
+        dimension=model.get_sentence_embedding_dimension(),
+    )
+    return model
+
+
+def _load_onnx_model():
+    """Load the exported ONNX model on the CPU execution provider."""
+    try:
+        from recommendation_service.infrastructure.vector.onnx_backend import (
+            OnnxEmbeddingModel,
+        )
+
+        settings = get_settings()
+        return OnnxEmbeddingModel(
+            settings.embedding_onnx_path,
+            quantized=settings.embedding_onnx_quantized,
+            num_threads=settings.embedding_onnx_threads,
+        )
+    except ImportError:
+        logger.warning("onnxruntime not installed, embeddings will be unavailable")
+        return None
+
 
-class EmbeddingService:
+class MockEmbeddingModel:
     """
-    Service for generating text embeddings using sentence-transformers.
+    Deterministic embedding model for tests, benchmarks and load tests.
 
-    Uses a lightweight model (all-MiniLM-L6-v2) that runs locally
-    and produces 384-dimensional vectors.
+    Each text is hashed with blake2b into a 64-bit seed, so the same text maps to
+    the same unit vector in every process (unlike ``hash()``, which is
+    randomized per interpreter). Vector components come from a counter-based
+    SplitMix64 stream over ``(seed, component)``, which NumPy evaluates for the
+    whole batch at once; only the hashing loops in Python.
     """
 
-    def __init__(self, model_name: str | None = None):
-        """
-        Initialize the embedding service.
-
-        Args:
-            model_name: Name of the sentence-transformers model to use.
-                       Defaults to config setting.
-        """
-        self.settings = get_settings()
-        self.model_name = model_name or self.settings.embedding_model
-        self._model: Any = None
-
-    @property
-    def model(self) -> Any:
-        """Lazy load the sentence-transformers model."""
-        if self._model is None:
-            try:
-                from sentence_transformers import SentenceTransformer
-
-                logger.info("Loading embedding model", model=self.model_name)
-                self._model = SentenceTransformer(self.model_name)
-            except ImportError:
-                logger.warning(
-                    "sentence-transformers not installed, using mock embeddings"
-                )
-                self._model = MockEmbeddingModel(self.settings.embedding_dimension)
-        return self._model
-
-    def embed_text(self, text: str) -> list[float]:
-        """
-        Generate embedding for a single text.
-
-        Args:
-            text: Text to embed
-
-        Returns:
-            List of floats representing the embedding vector
-        """
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
-
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        """
-        Generate embeddings for multiple texts (batch).
-
-        Args:
-            texts: List of texts to embed
-
-        Returns:
-            List of embedding vectors
-        """
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        return [emb.tolist() for emb in embeddings]
-
-    def generate_product_content(
-        self,
-        name: str,
-        description: str,
-        category: str,
-    ) -> str:
-        """
-        Generate content string for product embedding.
-
-        Combines product attributes into a single text for embedding.
-
-        Args:
-            name: Product name
-            description: Product description
-            category: Product category
-
-        Returns:
-            Combined text for embedding
-        """
-        return f"{name}. {description}. Category: {category}"
-
-    def generate_user_preference_content(
-        self,
-        top_categories: list[str],
-        recently_viewed: list[str],
-        purchased: list[str],
-        avg_price_range: tuple[float, float] | None = None,
-    ) -> str:
-        """
-        Generate content string for user preference embedding.
-
-        Combines user behavior into a text representation.
-
-        Args:
-            top_categories: User's top interest categories
-            recently_viewed: Recently viewed product names
-            purchased: Purchased product names
-            avg_price_range: Optional (min, max) price range
-
-        Returns:
-            Combined text for embedding
-        """
-        parts = []
-
-        if top_categories:
-            parts.append(f"Interested in: {', '.join(top_categories)}")
-
-        if avg_price_range:
-            parts.append(f"Price range: ${avg_price_range[0]:.0f}-${avg_price_range[1]:.0f}")
-
-        if recently_viewed:
-            parts.append(f"Recently viewed: {', '.join(recently_viewed[:5])}")
-
-        if purchased:
-            parts.append(f"Purchased: {', '.join(purchased[:5])}")
-
-        return ". ".join(parts) if parts else "No preference data"
+    # SplitMix64 constants
+    _GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+    _MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+    _MIX_2 = np.uint64(0x94D049BB133111EB)
 
-
-class MockEmbeddingModel:
-    """Mock embedding model for testing without sentence-transformers."""
+    # Rows generated per step, keeping the uint64 scratch arrays cache-sized
+    _CHUNK_ROWS = 2048
 
     def __init__(self, dimension: int):
         self.dimension = dimension
+        self._counters = np.arange(1, dimension + 1, dtype=np.uint64) * self._GOLDEN_GAMMA
 
-    def encode(self, text: str | list[str], convert_to_numpy: bool = True) -> Any:
-        import random
-
-        if isinstance(text, str):
-            # Generate deterministic pseudo-random vector based on text hash
-            random.seed(hash(text) % (2**32))
-            return [random.uniform(-1, 1) for _ in range(self.dimension)]
+    def get_sentence_embedding_dimension(self) -> int:
+        """Return the embedding dimension."""
+        return self.dimension
 
-        # Batch
-        return [
-            self.encode(t, convert_to_numpy=convert_to_numpy)
-            for t in text
-        ]
+    def encode(self, sentences: str | list[str], **_kwargs: Any) -> np.ndarray:
+        """Encode one text to ``(dimension,)`` or a list to ``(n, dimension)`` float32."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
 
-
-@lru_cache
-def get_embedding_service() -> EmbeddingService:
-    """Get cached embedding service instance."""
-    return EmbeddingService()
+        seeds = np.fromiter(
+            (
+                int.from_bytes(
+                    hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little"
+                )
+                for text in texts
+            ),
+            dtype=np.uint64,
+            count=len(texts),
+        )
+
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), self._CHUNK_ROWS):
+            chunk = slice(start, start + self._CHUNK_ROWS)
+            embeddings[chunk] = self._uniform(seeds[chunk])
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.maximum(norms, np.float32(1e-12))
+
+        return embeddings[0] if single else embeddings
+
+    def _uniform(self, seeds: np.ndarray) -> np.ndarray:
+        """SplitMix64 over ``(seed, component)`` mapped to uniform [-1, 1) float32."""
+        z = seeds[:, np.newaxis] + self._counters
+        scratch = z >> np.uint64(30)
+        z ^= scratch
+        z *= self._MIX_1
+        np.right_shift(z, np.uint64(27), out=scratch)
+        z ^= scratch
+        z *= self._MIX_2
+        np.right_shift(z, np.uint64(31), out=scratch)
+        z ^= scratch
+
+        # Top 24 bits are exactly representable in float32
+        np.right_shift(z, np.uint64(40), out=z)
+        values = z.astype(np.float32)
+        values *= np.float32(2.0**-23)
+        values -= np.float32(1.0)
+        return values
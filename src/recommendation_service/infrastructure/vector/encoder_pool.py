@@ -0,0 +1,256 @@
+"""Process-pool backed async embedding encoder.
+
+Runs the embedding model forward pass in dedicated worker processes so callers on
+the API event loop can ``await encode_many(texts)`` without blocking it. Each
+worker process loads the model once (in the pool initializer) and pins its torch
+thread count so several workers do not oversubscribe the CPU.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import structlog
+
+from recommendation_service.config import get_settings
+from recommendation_service.core.metrics import (
+    EMBEDDING_ENCODE_COMPUTE,
+    EMBEDDING_ENCODE_QUEUE_DEPTH,
+    EMBEDDING_ENCODE_QUEUE_WAIT,
+    EMBEDDING_ENCODE_REJECTED,
+    EMBEDDING_ENCODE_TEXTS,
+)
+from recommendation_service.infrastructure.vector.batching import encode_bucketed
+
+logger = structlog.get_logger()
+
+
+class EncoderOverloadedError(RuntimeError):
+    """Raised when the encoder queue is full or a slot could not be acquired in time."""
+
+
+def _init_worker(torch_threads: int) -> None:
+    """Pool initializer: pin thread counts and load the model once per process."""
+    os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    from recommendation_service.infrastructure.vector.embeddings import get_embedding_model
+
+    get_embedding_model()
+
+
+def _encode_batch(
+    texts: list[str], token_budget: int, max_batch_size: int
+) -> tuple[np.ndarray, float]:
+    """Encode texts inside a worker, returning the vectors and the compute time.
+
+    Texts are length-bucketed so each forward pass pads as little as possible.
+    """
+    from recommendation_service.infrastructure.vector.embeddings import get_embedding_model
+
+    model = get_embedding_model()
+    if model is None:
+        raise RuntimeError("Embedding model not available")
+
+    start = time.perf_counter()
+    embeddings = encode_bucketed(
+        lambda batch: model.encode(batch, batch_size=len(batch), convert_to_numpy=True),
+        texts,
+        token_budget=token_budget,
+        max_batch_size=max_batch_size,
+        tokenizer=getattr(model, "tokenizer", None),
+    )
+    elapsed = time.perf_counter() - start
+    return embeddings, elapsed
+
+
+class AsyncEmbeddingEncoder:
+    """
+    Async facade over a pool of embedding worker processes.
+
+    At most ``max_workers`` batches run concurrently; further requests wait for a
+    slot. Once ``max_queue`` requests are waiting or running, new requests are
+    rejected with :class:`EncoderOverloadedError` so callers can shed load instead
+    of piling up behind the model.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_queue: int | None = None,
+        torch_threads: int | None = None,
+        queue_timeout: float | None = None,
+        executor: Executor | None = None,
+    ):
+        """
+        Initialize the encoder.
+
+        Args:
+            max_workers: Number of worker processes. ``0`` runs the model on a
+                single background thread in this process instead.
+            max_queue: Maximum requests waiting or running before rejecting.
+            torch_threads: Torch intra-op threads per worker process.
+            queue_timeout: Seconds to wait for a free worker before rejecting.
+            executor: Pre-built executor to use instead of creating a pool.
+        """
+        settings = get_settings()
+        self.max_workers = (
+            settings.embedding_pool_workers if max_workers is None else max_workers
+        )
+        self.max_queue = settings.embedding_pool_max_queue if max_queue is None else max_queue
+        self.torch_threads = (
+            settings.embedding_pool_torch_threads if torch_threads is None else torch_threads
+        )
+        self.queue_timeout = (
+            settings.embedding_pool_queue_timeout_seconds
+            if queue_timeout is None
+            else queue_timeout
+        )
+        self.dimension = settings.embedding_dimension
+        self.token_budget = settings.embedding_token_budget
+        self.max_batch_size = settings.embedding_max_batch_size
+
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._slots: asyncio.Semaphore | None = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of requests currently waiting for or running on a worker."""
+        return self._pending
+
+    def start(self) -> None:
+        """Create the worker pool if it does not exist yet."""
+        if self._executor is not None:
+            return
+
+        if self.max_workers > 0:
+            # spawn avoids forking a process that already holds torch/event-loop state
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.torch_threads,),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="embedding-encoder"
+            )
+        logger.info(
+            "Embedding encoder pool started",
+            workers=self.max_workers,
+            max_queue=self.max_queue,
+            torch_threads=self.torch_threads,
+        )
+
+    def shutdown(self) -> None:
+        """Shut down the worker pool if this encoder created it."""
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("Embedding encoder pool stopped")
+
+    async def encode_many(
+        self, texts: list[str], max_batch_size: int | None = None
+    ) -> np.ndarray:
+        """
+        Encode texts on the worker pool without blocking the event loop.
+
+        Large inputs are split into length-bucketed batches inside the worker,
+        so callers should pass whole pages of texts rather than pre-chunking.
+
+        Args:
+            texts: Texts to embed
+            max_batch_size: Maximum texts per forward pass (defaults to settings)
+
+        Returns:
+            float32 array of shape ``(len(texts), dimension)``
+
+        Raises:
+            EncoderOverloadedError: If the queue is full or no worker frees up in time
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        if self._pending >= self.max_queue:
+            EMBEDDING_ENCODE_REJECTED.inc()
+            raise EncoderOverloadedError(
+                f"Embedding encoder queue is full ({self._pending} pending)"
+            )
+
+        self.start()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, self.max_workers))
+
+        self._pending += 1
+        EMBEDDING_ENCODE_QUEUE_DEPTH.inc()
+        enqueued_at = time.perf_counter()
+        try:
+            try:
+                async with asyncio.timeout(self.queue_timeout):
+                    await self._slots.acquire()
+            except TimeoutError:
+                EMBEDDING_ENCODE_REJECTED.inc()
+                raise EncoderOverloadedError(
+                    f"No embedding worker available within {self.queue_timeout}s"
+                )
+
+            try:
+                EMBEDDING_ENCODE_QUEUE_WAIT.observe(time.perf_counter() - enqueued_at)
+                loop = asyncio.get_running_loop()
+                embeddings, compute_seconds = await loop.run_in_executor(
+                    self._executor,
+                    _encode_batch,
+                    list(texts),
+                    self.token_budget,
+                    max_batch_size or self.max_batch_size,
+                )
+            finally:
+                self._slots.release()
+        finally:
+            self._pending -= 1
+            EMBEDDING_ENCODE_QUEUE_DEPTH.dec()
+
+        EMBEDDING_ENCODE_COMPUTE.observe(compute_seconds)
+        EMBEDDING_ENCODE_TEXTS.inc(len(texts))
+        return embeddings
+
+    async def encode(self, text: str) -> np.ndarray:
+        """Encode a single text on the worker pool."""
+        embeddings = await self.encode_many([text])
+        return embeddings[0]
+
+
+# Global encoder, created on first use
+_async_encoder: AsyncEmbeddingEncoder | None = None
+
+
+def get_async_encoder() -> AsyncEmbeddingEncoder:
+    """Get or create the global async embedding encoder.
+
+    A daemonic process (such as a Celery prefork child) may not start child
+    processes, so there the model runs on a background thread instead.
+    """
+    global _async_encoder
+    if _async_encoder is None:
+        in_daemon = multiprocessing.current_process().daemon
+        _async_encoder = AsyncEmbeddingEncoder(max_workers=0 if in_daemon else None)
+    return _async_encoder
+
+
+def shutdown_async_encoder() -> None:
+    """Shut down the global async embedding encoder, if one was created."""
+    global _async_encoder
+    if _async_encoder is not None:
+        _async_encoder.shutdown()
+        _async_encoder = None
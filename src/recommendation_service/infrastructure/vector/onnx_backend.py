@@ -0,0 +1,157 @@
+"""ONNX Runtime embedding backend for CPU-only deployments.
+
+Loads an exported (optionally dynamic-int8-quantized) ONNX version of the
+configured sentence-transformers model from a local directory and runs it on the
+CPU execution provider. The model exposes the subset of the SentenceTransformer
+interface the rest of the service uses (``encode``, ``tokenizer``,
+``get_sentence_embedding_dimension``), so it is a drop-in replacement.
+
+Expected directory layout (see ``scripts/export_onnx_model.py``)::
+
+    <path>/model.onnx            # fp32 export
+    <path>/model_quantized.onnx  # optional dynamic int8 export
+    <path>/tokenizer.json        # Hugging Face fast tokenizer
+"""
+
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+FP32_MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings over non-padding positions."""
+    mask = attention_mask[..., np.newaxis].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    return summed / counts
+
+
+class _TokenizerAdapter:
+    """Callable wrapper giving a ``tokenizers.Tokenizer`` the HF call signature."""
+
+    def __init__(self, tokenizer: Any):
+        self._tokenizer = tokenizer
+
+    def __call__(
+        self,
+        texts: list[str],
+        add_special_tokens: bool = True,
+        truncation: bool = True,  # noqa: ARG002 - truncation is configured on the tokenizer
+    ) -> dict[str, list[list[int]]]:
+        encodings = self._tokenizer.encode_batch(texts, add_special_tokens=add_special_tokens)
+        return {"input_ids": [e.ids for e in encodings]}
+
+
+class OnnxEmbeddingModel:
+    """Sentence embedding model executed with ONNX Runtime on CPU."""
+
+    def __init__(
+        self,
+        model_dir: str | Path,
+        quantized: bool = False,
+        max_seq_length: int = 256,
+        num_threads: int = 0,
+        normalize: bool = True,
+    ):
+        """
+        Load the ONNX model and tokenizer.
+
+        Args:
+            model_dir: Directory containing the exported model and tokenizer
+            quantized: Load the dynamic-int8 model instead of fp32
+            max_seq_length: Truncation length (matches the source model)
+            num_threads: ONNX Runtime intra-op threads (0 = runtime default)
+            normalize: L2-normalize outputs like the source model's Normalize layer
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        model_file = model_dir / (QUANTIZED_MODEL_FILE if quantized else FP32_MODEL_FILE)
+        if not model_file.exists():
+            raise FileNotFoundError(f"ONNX model not found at {model_file}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+
+        self._session = ort.InferenceSession(
+            str(model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        self._tokenizer.enable_truncation(max_length=max_seq_length)
+        self._tokenizer.enable_padding()
+        self.tokenizer = _TokenizerAdapter(self._tokenizer)
+
+        self.max_seq_length = max_seq_length
+        self.normalize = normalize
+        self._dimension = int(self._session.get_outputs()[0].shape[-1])
+
+        logger.info(
+            "ONNX embedding model loaded",
+            model_file=str(model_file),
+            quantized=quantized,
+            dimension=self._dimension,
+        )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Return the embedding dimension."""
+        return self._dimension
+
+    def encode(
+        self,
+        sentences: str | list[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,  # noqa: ARG002 - always returns numpy
+    ) -> np.ndarray:
+        """
+        Encode one or more texts.
+
+        Args:
+            sentences: A single text or a list of texts
+            batch_size: Texts per ONNX Runtime call
+            convert_to_numpy: Accepted for SentenceTransformer compatibility
+
+        Returns:
+            float32 array of shape ``(dimension,)`` or ``(len(sentences), dimension)``
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        outputs = [
+            self._encode_batch(texts[start : start + batch_size])
+            for start in range(0, len(texts), batch_size)
+        ]
+        embeddings = (
+            np.concatenate(outputs) if outputs else np.empty((0, self._dimension), np.float32)
+        )
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        """Run one padded batch through the ONNX graph."""
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self._session.run(None, feeds)[0]
+        embeddings = mean_pool(token_embeddings, attention_mask)
+
+        if self.normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings.astype(np.float32, copy=False)
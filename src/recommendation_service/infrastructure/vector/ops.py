@@ -0,0 +1,270 @@
+"""Vectorised helpers for float32 embedding arrays.
+
+Everything here takes and returns ``np.ndarray`` so hot paths never materialise
+embeddings as Python float lists. Conversion to and from the JSON stored in the
+database happens once, at the edges, via :func:`as_vector`, :func:`stack_vectors`
+and :func:`to_json`.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+import orjson
+
+EMBEDDING_DTYPE = np.float32
+
+
+def as_vector(value: Any) -> np.ndarray | None:
+    """Convert a stored embedding (JSON text, list or array) to a float32 vector.
+
+    Returns None for missing, empty or non-1-D values.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)):
+        value = orjson.loads(value)
+    vector = np.asarray(value, dtype=EMBEDDING_DTYPE)
+    if vector.ndim != 1 or vector.size == 0:
+        return None
+    return vector
+
+
+def stack_vectors(values: Iterable[Any]) -> tuple[np.ndarray, np.ndarray]:
+    """Stack stored embeddings into an ``(m, d)`` float32 matrix.
+
+    Values that are missing or whose dimension differs from the first valid
+    vector are skipped.
+
+    Returns:
+        The matrix and the positions (into ``values``) of the rows it contains
+    """
+    vectors: list[np.ndarray] = []
+    positions: list[int] = []
+    dimension = None
+    for position, value in enumerate(values):
+        vector = as_vector(value)
+        if vector is None:
+            continue
+        if dimension is None:
+            dimension = vector.shape[0]
+        elif vector.shape[0] != dimension:
+            continue
+        vectors.append(vector)
+        positions.append(position)
+
+    if not vectors:
+        return np.empty((0, 0), dtype=EMBEDDING_DTYPE), np.empty(0, dtype=np.int64)
+    return np.stack(vectors), np.asarray(positions, dtype=np.int64)
+
+
+def to_json(vector: np.ndarray) -> str:
+    """Serialise a vector to the JSON text stored in embedding columns."""
+    return orjson.dumps(vector, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise a vector or the rows of a matrix; zero vectors stay zero."""
+    vectors = np.asarray(vectors, dtype=EMBEDDING_DTYPE)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def mean_vector(matrix: np.ndarray) -> np.ndarray:
+    """Average the rows of a matrix."""
+    return np.asarray(matrix, dtype=EMBEDDING_DTYPE).mean(axis=0)
+
+
+def weighted_mean(
+    matrix: np.ndarray, weights: np.ndarray, normalize_result: bool = True
+) -> np.ndarray:
+    """
+    Weighted average of the rows of a matrix.
+
+    Args:
+        matrix: ``(n, d)`` embeddings
+        weights: ``(n,)`` weights; negative weights pull the result away
+        normalize_result: L2-normalise the result
+
+    Returns:
+        ``(d,)`` float32 vector
+    """
+    weights = np.asarray(weights, dtype=EMBEDDING_DTYPE)
+    aggregated = weights @ np.asarray(matrix, dtype=EMBEDDING_DTYPE)
+    total_weight = float(weights.sum())
+    if total_weight > 0:
+        aggregated /= total_weight
+    return normalize(aggregated) if normalize_result else aggregated
+
+
+# Rows gathered per reduction step in segment_weighted_means; keeps the
+# gathered block cache-sized, which is several times faster than one big block
+SEGMENT_BLOCK_ROWS = 2048
+
+
+def segment_weighted_sums(
+    matrix: np.ndarray, rows: np.ndarray, weights: np.ndarray, starts: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted sum of ``matrix[rows]`` over contiguous segments, for many groups at once.
+
+    Segment ``j`` covers positions ``starts[j]:starts[j + 1]`` of ``rows`` and
+    ``weights``.
+
+    Args:
+        matrix: ``(m, d)`` embedding table
+        rows: ``(n,)`` row of ``matrix`` for each item
+        weights: ``(n,)`` weight of each item
+        starts: ``(k,)`` ascending start position of each segment (first is 0)
+
+    Returns:
+        ``(k, d)`` float32 weighted sums and ``(k,)`` total weight per segment
+    """
+    weights = np.asarray(weights, dtype=EMBEDDING_DTYPE)
+    starts = np.asarray(starts, dtype=np.int64)
+    sums = np.empty((starts.size, matrix.shape[1]), dtype=EMBEDDING_DTYPE)
+
+    # Reduce whole segments a block at a time
+    first = 0
+    while first < starts.size:
+        block_start = starts[first]
+        if rows.size - block_start <= SEGMENT_BLOCK_ROWS:
+            last = starts.size
+        else:
+            bound = int(np.searchsorted(starts, block_start + SEGMENT_BLOCK_ROWS, side="right"))
+            last = max(first + 1, bound - 1)
+        block_end = starts[last] if last < starts.size else rows.size
+        block = matrix[rows[block_start:block_end]]
+        block *= weights[block_start:block_end, np.newaxis]
+        sums[first:last] = np.add.reduceat(block, starts[first:last] - block_start, axis=0)
+        first = last
+
+    return sums, np.add.reduceat(weights, starts)
+
+
+def segment_weighted_means(
+    matrix: np.ndarray,
+    rows: np.ndarray,
+    weights: np.ndarray,
+    starts: np.ndarray,
+    normalize_result: bool = True,
+) -> np.ndarray:
+    """
+    Weighted mean of ``matrix[rows]`` over contiguous segments, for many groups at once.
+
+    Each segment (see :func:`segment_weighted_sums`) is reduced exactly like
+    :func:`weighted_mean`.
+
+    Args:
+        matrix: ``(m, d)`` embedding table
+        rows: ``(n,)`` row of ``matrix`` for each item
+        weights: ``(n,)`` weight of each item
+        starts: ``(k,)`` ascending start position of each segment (first is 0)
+        normalize_result: L2-normalise each result row
+
+    Returns:
+        ``(k, d)`` float32 matrix, one row per segment
+    """
+    sums, totals = segment_weighted_sums(matrix, rows, weights, starts)
+    positive = totals > 0
+    sums[positive] /= totals[positive, np.newaxis]
+    return normalize(sums) if normalize_result else sums
+
+
+def spherical_kmeans(
+    points: np.ndarray, weights: np.ndarray, k: int, max_iterations: int = 10
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted k-means on the unit sphere (cosine similarity).
+
+    Initialisation is deterministic: the heaviest point, then repeatedly the
+    point least similar to every centroid chosen so far. Each iteration is one
+    ``(n, k)`` similarity product and one ``(k, n) @ (n, d)`` weighted sum.
+
+    Args:
+        points: ``(n, d)`` unit vectors (distinct items)
+        weights: ``(n,)`` positive weight of each point
+        k: Maximum number of clusters
+        max_iterations: Stop after this many assignment rounds
+
+    Returns:
+        ``(k', d)`` unit centroids and ``(k',)`` cluster weights, heaviest first;
+        empty clusters are dropped, so ``k' <= k``
+    """
+    points = np.asarray(points, dtype=EMBEDDING_DTYPE)
+    weights = np.asarray(weights, dtype=EMBEDDING_DTYPE)
+    n = points.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((0, points.shape[1]), dtype=EMBEDDING_DTYPE), np.empty(0, EMBEDDING_DTYPE)
+
+    chosen = [int(np.argmax(weights))]
+    closest = points @ points[chosen[0]]
+    for _ in range(1, k):
+        chosen.append(int(np.argmin(closest)))
+        closest = np.maximum(closest, points @ points[chosen[-1]])
+    centroids = points[chosen]
+
+    assignments = None
+    for _ in range(max_iterations):
+        new_assignments = np.argmax(points @ centroids.T, axis=1)
+        if assignments is not None and np.array_equal(new_assignments, assignments):
+            break
+        assignments = new_assignments
+        membership = np.zeros((k, n), dtype=EMBEDDING_DTYPE)
+        membership[assignments, np.arange(n)] = weights
+        sums = membership @ points
+        # An emptied cluster keeps its centroid and is dropped below if still empty
+        filled = membership.sum(axis=1) > 0
+        centroids = np.where(filled[:, np.newaxis], normalize(sums), centroids)
+
+    cluster_weights = np.bincount(assignments, weights=weights, minlength=k).astype(EMBEDDING_DTYPE)
+    order = np.argsort(-cluster_weights, kind="stable")
+    order = order[cluster_weights[order] > 0]
+    return centroids[order], cluster_weights[order]
+
+
+def pack_vectors(matrix: np.ndarray) -> bytes:
+    """Serialise a float matrix as little-endian float16 bytes (a quarter of float32 JSON)."""
+    return np.asarray(matrix, dtype="<f2").tobytes()
+
+
+def unpack_vectors(data: bytes, dimension: int) -> np.ndarray:
+    """Inverse of :func:`pack_vectors`: ``(n, dimension)`` float32 rows."""
+    return np.frombuffer(data, dtype="<f2").reshape(-1, dimension).astype(EMBEDDING_DTYPE)
+
+
+def cosine_similarities(
+    query: np.ndarray, matrix: np.ndarray, matrix_normalized: bool = False
+) -> np.ndarray:
+    """
+    Cosine similarity between one query vector and every row of a matrix.
+
+    Args:
+        query: ``(d,)`` query vector
+        matrix: ``(n, d)`` candidate vectors
+        matrix_normalized: Skip normalising rows that are already unit length
+
+    Returns:
+        ``(n,)`` float32 similarities (0 for zero vectors)
+    """
+    if matrix.shape[0] == 0:
+        return np.empty(0, dtype=EMBEDDING_DTYPE)
+    rows = matrix if matrix_normalized else normalize(matrix)
+    return rows @ normalize(query)
+
+
+def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine similarity between two vectors as a Python float."""
+    return float(normalize(a) @ normalize(b))
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first."""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    # argpartition finds the k best in O(n); only those k are then sorted
+    candidates = (
+        np.argpartition(-scores, k - 1)[:k] if k < scores.size else np.arange(scores.size)
+    )
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
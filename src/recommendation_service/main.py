@@ -1,7 +1,8 @@
 """FastAPI application entry point."""
 
+import asyncio
 import structlog
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 from typing import AsyncGenerator
 
@@ -9,9 +10,19 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+from prometheus_client import make_asgi_app
 
 from recommendation_service.api.v1.router import api_router
 from recommendation_service.config import get_settings
+from recommendation_service.core.warmup import run_warmup
+from recommendation_service.infrastructure.redis.client import close_redis
+from recommendation_service.infrastructure.vector.encoder_pool import shutdown_async_encoder
+from recommendation_service.services.catalog_updates import listen_for_catalog_updates
+from recommendation_service.services.interaction_buffer import (
+    get_interaction_buffer,
+    shutdown_interaction_buffer,
+)
+from recommendation_service.services.user_preference import report_dirty_users
 
 FRONTEND_DIR = Path(__file__).parent.parent.parent / "frontend"
 
@@ -43,9 +54,38 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         debug=settings.debug,
     )
 
+    # Warm up in the background so liveness answers immediately; readiness
+    # stays false until this finishes
+    warmup_task = asyncio.create_task(run_warmup()) if settings.warmup_enabled else None
+    get_interaction_buffer().start()
+    # Patch the catalog cache with stock/price changes published by product sync
+    catalog_listener = (
+        asyncio.create_task(listen_for_catalog_updates())
+        if settings.catalog_update_channel and settings.catalog_cache_ttl_seconds > 0
+        else None
+    )
+    dirty_gauge = (
+        asyncio.create_task(report_dirty_users(settings.preference_dirty_gauge_interval_seconds))
+        if settings.preference_dirty_gauge_interval_seconds > 0
+        else None
+    )
+
     yield
 
     logger.info("Shutting down Reemio Recommender Service")
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup_task
+    for task in (catalog_listener, dirty_gauge):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    # Flush buffered interactions before the process exits
+    await shutdown_interaction_buffer()
+    shutdown_async_encoder()
+    await close_redis()
 
 
 def create_app() -> FastAPI:
@@ -71,6 +111,7 @@ def create_app() -> FastAPI:
     )
 
     app.include_router(api_router, prefix="/api/v1")
+    app.mount("/metrics", make_asgi_app())
 
     if FRONTEND_DIR.exists():
         app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
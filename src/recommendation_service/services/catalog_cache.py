@@ -0,0 +1,307 @@
+"""In-process cache of the active catalog as a normalised embedding matrix.
+
+Similarity search used to fetch and JSON-decode up to a few hundred embeddings
+per request and score them one Python list at a time. The cache keeps the most
+popular active products as one ``(n, d)`` float32 matrix of unit vectors with
+row-aligned metadata, so a search is a single matrix-vector product.
+
+Rows are ordered by popularity, matching the order the engine's candidate
+queries use, and the snapshot is rebuilt after ``CATALOG_CACHE_TTL_SECONDS``.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.vector.ops import (
+    cosine_similarities,
+    normalize,
+    stack_vectors,
+    top_k_indices,
+)
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class CatalogSnapshot:
+    """Popularity-ordered catalog rows with their unit-length embeddings."""
+
+    products: list[dict[str, Any]]
+    vectors: np.ndarray
+    loaded_at: float = field(default_factory=time.monotonic)
+    index: dict[str, int] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.index = {p["product_id"]: i for i, p in enumerate(self.products)}
+
+    @classmethod
+    def from_rows(cls, rows: list[Any]) -> "CatalogSnapshot":
+        """Build a snapshot from ``product_embeddings`` rows, skipping bad vectors."""
+        matrix, positions = stack_vectors(row.embedding for row in rows)
+        products = [
+            {
+                "product_id": str(rows[i].external_product_id),
+                "external_product_id": rows[i].external_product_id,
+                "name": rows[i].name,
+                "category": rows[i].category or "Unknown",
+                "price": rows[i].price_cents / 100,
+                "stock": rows[i].stock,
+                "image_url": None,
+                "popularity_score": rows[i].popularity_score,
+            }
+            for i in positions
+        ]
+        return cls(products=products, vectors=normalize(matrix))
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def apply_updates(self, updates: list[tuple[str, int, int, bool]]) -> bool:
+        """
+        Apply ``(product_id, stock, price_cents, is_active)`` updates in place.
+
+        Vectors are untouched, so this is only valid while the products'
+        embedding text is unchanged.
+
+        Returns:
+            False if a cached product was deactivated and the snapshot must be reloaded
+        """
+        for product_id, stock, price_cents, is_active in updates:
+            i = self.index.get(product_id)
+            if i is None:
+                continue
+            if not is_active:
+                return False
+            self.products[i]["stock"] = stock
+            self.products[i]["price"] = price_cents / 100
+        return True
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        limit: int,
+        exclude_ids: list[str] | None = None,
+        candidate_limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Rank products by cosine similarity to a query vector.
+
+        Args:
+            query_embedding: ``(d,)`` query vector
+            limit: Number of results to return
+            exclude_ids: External product IDs to leave out
+            candidate_limit: Only score the most popular N remaining products
+
+        Returns:
+            Candidate dicts (copies) with ``score`` and ``signal="content"``
+        """
+        if not self.products:
+            return []
+
+        valid = self._candidate_mask(exclude_ids, candidate_limit)
+        scores = cosine_similarities(
+            query_embedding, self.vectors[: len(valid)], matrix_normalized=True
+        )
+        scores[~valid] = -np.inf
+        return [
+            {**self.products[i], "score": float(scores[i]), "signal": "content"}
+            for i in top_k_indices(scores, min(limit, int(valid.sum())))
+        ]
+
+    def search_many(
+        self,
+        query_embeddings: np.ndarray,
+        quotas: list[int],
+        exclude_ids: list[str] | None = None,
+        candidate_limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Rank products for several query vectors at once and merge by quota.
+
+        All queries are scored in one ``(n, d) @ (d, k)`` product. Query ``j``
+        contributes its ``quotas[j]`` best products not already taken by an
+        earlier query; any shortfall is filled with the best remaining products
+        across all queries. Scores are divided by each query's best score so
+        every interest's top match ranks equally downstream.
+
+        Args:
+            query_embeddings: ``(k, d)`` query vectors, most important first
+            quotas: Number of results per query
+            exclude_ids: External product IDs to leave out
+            candidate_limit: Only score the most popular N remaining products
+
+        Returns:
+            Candidate dicts (copies) with ``score``, ``signal="content"`` and
+            ``interest`` (the query index that selected them)
+        """
+        if not self.products or not quotas:
+            return []
+
+        valid = self._candidate_mask(exclude_ids, candidate_limit)
+        queries = normalize(np.atleast_2d(query_embeddings))
+        scores = self.vectors[: len(valid)] @ queries.T
+        scores[~valid] = -np.inf
+        available = int(valid.sum())
+        wanted = min(sum(quotas), available)
+
+        top_scores = scores.max(axis=0, initial=0.0)
+        relative = scores / np.where(top_scores > 0, top_scores, 1.0)
+
+        picked: dict[int, int] = {}
+        for interest, quota in enumerate(quotas):
+            # Enough ranked rows to still fill the quota after skipping taken ones
+            ranked = top_k_indices(scores[:, interest], min(available, quota + len(picked)))
+            fresh = [int(i) for i in ranked if int(i) not in picked][:quota]
+            picked.update(dict.fromkeys(fresh, interest))
+
+        if len(picked) < wanted:
+            best = relative.max(axis=1)
+            best[list(picked)] = -np.inf
+            for i in top_k_indices(best, wanted - len(picked)):
+                picked[int(i)] = int(np.argmax(relative[i]))
+
+        return [
+            {
+                **self.products[i],
+                "score": float(relative[i, interest]),
+                "signal": "content",
+                "interest": interest,
+            }
+            for i, interest in picked.items()
+        ]
+
+    def _candidate_mask(
+        self, exclude_ids: list[str] | None, candidate_limit: int | None
+    ) -> np.ndarray:
+        """Boolean mask over a popularity prefix of the catalog marking rows to score.
+
+        The prefix (a view, no copy) is guaranteed to contain the first
+        ``candidate_limit`` non-excluded rows; excluded rows and rows beyond
+        the limit are False.
+        """
+        excluded = np.array(
+            [self.index[pid] for pid in exclude_ids or () if pid in self.index], dtype=np.int64
+        )
+        stop = len(self.products)
+        if candidate_limit is not None:
+            stop = min(stop, candidate_limit + len(excluded))
+
+        valid = np.ones(stop, dtype=bool)
+        valid[excluded[excluded < stop]] = False
+        if candidate_limit is not None:
+            valid &= np.cumsum(valid) <= candidate_limit
+        return valid
+
+
+def allocate_quotas(weights: np.ndarray, total: int) -> list[int]:
+    """
+    Split ``total`` results across interests in proportion to their weights.
+
+    Uses largest remainders; every interest gets at least one slot while
+    ``total`` allows.
+    """
+    weights = np.clip(np.asarray(weights, dtype=np.float64), 0.0, None)
+    k = len(weights)
+    if k == 0 or total <= 0:
+        return []
+    if weights.sum() <= 0:
+        weights = np.ones(k)
+    shares = weights / weights.sum() * total
+    quotas = np.floor(shares).astype(int)
+    remainder = total - int(quotas.sum())
+    for i in np.argsort(-(shares - quotas), kind="stable")[:remainder]:
+        quotas[i] += 1
+    # Give starved interests a slot from the largest quota
+    for i in np.flatnonzero(quotas == 0):
+        largest = int(np.argmax(quotas))
+        if quotas[largest] <= 1:
+            break
+        quotas[largest] -= 1
+        quotas[i] = 1
+    return quotas.tolist()
+
+
+class CatalogVectorCache:
+    """TTL cache holding the current :class:`CatalogSnapshot`."""
+
+    def __init__(self, ttl_seconds: float | None = None, max_products: int | None = None):
+        settings = get_settings()
+        self.ttl_seconds = (
+            settings.catalog_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        )
+        self.max_products = (
+            settings.catalog_cache_max_products if max_products is None else max_products
+        )
+        self._snapshot: CatalogSnapshot | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether snapshots are cached at all (TTL of 0 disables the cache)."""
+        return self.ttl_seconds > 0
+
+    def is_fresh(self) -> bool:
+        """Whether the current snapshot is within its TTL."""
+        return (
+            self._snapshot is not None
+            and time.monotonic() - self._snapshot.loaded_at < self.ttl_seconds
+        )
+
+    def invalidate(self) -> None:
+        """Drop the current snapshot so the next read reloads it."""
+        self._snapshot = None
+
+    def apply_updates(self, updates: list[tuple[str, int, int, bool]]) -> None:
+        """Patch stock and price into the current snapshot (see :meth:`CatalogSnapshot.apply_updates`)."""
+        if self._snapshot is not None and not self._snapshot.apply_updates(updates):
+            self.invalidate()
+
+    async def get(self, session: AsyncSession) -> CatalogSnapshot:
+        """Return the cached snapshot, reloading it if it has expired."""
+        if self.is_fresh():
+            return self._snapshot
+        # Only one request reloads; the others wait and reuse its result
+        async with self._lock:
+            if not self.is_fresh():
+                self._snapshot = await self.load(session)
+        return self._snapshot
+
+    async def load(self, session: AsyncSession) -> CatalogSnapshot:
+        """Load the most popular active products with embeddings."""
+        started_at = time.perf_counter()
+        query = text("""
+            SELECT external_product_id, name, category, price_cents,
+                   embedding, popularity_score, stock
+            FROM recommender.product_embeddings
+            WHERE is_active = true AND embedding IS NOT NULL
+            ORDER BY popularity_score DESC NULLS LAST, id
+            LIMIT :limit
+        """)
+        result = await session.execute(query, {"limit": self.max_products})
+        snapshot = CatalogSnapshot.from_rows(result.fetchall())
+        logger.info(
+            "Catalog vector cache loaded",
+            products=len(snapshot),
+            seconds=round(time.perf_counter() - started_at, 3),
+        )
+        return snapshot
+
+
+# Global cache, created on first use
+_catalog_cache: CatalogVectorCache | None = None
+
+
+def get_catalog_cache() -> CatalogVectorCache:
+    """Get or create the global catalog vector cache."""
+    global _catalog_cache
+    if _catalog_cache is None:
+        _catalog_cache = CatalogVectorCache()
+    return _catalog_cache
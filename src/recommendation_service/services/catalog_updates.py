@@ -0,0 +1,75 @@
+"""Propagation of catalog changes from product sync to the API caches.
+
+Each API process holds its own :class:`~recommendation_service.services.catalog_cache.CatalogVectorCache`.
+Product sync publishes the stock, price and active flag of updated products on
+the ``CATALOG_UPDATE_CHANNEL`` Redis channel, and re-embedding publishes an
+invalidation; every API process subscribes and patches or drops its snapshot,
+so a stock-only change costs no reload and no re-embedding.
+
+Messages are orjson objects: ``{"products": [[id, stock, price_cents, is_active], ...],
+"invalidate": bool}``.
+"""
+
+import asyncio
+from collections.abc import Sequence
+
+import orjson
+import structlog
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.redis.client import get_redis
+from recommendation_service.services.catalog_cache import get_catalog_cache
+
+logger = structlog.get_logger()
+
+ProductUpdate = tuple[str, int, int, bool]
+
+# Seconds to wait before resubscribing after a Redis error
+RESUBSCRIBE_DELAY_SECONDS = 5.0
+
+
+async def publish_catalog_updates(
+    products: Sequence[ProductUpdate] = (), invalidate: bool = False
+) -> None:
+    """Publish product updates (or a full invalidation) to every API process.
+
+    Failures are logged, not raised: caches still expire after their TTL.
+    """
+    channel = get_settings().catalog_update_channel
+    if not channel or not (products or invalidate):
+        return
+    message = orjson.dumps({"products": list(products), "invalidate": invalidate})
+    try:
+        await get_redis().publish(channel, message)
+    except Exception as e:
+        logger.warning("Could not publish catalog updates", error=str(e))
+
+
+def apply_catalog_message(data: bytes) -> None:
+    """Apply one published message to this process's catalog cache."""
+    message = orjson.loads(data)
+    cache = get_catalog_cache()
+    if message.get("invalidate"):
+        cache.invalidate()
+    else:
+        cache.apply_updates([tuple(update) for update in message.get("products", ())])
+
+
+async def listen_for_catalog_updates() -> None:
+    """Apply published catalog updates until cancelled, resubscribing after errors."""
+    channel = get_settings().catalog_update_channel
+    while True:
+        try:
+            async with get_redis().pubsub() as pubsub:
+                await pubsub.subscribe(channel)
+                logger.info("Listening for catalog updates", channel=channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        apply_catalog_message(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Updates may have been missed while disconnected
+            get_catalog_cache().invalidate()
+            logger.warning("Catalog update listener failed", error=str(e))
+            await asyncio.sleep(RESUBSCRIBE_DELAY_SECONDS)
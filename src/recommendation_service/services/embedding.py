@@ -1,45 +1,29 @@
 """Embedding service for generating text embeddings.
 
-Uses sentence-transformers to generate embeddings for products and user preferences.
+Uses the configured embedding backend to generate embeddings for products and user
+preferences. All methods take and return float32 ``np.ndarray`` values; vectors
+are only converted to JSON when written to the database.
 """
 
-import json
+import hashlib
 from typing import Any
 
+import numpy as np
 import structlog
-from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.vector.batching import encode_bucketed
+from recommendation_service.infrastructure.vector.embeddings import get_embedding_model
+from recommendation_service.infrastructure.vector.encoder_pool import (
+    EncoderOverloadedError,
+    get_async_encoder,
+)
+from recommendation_service.infrastructure.vector.ops import cosine_similarity
 
-logger = structlog.get_logger()
-
-# Lazy-loaded model to avoid loading on import
-_embedding_model = None
+__all__ = ["EmbeddingService", "get_embedding_model"]
 
-
-def get_embedding_model():
-    """Get or initialize the embedding model."""
-    global _embedding_model
-    if _embedding_model is None:
-        try:
-            from sentence_transformers import SentenceTransformer
-
-            settings = get_settings()
-            model_name = settings.embedding_model
-            logger.info("Loading embedding model", model=model_name)
-            _embedding_model = SentenceTransformer(model_name)
-            logger.info(
-                "Embedding model loaded",
-                model=model_name,
-                dimension=_embedding_model.get_sentence_embedding_dimension(),
-            )
-        except ImportError:
-            logger.warning(
-                "sentence-transformers not installed, embeddings will be unavailable"
-            )
-            return None
-    return _embedding_model
+logger = structlog.get_logger()
 
 
 class EmbeddingService:
@@ -56,31 +40,55 @@ class EmbeddingService:
             self._model = get_embedding_model()
         return self._model
 
-    def generate_embedding(self, text: str) -> list[float] | None:
+    def generate_embedding(self, text: str) -> np.ndarray | None:
         """Generate an embedding for a single text."""
+        embeddings = self.generate_embeddings_batch([text])
+        return None if embeddings is None else embeddings[0]
+
+    def generate_embeddings_batch(self, texts: list[str]) -> np.ndarray | None:
+        """Generate an ``(len(texts), dimension)`` float32 array of embeddings."""
         if self.model is None:
             logger.warning("Embedding model not available")
             return None
 
         try:
-            embedding = self.model.encode(text, convert_to_numpy=True)
-            return embedding.tolist()
+            settings = get_settings()
+            embeddings = encode_bucketed(
+                lambda batch: self.model.encode(
+                    batch, batch_size=len(batch), convert_to_numpy=True
+                ),
+                texts,
+                token_budget=settings.embedding_token_budget,
+                max_batch_size=settings.embedding_max_batch_size,
+                tokenizer=getattr(self.model, "tokenizer", None),
+            )
+            return embeddings.astype(np.float32, copy=False)
         except Exception as e:
-            logger.error("Error generating embedding", error=str(e))
+            logger.error("Error generating batch embeddings", error=str(e))
             return None
 
-    def generate_embeddings_batch(self, texts: list[str]) -> list[list[float] | None]:
-        """Generate embeddings for multiple texts."""
-        if self.model is None:
-            logger.warning("Embedding model not available")
-            return [None] * len(texts)
+    async def agenerate_embedding(self, text: str) -> np.ndarray | None:
+        """Generate an embedding for a single text on the encoder pool.
+
+        Raises:
+            EncoderOverloadedError: If the encoder pool is saturated
+        """
+        embeddings = await self.agenerate_embeddings_batch([text])
+        return None if embeddings is None else embeddings[0]
 
+    async def agenerate_embeddings_batch(self, texts: list[str]) -> np.ndarray | None:
+        """Generate embeddings for multiple texts without blocking the event loop.
+
+        Raises:
+            EncoderOverloadedError: If the encoder pool is saturated
+        """
         try:
-            embeddings = self.model.encode(texts, convert_to_numpy=True)
-            return [emb.tolist() for emb in embeddings]
+            return await get_async_encoder().encode_many(texts)
+        except EncoderOverloadedError:
+            raise
         except Exception as e:
             logger.error("Error generating batch embeddings", error=str(e))
-            return [None] * len(texts)
+            return None
 
     def create_product_text(self, product: dict[str, Any]) -> str:
         """Create text representation of a product for embedding."""
@@ -116,22 +124,44 @@ class EmbeddingService:
 
         return " | ".join(parts)
 
+    def stored_product_text(self, product: dict[str, Any]) -> str:
+        """:meth:`create_product_text` over the fields kept in ``product_embeddings``.
+
+        This is the text the embedding backfill encodes; the description is
+        not stored, so it is left out.
+        """
+        return self.create_product_text(
+            {
+                "name": product.get("name"),
+                "category": product.get("category") or product.get("category_name"),
+                "price_cents": product.get("price_cents") or 0,
+            }
+        )
+
+    def content_fingerprint(self, product: dict[str, Any]) -> str:
+        """Hash of :meth:`stored_product_text`, which changes only when the embedding would."""
+        text = self.stored_product_text(product)
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
     async def generate_product_embedding(
         self, product: dict[str, Any]
-    ) -> list[float] | None:
+    ) -> np.ndarray | None:
         """Generate embedding for a product."""
         text = self.create_product_text(product)
-        return self.generate_embedding(text)
+        return await self.agenerate_embedding(text)
 
     async def update_product_embeddings(
         self, batch_size: int = 50, only_missing: bool = True
-    ) -> dict[str, int]:
+    ) -> dict[str, Any]:
         """
         Generate embeddings for products in the database.
 
+        Runs the streaming backfill pipeline: keyset-paginated reads, encoding on
+        the encoder pool and COPY-based bulk writes, resumable from a checkpoint.
+
         Args:
-            batch_size: Number of products to process per batch
-            only_missing: If True, only process products without embeddings
+            batch_size: Maximum texts per length-bucketed forward pass
+            only_missing: If True, only process products without a current embedding
 
         Returns:
             Summary of the operation
@@ -139,89 +169,18 @@ class EmbeddingService:
         if self.session is None:
             raise ValueError("Session required for database operations")
 
-        # Get products needing embeddings
-        if only_missing:
-            query = text("""
-                SELECT id, external_product_id, name, category, price_cents
-                FROM recommender.product_embeddings
-                WHERE embedding IS NULL AND is_active = true
-                ORDER BY id
-                LIMIT :limit
-            """)
-        else:
-            query = text("""
-                SELECT id, external_product_id, name, category, price_cents
-                FROM recommender.product_embeddings
-                WHERE is_active = true
-                ORDER BY id
-                LIMIT :limit
-            """)
-
-        updated = 0
-        errors = 0
-
-        while True:
-            result = await self.session.execute(query, {"limit": batch_size})
-            products = result.fetchall()
-
-            if not products:
-                break
-
-            # Prepare texts for batch embedding
-            texts = []
-            product_ids = []
-            for p in products:
-                product_dict = {
-                    "name": p.name,
-                    "category": p.category,
-                    "price_cents": p.price_cents,
-                }
-                texts.append(self.create_product_text(product_dict))
-                product_ids.append(p.id)
-
-            # Generate embeddings
-            embeddings = self.generate_embeddings_batch(texts)
-
-            # Update database
-            for pid, emb in zip(product_ids, embeddings):
-                if emb is not None:
-                    try:
-                        # Store as JSON since we don't have pgvector
-                        update_query = text("""
-                            UPDATE recommender.product_embeddings
-                            SET embedding = :embedding,
-                                embedding_updated_at = NOW()
-                            WHERE id = :id
-                        """)
-                        await self.session.execute(
-                            update_query,
-                            {"id": pid, "embedding": json.dumps(emb)},
-                        )
-                        updated += 1
-                    except Exception as e:
-                        logger.error("Error updating embedding", id=pid, error=str(e))
-                        errors += 1
-                else:
-                    errors += 1
-
-            await self.session.commit()
-            logger.info("Batch embeddings updated", updated=updated, errors=errors)
-
-            # If we got fewer than batch_size, we're done
-            if len(products) < batch_size:
-                break
-
-        return {"updated": updated, "errors": errors}
-
-    def cosine_similarity(self, vec1: list[float], vec2: list[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        import math
-
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        norm1 = math.sqrt(sum(a * a for a in vec1))
-        norm2 = math.sqrt(sum(b * b for b in vec2))
+        from recommendation_service.services.embedding_backfill import (
+            EmbeddingBackfillPipeline,
+        )
 
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
+        pipeline = EmbeddingBackfillPipeline(
+            self.session,
+            embedding_service=self,
+            only_missing=only_missing,
+            encode_batch_size=batch_size,
+        )
+        return await pipeline.run()
 
-        return dot_product / (norm1 * norm2)
+    def cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
+        """Calculate cosine similarity between two vectors."""
+        return cosine_similarity(vec1, vec2)
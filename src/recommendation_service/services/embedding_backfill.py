@@ -0,0 +1,350 @@
+"""Streaming bulk embedding backfill pipeline.
+
+Reads products with keyset pagination, encodes them on the async encoder pool and
+writes the vectors back with COPY into a staging table followed by a single
+``UPDATE ... FROM`` per write batch. The three stages run concurrently and are
+connected by bounded queues, so reading and writing overlap with model compute.
+Progress is checkpointed in ``recommender.sync_status`` so an interrupted run
+resumes after the last written product id.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.database.connection import get_session_factory
+from recommendation_service.infrastructure.vector.encoder_pool import get_async_encoder
+from recommendation_service.infrastructure.vector.ops import to_json
+from recommendation_service.services.embedding import EmbeddingService
+
+logger = structlog.get_logger()
+
+# Sentinel that tells the next stage its upstream is exhausted
+_DONE = object()
+
+
+@dataclass
+class BackfillStats:
+    """Counters for a backfill run."""
+
+    read: int = 0
+    updated: int = 0
+    errors: int = 0
+    started_at: float = 0.0
+    resumed_from: int | None = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def products_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.updated / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "read": self.read,
+            "updated": self.updated,
+            "errors": self.errors,
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+            "products_per_second": round(self.products_per_second, 1),
+            "resumed_from": self.resumed_from,
+        }
+
+
+class EmbeddingBackfillPipeline:
+    """Overlapped read/encode/write pipeline for (re)generating product embeddings."""
+
+    CHECKPOINT_ID = "embedding_backfill"
+    STAGING_TABLE = "embedding_backfill_staging"
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        embedding_service: EmbeddingService | None = None,
+        only_missing: bool = True,
+        read_batch_size: int | None = None,
+        encode_batch_size: int | None = None,
+        write_batch_size: int | None = None,
+        queue_size: int | None = None,
+        resume: bool = True,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        product_ids: list[str] | None = None,
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            session: Session used by the write stage (the read stage opens its own)
+            embedding_service: Service used to build product texts
+            only_missing: If True, only process products without a current
+                embedding (none yet, or marked stale by product sync)
+            read_batch_size: Rows fetched per keyset page
+            encode_batch_size: Maximum texts per length-bucketed forward pass
+            write_batch_size: Vectors written per COPY + UPDATE round
+            queue_size: Maximum batches buffered between stages
+            resume: Continue after the last checkpoint of an unfinished run
+            shard_index: Partition to process (``id % shard_count``)
+            shard_count: Number of partitions; each has its own checkpoint
+            product_ids: Only process these external product ids (a targeted
+                run, which never resumes and keeps its own checkpoint row)
+        """
+        settings = get_settings()
+        self.session = session
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.only_missing = only_missing
+        self.read_batch_size = read_batch_size or settings.embedding_backfill_read_batch_size
+        self.encode_batch_size = (
+            encode_batch_size or settings.embedding_backfill_encode_batch_size
+        )
+        self.write_batch_size = write_batch_size or settings.embedding_backfill_write_batch_size
+        self.queue_size = queue_size or settings.embedding_backfill_queue_size
+        self.resume = resume and product_ids is None
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.product_ids = product_ids
+        if product_ids is not None:
+            self.checkpoint_id = f"{self.CHECKPOINT_ID}:targeted"
+        elif shard_count > 1:
+            self.checkpoint_id = f"{self.CHECKPOINT_ID}:{shard_index}/{shard_count}"
+        else:
+            self.checkpoint_id = self.CHECKPOINT_ID
+        self.stats = BackfillStats()
+
+    async def run(self) -> dict[str, Any]:
+        """
+        Run the backfill to completion.
+
+        Returns:
+            Summary of the run including throughput
+        """
+        self.stats = BackfillStats(started_at=time.perf_counter())
+        after_id = await self._load_checkpoint() if self.resume else 0
+        if after_id:
+            self.stats.resumed_from = after_id
+            logger.info("Resuming embedding backfill", after_id=after_id)
+
+        await self._save_checkpoint("running", after_id)
+
+        encode_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._read_stage(after_id, encode_queue))
+                group.create_task(self._encode_stage(encode_queue, write_queue))
+                group.create_task(self._write_stage(write_queue))
+        except Exception as e:
+            error = e.exceptions[0] if isinstance(e, ExceptionGroup) else e
+            logger.error("Embedding backfill failed", error=str(error), **self.stats.to_dict())
+            await self.session.rollback()
+            await self._save_checkpoint("error", None, error_message=str(error))
+            raise error
+
+        await self._save_checkpoint("idle", None, clear_cursor=True)
+        summary = self.stats.to_dict()
+        logger.info("Embedding backfill completed", **summary)
+        return summary
+
+    # ==========================================================================
+    # Stages
+    # ==========================================================================
+
+    async def _read_stage(self, after_id: int, out: asyncio.Queue) -> None:
+        """Page through products by id and emit one batch per page."""
+        missing_clause = (
+            "AND (embedding IS NULL OR embedding_updated_at IS NULL)"
+            if self.only_missing
+            else ""
+        )
+        shard_clause = "AND id % :shard_count = :shard_index" if self.shard_count > 1 else ""
+        ids_clause = (
+            "AND external_product_id = ANY(:product_ids)" if self.product_ids is not None else ""
+        )
+        query = text(f"""
+            SELECT id, name, category, price_cents
+            FROM recommender.product_embeddings
+            WHERE is_active = true
+            {missing_clause}
+            {shard_clause}
+            {ids_clause}
+            AND id > :after_id
+            ORDER BY id
+            LIMIT :limit
+        """)
+
+        async with get_session_factory()() as read_session:
+            while True:
+                result = await read_session.execute(
+                    query,
+                    {
+                        "after_id": after_id,
+                        "limit": self.read_batch_size,
+                        "shard_index": self.shard_index,
+                        "shard_count": self.shard_count,
+                        "product_ids": self.product_ids,
+                    },
+                )
+                rows = result.fetchall()
+                if not rows:
+                    break
+
+                self.stats.read += len(rows)
+                after_id = rows[-1].id
+
+                # Whole pages go to the encoder so it can length-bucket across them
+                ids = [r.id for r in rows]
+                texts = [
+                    self.embedding_service.stored_product_text(
+                        {"name": r.name, "category": r.category, "price_cents": r.price_cents}
+                    )
+                    for r in rows
+                ]
+                await out.put((ids, texts))
+
+                if len(rows) < self.read_batch_size:
+                    break
+
+        await out.put(_DONE)
+
+    async def _encode_stage(self, inbox: asyncio.Queue, out: asyncio.Queue) -> None:
+        """Encode text batches on the encoder pool.
+
+        A failed batch fails the run: the checkpoint never moves past ids that
+        were not written, so a resumed run encodes them again.
+        """
+        encoder = get_async_encoder()
+        while (item := await inbox.get()) is not _DONE:
+            ids, texts = item
+            try:
+                embeddings = await encoder.encode_many(
+                    texts, max_batch_size=self.encode_batch_size
+                )
+            except Exception as e:
+                logger.error("Error encoding backfill batch", first_id=ids[0], error=str(e))
+                self.stats.errors += len(ids)
+                raise
+            await out.put((ids, embeddings))
+        await out.put(_DONE)
+
+    async def _write_stage(self, inbox: asyncio.Queue) -> None:
+        """Accumulate encoded batches and bulk-write them."""
+        pending_ids: list[int] = []
+        pending_vectors: list[np.ndarray] = []
+
+        while (item := await inbox.get()) is not _DONE:
+            ids, embeddings = item
+            pending_ids.extend(ids)
+            pending_vectors.extend(embeddings)
+            if len(pending_ids) >= self.write_batch_size:
+                await self._flush(pending_ids, pending_vectors)
+                pending_ids, pending_vectors = [], []
+
+        if pending_ids:
+            await self._flush(pending_ids, pending_vectors)
+
+    async def _flush(self, ids: list[int], vectors: list[np.ndarray]) -> None:
+        """COPY vectors into the staging table and apply them with one UPDATE."""
+        await self.session.execute(text(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {self.STAGING_TABLE} (
+                id integer PRIMARY KEY,
+                embedding text NOT NULL
+            ) ON COMMIT DELETE ROWS
+        """))
+
+        records = [
+            (pid, to_json(vec))
+            for pid, vec in zip(ids, vectors, strict=True)
+        ]
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            self.STAGING_TABLE, records=records, columns=["id", "embedding"]
+        )
+
+        result = await self.session.execute(text(f"""
+            UPDATE recommender.product_embeddings pe
+            SET embedding = s.embedding::json,
+                embedding_updated_at = NOW()
+            FROM {self.STAGING_TABLE} s
+            WHERE pe.id = s.id
+        """))
+        self.stats.updated += result.rowcount
+        await self._save_checkpoint("running", ids[-1], commit=False)
+        await self.session.commit()
+
+        logger.info(
+            "Backfill batch written",
+            written=result.rowcount,
+            last_id=ids[-1],
+            **self.stats.to_dict(),
+        )
+
+    # ==========================================================================
+    # Checkpointing
+    # ==========================================================================
+
+    async def _load_checkpoint(self) -> int:
+        """Return the last written id of an unfinished run, or 0."""
+        query = text("""
+            SELECT status, last_sync_cursor
+            FROM recommender.sync_status
+            WHERE id = :id
+        """)
+        result = await self.session.execute(query, {"id": self.checkpoint_id})
+        row = result.fetchone()
+        if row and row.status in ("running", "error") and row.last_sync_cursor:
+            return int(row.last_sync_cursor)
+        return 0
+
+    async def _save_checkpoint(
+        self,
+        status: str,
+        last_id: int | None,
+        error_message: str | None = None,
+        clear_cursor: bool = False,
+        commit: bool = True,
+    ) -> None:
+        """Upsert the checkpoint row for this pipeline."""
+        now = datetime.now()  # Use naive datetime for DB
+
+        query = text("""
+            INSERT INTO recommender.sync_status
+            (id, status, records_synced, last_sync_cursor, last_sync_at, updated_at, error_message)
+            VALUES (:id, :status, :records_synced, :cursor, :last_sync_at, :now, :error_message)
+            ON CONFLICT (id) DO UPDATE SET
+                status = :status,
+                records_synced = :records_synced,
+                last_sync_cursor = CASE
+                    WHEN :clear_cursor THEN NULL
+                    ELSE COALESCE(:cursor, recommender.sync_status.last_sync_cursor)
+                END,
+                last_sync_at = COALESCE(:last_sync_at, recommender.sync_status.last_sync_at),
+                updated_at = :now,
+                error_message = :error_message
+        """)
+        await self.session.execute(
+            query,
+            {
+                "id": self.checkpoint_id,
+                "status": status,
+                "records_synced": self.stats.updated,
+                "cursor": str(last_id) if last_id else None,
+                "clear_cursor": clear_cursor,
+                "last_sync_at": now if status == "idle" else None,
+                "now": now,
+                "error_message": error_message,
+            },
+        )
+        if commit:
+            await self.session.commit()
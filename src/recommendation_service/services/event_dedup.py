@@ -0,0 +1,252 @@
+"""Deduplication of client-supplied interaction event ids.
+
+Clients may send an ``event_id`` with each interaction so retries can be
+recognised. Two layers catch duplicates:
+
+- A time-windowed Bloom filter answers "definitely new" for almost every
+  event without touching the database. It rotates two generations, each
+  covering half of ``INTERACTION_DEDUP_WINDOW_SECONDS``, either in process
+  memory or as Redis bitmaps shared by every API process.
+- The authoritative check happens in the writer: each batch registers its event
+  ids in ``recommender.interaction_event_ids`` (primary key ``event_id``) with
+  one ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` in the same transaction
+  as the COPY, and rows whose id was already registered are dropped.
+
+Only events the filter flags as possibly seen cost an extra lookup on the
+request path, which lets the API skip the online preference update for
+confirmed retries.
+"""
+
+import hashlib
+import math
+import time
+from collections.abc import Sequence
+from typing import Any, Protocol
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from recommendation_service.config import get_settings
+from recommendation_service.core.metrics import (
+    INTERACTION_DEDUP_BLOOM_HITS,
+    INTERACTION_DEDUP_CHECKS,
+    INTERACTION_DUPLICATES,
+)
+from recommendation_service.infrastructure.database.connection import get_session_factory
+from recommendation_service.infrastructure.redis.client import get_redis
+
+
+def bloom_parameters(capacity: int, false_positive_rate: float) -> tuple[int, int]:
+    """Optimal ``(bits, hashes)`` for ``capacity`` items at the target error rate."""
+    bits = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+def bloom_positions(key: str, bits: int, hashes: int) -> list[int]:
+    """Bit positions of ``key`` by double hashing one 128-bit blake2b digest."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+class SeenFilter(Protocol):
+    """Approximate membership test that records what it is asked about."""
+
+    async def check_and_add(self, key: str) -> bool:
+        """Return whether ``key`` was possibly seen in the window, then add it."""
+        ...
+
+
+class MemoryBloomFilter:
+    """In-process rotating Bloom filter over two packed numpy bitsets (eight bits per byte)."""
+
+    def __init__(self, capacity: int, false_positive_rate: float, window_seconds: float):
+        self.bits, self.hashes = bloom_parameters(capacity, false_positive_rate)
+        self.generation_seconds = window_seconds / 2
+        self._generation = self._current_generation()
+        self._current = np.zeros((self.bits + 7) // 8, dtype=np.uint8)
+        self._previous = np.zeros((self.bits + 7) // 8, dtype=np.uint8)
+
+    def _current_generation(self) -> int:
+        return int(time.time() // self.generation_seconds)
+
+    def _rotate(self) -> None:
+        generation = self._current_generation()
+        if generation == self._generation:
+            return
+        if generation == self._generation + 1:
+            self._previous, self._current = self._current, self._previous
+        else:
+            self._previous[:] = 0
+        self._current[:] = 0
+        self._generation = generation
+
+    async def check_and_add(self, key: str) -> bool:
+        """Return whether ``key`` was possibly seen in the window, then add it."""
+        self._rotate()
+        positions = np.array(bloom_positions(key, self.bits, self.hashes), dtype=np.int64)
+        offsets = positions >> 3
+        masks = np.left_shift(1, positions & 7).astype(np.uint8)
+        seen = bool(
+            np.all(self._current[offsets] & masks) or np.all(self._previous[offsets] & masks)
+        )
+        # bitwise_or.at applies every mask even when positions share a byte
+        np.bitwise_or.at(self._current, offsets, masks)
+        return seen
+
+
+class RedisBloomFilter:
+    """Rotating Bloom filter stored as Redis bitmaps, shared across processes."""
+
+    def __init__(
+        self,
+        capacity: int,
+        false_positive_rate: float,
+        window_seconds: float,
+        key_prefix: str = "reemio:interaction-dedup",
+    ):
+        self.bits, self.hashes = bloom_parameters(capacity, false_positive_rate)
+        self.generation_seconds = window_seconds / 2
+        self.ttl = math.ceil(window_seconds)
+        self.key_prefix = key_prefix
+
+    async def check_and_add(self, key: str) -> bool:
+        """Return whether ``key`` was possibly seen in the window, then add it.
+
+        One pipelined round trip: read the bits of the previous generation, set
+        them in the current one (``SET`` returns the old bit) and refresh its
+        expiry.
+        """
+        generation = int(time.time() // self.generation_seconds)
+        current = f"{self.key_prefix}:{generation}"
+        previous = f"{self.key_prefix}:{generation - 1}"
+        positions = bloom_positions(key, self.bits, self.hashes)
+
+        redis = get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            read_previous = pipe.bitfield(previous)
+            write_current = pipe.bitfield(current)
+            for position in positions:
+                read_previous.get("u1", position)
+                write_current.set("u1", position, 1)
+            read_previous.execute()
+            write_current.execute()
+            pipe.expire(current, self.ttl)
+            previous_bits, current_bits, _ = await pipe.execute()
+        return all(current_bits) or all(previous_bits)
+
+
+class EventDeduplicator:
+    """Request-path duplicate check for client event ids."""
+
+    def __init__(self, seen_filter: SeenFilter):
+        self.seen_filter = seen_filter
+
+    async def is_duplicate(self, event_id: str) -> bool:
+        """
+        Whether an event id was already recorded.
+
+        Events the filter has never seen are new without a database lookup;
+        possible repeats are confirmed against ``interaction_event_ids``. A
+        repeat whose original is still buffered is not found here and is
+        dropped by the writer instead.
+        """
+        INTERACTION_DEDUP_CHECKS.inc()
+        if not await self.seen_filter.check_and_add(event_id):
+            return False
+
+        INTERACTION_DEDUP_BLOOM_HITS.inc()
+        duplicate = await is_registered(event_id)
+        if duplicate:
+            INTERACTION_DUPLICATES.labels(stage="api").inc()
+        return duplicate
+
+
+async def is_registered(event_id: str) -> bool:
+    """Whether an event id is in ``interaction_event_ids``."""
+    async with get_session_factory()() as session:
+        result = await session.execute(
+            text("SELECT 1 FROM recommender.interaction_event_ids WHERE event_id = :event_id"),
+            {"event_id": event_id},
+        )
+        return result.first() is not None
+
+
+async def register_event_ids(
+    session: AsyncSession, event_ids: Sequence[str], recorded_at: Any
+) -> set[str]:
+    """
+    Register event ids in one statement, returning those not seen before.
+
+    Runs in the caller's transaction so the ids roll back with a failed write.
+    """
+    result = await session.execute(
+        text("""
+            INSERT INTO recommender.interaction_event_ids (event_id, created_at)
+            SELECT event_id, :recorded_at FROM unnest(CAST(:event_ids AS text[])) AS event_id
+            ON CONFLICT (event_id) DO NOTHING
+            RETURNING event_id
+        """),
+        {"event_ids": list(event_ids), "recorded_at": recorded_at},
+    )
+    return {row.event_id for row in result.fetchall()}
+
+
+def drop_registered(
+    records: Sequence[tuple], event_id_index: int, new_ids: set[str]
+) -> list[tuple]:
+    """Keep rows without an event id, and the first row of each newly registered id."""
+    kept = []
+    remaining = set(new_ids)
+    for record in records:
+        event_id = record[event_id_index]
+        if event_id is None:
+            kept.append(record)
+        elif event_id in remaining:
+            remaining.discard(event_id)
+            kept.append(record)
+    duplicates = len(records) - len(kept)
+    if duplicates:
+        INTERACTION_DUPLICATES.labels(stage="writer").inc(duplicates)
+    return kept
+
+
+async def prune_event_ids(session: AsyncSession, before: Any) -> int:
+    """Delete registered event ids older than ``before``.
+
+    Returns:
+        Rows deleted
+    """
+    result = await session.execute(
+        text("DELETE FROM recommender.interaction_event_ids WHERE created_at < :before"),
+        {"before": before},
+    )
+    await session.commit()
+    return result.rowcount
+
+
+# Global deduplicator, created on first use
+_deduplicator: EventDeduplicator | None = None
+
+
+def get_event_deduplicator() -> EventDeduplicator | None:
+    """Get or create the global deduplicator; None when dedup is off."""
+    global _deduplicator
+    settings = get_settings()
+    if settings.interaction_dedup_backend == "off":
+        return None
+    if _deduplicator is None:
+        filter_class = (
+            RedisBloomFilter if settings.interaction_dedup_backend == "redis" else MemoryBloomFilter
+        )
+        _deduplicator = EventDeduplicator(
+            filter_class(
+                settings.interaction_dedup_capacity,
+                settings.interaction_dedup_false_positive_rate,
+                settings.interaction_dedup_window_seconds,
+            )
+        )
+    return _deduplicator
@@ -0,0 +1,393 @@
+"""Buffered, batched ingestion of tracked user interactions.
+
+The tracking endpoints only validate an interaction and append it to a bounded
+in-process buffer, which costs microseconds. A background writer drains the
+buffer whenever ``flush_size`` rows are waiting or ``flush_interval`` seconds
+have passed, and writes each batch with a single asyncpg
+``copy_records_to_table`` into ``recommender.user_interactions``.
+
+When the buffer is full (the database is slow or down), new interactions are
+rejected with :class:`InteractionBufferFullError` so the API can answer 503
+instead of growing memory without bound. A failed flush puts its batch back at
+the front of the buffer and is retried on the next interval. A batch the
+database rejects because of a bad value is split until the offending rows are
+alone; those are logged and dropped after ``INTERACTION_ROW_WRITE_ATTEMPTS``
+attempts, so one bad row cannot stall the writer.
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import datetime
+from typing import Any
+
+import orjson
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from recommendation_service.config import get_settings
+from recommendation_service.core.metrics import (
+    INTERACTION_BUFFER_DEPTH,
+    INTERACTION_BUFFER_REJECTED,
+    INTERACTION_FLUSH_FAILURES,
+    INTERACTION_FLUSH_LATENCY,
+    INTERACTION_FLUSH_ROWS,
+    INTERACTION_ROWS_REJECTED,
+)
+from recommendation_service.infrastructure.database.connection import get_session_factory
+from recommendation_service.services.event_dedup import drop_registered, register_event_ids
+from recommendation_service.services.user_preference import mark_dirty_users
+
+logger = structlog.get_logger()
+
+# Column order of the records produced by interaction_record
+INTERACTION_COLUMNS = (
+    "external_user_id",
+    "external_product_id",
+    "interaction_type",
+    "search_query",
+    "recommendation_context",
+    "recommendation_position",
+    "session_id",
+    "extra_data",
+    "event_id",
+    "created_at",
+)
+EVENT_ID_INDEX = INTERACTION_COLUMNS.index("event_id")
+
+# SQLSTATE classes of errors caused by the written values themselves: data
+# exceptions (22) and integrity constraint violations (23)
+ROW_ERROR_SQLSTATE_CLASSES = ("22", "23")
+
+InteractionRecord = tuple[Any, ...]
+InteractionSink = Callable[[Sequence[InteractionRecord]], Awaitable[Any]]
+
+
+class InteractionBufferFullError(RuntimeError):
+    """Raised when the interaction buffer cannot take more rows."""
+
+
+def is_row_error(error: BaseException | None) -> bool:
+    """Whether a write failed because of the rows' values rather than the database.
+
+    True for Postgres data and integrity errors, however wrapped, and for
+    values the driver could not encode. Connection and server errors are not
+    row errors: retrying the same rows later can succeed.
+    """
+    seen: set[int] = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (ValueError, TypeError)):
+            return True
+        sqlstate = getattr(error, "sqlstate", None)
+        if sqlstate:
+            return str(sqlstate)[:2] in ROW_ERROR_SQLSTATE_CLASSES
+        error = getattr(error, "orig", None) or error.__cause__
+    return False
+
+
+def interaction_record(
+    user_id: str,
+    product_id: str | None,
+    interaction_type: str,
+    search_query: str | None = None,
+    recommendation_context: str | None = None,
+    recommendation_position: int | None = None,
+    session_id: str | None = None,
+    metadata: dict[str, Any] | None = None,
+    event_id: str | None = None,
+    created_at: datetime | None = None,
+) -> InteractionRecord:
+    """Build one ``user_interactions`` row in :data:`INTERACTION_COLUMNS` order.
+
+    ``interaction_type`` is the enum name stored in the database (``"VIEW"``).
+    """
+    return (
+        user_id,
+        product_id,
+        interaction_type,
+        search_query,
+        recommendation_context,
+        recommendation_position,
+        session_id,
+        orjson.dumps(metadata or {}).decode(),
+        event_id,
+        created_at or datetime.now(),  # Use naive datetime for DB
+    )
+
+
+async def copy_interactions(records: Sequence[InteractionRecord]) -> list[InteractionRecord]:
+    """Write a batch of interaction rows with one binary COPY, in its own transaction.
+
+    Returns:
+        The rows actually written (see :func:`write_interactions`)
+    """
+    async with get_session_factory()() as session:
+        written = await write_interactions(session, records)
+        await session.commit()
+    return written
+
+
+async def write_interactions(
+    session: AsyncSession, records: Sequence[InteractionRecord]
+) -> list[InteractionRecord]:
+    """COPY interaction rows in the caller's transaction, without committing.
+
+    Rows whose client event id is already registered are dropped first (see
+    :mod:`~recommendation_service.services.event_dedup`), in the same
+    transaction, so a failed COPY does not leave the ids behind. Users of
+    written product interactions are marked for the next preference rebuild
+    in the same transaction.
+
+    Returns:
+        The rows actually written
+    """
+    event_ids = [r[EVENT_ID_INDEX] for r in records if r[EVENT_ID_INDEX] is not None]
+    if event_ids:
+        new_ids = await register_event_ids(session, event_ids, datetime.now())
+        records = drop_registered(records, EVENT_ID_INDEX, new_ids)
+    if records:
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "user_interactions",
+            schema_name="recommender",
+            columns=INTERACTION_COLUMNS,
+            records=records,
+        )
+        await mark_dirty_users(session, [r[0] for r in records if r[1] is not None])
+    return list(records)
+
+
+class InteractionBuffer:
+    """
+    Bounded buffer of interaction rows drained by one background writer.
+
+    ``add`` / ``add_many`` are synchronous and never touch the database.
+    ``start`` launches the writer on the running event loop; ``stop`` flushes
+    everything still buffered before returning.
+    """
+
+    def __init__(
+        self,
+        max_size: int | None = None,
+        flush_size: int | None = None,
+        flush_interval: float | None = None,
+        sink: InteractionSink | None = None,
+        row_attempts: int | None = None,
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            max_size: Rows held before new interactions are rejected.
+            flush_size: Rows that trigger an immediate flush; also the COPY batch size.
+            flush_interval: Seconds between flushes when fewer rows are waiting.
+            sink: Coroutine that persists a batch (defaults to :func:`copy_interactions`).
+            row_attempts: Attempts at writing a row the database rejects on its own.
+        """
+        settings = get_settings()
+        self.max_size = settings.interaction_buffer_max_size if max_size is None else max_size
+        self.flush_size = (
+            settings.interaction_buffer_flush_size if flush_size is None else flush_size
+        )
+        self.flush_interval = (
+            settings.interaction_buffer_flush_interval_seconds
+            if flush_interval is None
+            else flush_interval
+        )
+        self.sink = sink or copy_interactions
+        self.row_attempts = max(
+            1, settings.interaction_row_write_attempts if row_attempts is None else row_attempts
+        )
+
+        self._rows: deque[InteractionRecord] = deque()
+        self._wakeup: asyncio.Event | None = None
+        self._writer: asyncio.Task | None = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def running(self) -> bool:
+        """Whether the background writer is running."""
+        return self._writer is not None and not self._writer.done()
+
+    def add(self, record: InteractionRecord) -> None:
+        """Buffer one row.
+
+        Raises:
+            InteractionBufferFullError: If the buffer is full
+        """
+        self.add_many((record,))
+
+    def add_many(self, records: Sequence[InteractionRecord]) -> None:
+        """Buffer several rows, all or none.
+
+        Raises:
+            InteractionBufferFullError: If the rows do not all fit
+        """
+        if self._stopping or len(self._rows) + len(records) > self.max_size:
+            INTERACTION_BUFFER_REJECTED.inc(len(records))
+            raise InteractionBufferFullError(
+                f"Interaction buffer is full ({len(self._rows)} rows waiting)"
+            )
+        self._rows.extend(records)
+        INTERACTION_BUFFER_DEPTH.set(len(self._rows))
+        if self._wakeup is not None and len(self._rows) >= self.flush_size:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the background writer on the running event loop."""
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.create_task(self._run(), name="interaction-buffer-writer")
+        logger.info(
+            "Interaction buffer started",
+            max_size=self.max_size,
+            flush_size=self.flush_size,
+            flush_interval=self.flush_interval,
+        )
+
+    async def stop(self, timeout: float | None = None) -> None:
+        """Stop accepting rows and flush what is buffered.
+
+        Args:
+            timeout: Seconds to wait for the final flush before giving up
+        """
+        if not self.running:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            async with asyncio.timeout(timeout):
+                await self._writer
+        except TimeoutError:
+            self._writer.cancel()
+            logger.error("Interaction buffer flush timed out", dropped=len(self._rows))
+        self._writer = None
+        logger.info("Interaction buffer stopped")
+
+    async def flush(self) -> int:
+        """Write everything currently buffered, one COPY per ``flush_size`` rows.
+
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        while self._rows:
+            batch = [self._rows.popleft() for _ in range(min(self.flush_size, len(self._rows)))]
+            start = time.perf_counter()
+            try:
+                batch_written = await self._write_batch(batch)
+            except Exception:
+                INTERACTION_BUFFER_DEPTH.set(len(self._rows))
+                INTERACTION_FLUSH_FAILURES.inc()
+                raise
+            INTERACTION_FLUSH_LATENCY.observe(time.perf_counter() - start)
+            INTERACTION_FLUSH_ROWS.inc(batch_written)
+            INTERACTION_BUFFER_DEPTH.set(len(self._rows))
+            written += batch_written
+        return written
+
+    async def _write_batch(self, batch: list[InteractionRecord]) -> int:
+        """Write one batch, isolating rows the database rejects.
+
+        A batch that fails with a row error (see :func:`is_row_error`) is split
+        in halves until the rejected rows are alone. On any other error the
+        rows not written yet go back to the front of the buffer, in order, and
+        the error propagates.
+
+        Returns:
+            Number of rows written
+        """
+        segments = deque([batch])
+        written = 0
+        while segments:
+            segment = segments.popleft()
+            try:
+                if len(segment) == 1:
+                    written += await self._write_alone(segment[0])
+                else:
+                    await self.sink(segment)
+                    written += len(segment)
+            except Exception as e:
+                if len(segment) > 1 and is_row_error(e):
+                    half = len(segment) // 2
+                    segments.extendleft((segment[half:], segment[:half]))
+                    continue
+                for rows in reversed([segment, *segments]):
+                    self._rows.extendleft(reversed(rows))
+                raise
+        return written
+
+    async def _write_alone(self, record: InteractionRecord) -> int:
+        """Write a single row, dropping it after ``row_attempts`` row errors.
+
+        Returns:
+            1 if the row was written, 0 if it was dropped
+        """
+        for _ in range(self.row_attempts):
+            try:
+                await self.sink([record])
+                return 1
+            except Exception as e:
+                if not is_row_error(e):
+                    raise
+                error = e
+        INTERACTION_ROWS_REJECTED.labels(stage="buffer").inc()
+        logger.error(
+            "Dropping interaction rejected by the database",
+            attempts=self.row_attempts,
+            interaction=dict(zip(INTERACTION_COLUMNS, record, strict=True)),
+            error=str(error),
+        )
+        return 0
+
+    async def _run(self) -> None:
+        """Writer loop: flush on size or interval until stopped and drained."""
+        while True:
+            if len(self._rows) < self.flush_size and not self._stopping:
+                try:
+                    async with asyncio.timeout(self.flush_interval):
+                        await self._wakeup.wait()
+                except TimeoutError:
+                    pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Interaction flush failed", waiting=len(self._rows), error=str(e))
+                if self._stopping:
+                    logger.error("Dropping unflushed interactions", dropped=len(self._rows))
+                    return
+                await asyncio.sleep(self.flush_interval)
+                continue
+
+            if self._stopping:
+                return
+
+
+# Global buffer, created on first use
+_interaction_buffer: InteractionBuffer | None = None
+
+
+def get_interaction_buffer() -> InteractionBuffer:
+    """Get or create the global interaction buffer."""
+    global _interaction_buffer
+    if _interaction_buffer is None:
+        _interaction_buffer = InteractionBuffer()
+    return _interaction_buffer
+
+
+async def shutdown_interaction_buffer() -> None:
+    """Flush and stop the global interaction buffer, if one was created."""
+    global _interaction_buffer
+    if _interaction_buffer is not None:
+        await _interaction_buffer.stop(get_settings().interaction_buffer_shutdown_timeout_seconds)
+        _interaction_buffer = None
@@ -0,0 +1,170 @@
+"""Streaming bulk upload of interactions as newline-delimited JSON.
+
+The request body is read incrementally (optionally gzip-decompressed), split
+into lines and parsed with orjson. Lines are validated a chunk at a time with
+one pydantic ``TypeAdapter`` call and every valid chunk is written with a
+single COPY, so memory stays bounded by the chunk size however large the
+upload is. Bad lines are reported by line number and skipped, including lines
+that pass validation but are rejected by the database: a chunk that fails
+that way is split until the offending lines are isolated.
+"""
+
+import zlib
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+import orjson
+import structlog
+from pydantic import TypeAdapter, ValidationError
+
+from recommendation_service.services.interaction_buffer import (
+    InteractionRecord,
+    copy_interactions,
+    is_row_error,
+)
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class BulkIngestResult:
+    """Outcome of one bulk upload."""
+
+    lines: int = 0
+    recorded: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], gzipped: bool = False) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines, decompressing gzip on the fly."""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    pending = b""
+    async for chunk in chunks:
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if decompressor is not None:
+        pending += decompressor.flush()
+    if pending:
+        yield pending
+
+
+class BulkInteractionLoader:
+    """
+    Validates NDJSON interaction lines in chunks and writes them with COPY.
+
+    ``parse`` turns a validated line into a row, or returns an error message
+    for lines that are well-formed but not recordable.
+    """
+
+    def __init__(
+        self,
+        adapter: TypeAdapter,
+        parse: Callable[[Any], InteractionRecord | str],
+        chunk_size: int,
+        max_errors: int,
+        writer: Callable[[Sequence[InteractionRecord]], Awaitable[list[InteractionRecord]]]
+        | None = None,
+    ):
+        self.adapter = adapter
+        self.parse = parse
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.writer = writer or copy_interactions
+        self.result = BulkIngestResult()
+
+    async def load(self, lines: AsyncIterator[bytes]) -> BulkIngestResult:
+        """Consume every line, writing valid rows one chunk at a time."""
+        line_numbers: list[int] = []
+        objects: list[Any] = []
+        async for line in lines:
+            self.result.lines += 1
+            if not line.strip():
+                continue
+            try:
+                objects.append(orjson.loads(line))
+            except orjson.JSONDecodeError as e:
+                self._fail(self.result.lines, f"invalid JSON: {e}")
+                continue
+            line_numbers.append(self.result.lines)
+            if len(objects) >= self.chunk_size:
+                await self._flush(line_numbers, objects)
+                line_numbers, objects = [], []
+
+        if objects:
+            await self._flush(line_numbers, objects)
+        return self.result
+
+    async def _flush(self, line_numbers: list[int], objects: list[Any]) -> None:
+        """Validate one chunk in a single adapter call and write its valid rows."""
+        try:
+            models = self.adapter.validate_python(objects)
+        except ValidationError as e:
+            invalid: dict[int, str] = {}
+            for error in e.errors(include_url=False):
+                index = error["loc"][0]
+                location = ".".join(str(part) for part in error["loc"][1:])
+                invalid.setdefault(index, f"{location}: {error['msg']}" if location else error["msg"])
+            for index, message in invalid.items():
+                self._fail(line_numbers[index], message)
+            keep = [i for i in range(len(objects)) if i not in invalid]
+            line_numbers = [line_numbers[i] for i in keep]
+            models = self.adapter.validate_python([objects[i] for i in keep])
+
+        rows: list[tuple[int, InteractionRecord]] = []
+        for line_number, model in zip(line_numbers, models, strict=True):
+            parsed = self.parse(model)
+            if isinstance(parsed, str):
+                self._fail(line_number, parsed)
+            else:
+                rows.append((line_number, parsed))
+
+        if rows:
+            await self._write(rows)
+
+    async def _write(self, rows: list[tuple[int, InteractionRecord]]) -> None:
+        """
+        Write numbered rows, isolating the lines the database rejects.
+
+        A chunk that fails with a row error (see
+        :func:`~recommendation_service.services.interaction_buffer.is_row_error`)
+        is split in halves until each rejected line is alone; those lines are
+        reported as failed. Other errors propagate.
+        """
+        segments = deque([rows])
+        while segments:
+            segment = segments.popleft()
+            records = [record for _, record in segment]
+            try:
+                written = await self.writer(records)
+            except Exception as e:
+                if not is_row_error(e):
+                    raise
+                if len(segment) == 1:
+                    self._fail(segment[0][0], f"rejected by the database: {e}")
+                    continue
+                half = len(segment) // 2
+                segments.extendleft((segment[half:], segment[:half]))
+                continue
+            self.result.recorded += len(written)
+            self.result.duplicates += len(records) - len(written)
+
+    def _fail(self, line_number: int, message: str) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < self.max_errors:
+            self.result.errors.append({"line": line_number, "error": message})
+
+
+def naive_timestamp(value: datetime | None) -> datetime | None:
+    """Convert an aware timestamp to the naive local time stored in the database."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
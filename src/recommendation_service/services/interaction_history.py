@@ -0,0 +1,128 @@
+"""Keyset-paginated interaction history, streamed as JSON.
+
+Pages are ordered newest first by ``(created_at, id)`` and continue from an
+opaque cursor that encodes the last row of the previous page, so every page
+is one index range scan of ``limit + 1`` rows no matter how deep it is.
+Unfiltered pages scan ``ix_user_interactions_user_created_id`` and type-filtered
+pages ``ix_user_interactions_user_type_created``; either way the page's rows are
+then read from the table.
+"""
+
+import base64
+import binascii
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+import orjson
+from sqlalchemy import text
+
+from recommendation_service.infrastructure.database.connection import get_session_factory
+
+# Rows serialised per chunk written to the response
+STREAM_CHUNK_ROWS = 100
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(created_at: datetime, interaction_id: int) -> str:
+    """Opaque cursor pointing just past ``(created_at, id)``."""
+    payload = orjson.dumps([created_at, interaction_id])
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of :func:`encode_cursor`.
+
+    Raises:
+        InvalidCursorError: If the cursor was not produced by :func:`encode_cursor`
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, interaction_id = orjson.loads(payload)
+        return datetime.fromisoformat(created_at), int(interaction_id)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+
+def _history_query(interaction_type: str | None, after: tuple[datetime, int] | None):
+    filters = ["external_user_id = :user_id"]
+    if interaction_type:
+        filters.append("interaction_type = :interaction_type")
+    if after:
+        # Equivalent to (created_at, id) < (:created_at, :id), written so the
+        # created_at bound is an index condition on both indexes
+        filters.append("created_at <= :created_at AND (created_at < :created_at OR id < :id)")
+    return text(f"""
+        SELECT id, external_product_id, interaction_type, search_query,
+               recommendation_context, recommendation_position, session_id,
+               event_id, created_at
+        FROM recommender.user_interactions
+        WHERE {" AND ".join(filters)}
+        ORDER BY created_at DESC, id DESC
+        LIMIT :fetch
+    """)
+
+
+async def stream_history(
+    user_id: str,
+    limit: int,
+    interaction_type: str | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Stream one page of a user's interactions as a JSON document.
+
+    Rows are serialised while they are read from a server-side cursor; the
+    ``next_cursor`` (null on the last page) closes the document.
+
+    Args:
+        user_id: The user's ID
+        limit: Page size
+        interaction_type: Stored interaction type to filter on (e.g. ``VIEW``)
+        after: Decoded cursor of the previous page
+
+    Yields:
+        Chunks of the JSON response body
+    """
+    params = {"user_id": user_id, "fetch": limit + 1}
+    if interaction_type:
+        params["interaction_type"] = interaction_type
+    if after:
+        params["created_at"], params["id"] = after
+
+    header = orjson.dumps({"user_id": user_id, "limit": limit})
+    parts = [header[:-1], b',"interactions":[']
+    count, last, next_cursor = 0, None, None
+
+    async with get_session_factory()() as session:
+        result = await session.stream(_history_query(interaction_type, after), params)
+        async for row in result:
+            if count == limit:
+                next_cursor = encode_cursor(last.created_at, last.id)
+                break
+            if count:
+                parts.append(b",")
+            parts.append(
+                orjson.dumps(
+                    {
+                        "interaction_id": row.id,
+                        "product_id": row.external_product_id,
+                        "interaction_type": str(row.interaction_type).lower(),
+                        "search_query": row.search_query,
+                        "recommendation_context": row.recommendation_context,
+                        "recommendation_position": row.recommendation_position,
+                        "session_id": row.session_id,
+                        "event_id": row.event_id,
+                        "created_at": row.created_at,
+                    }
+                )
+            )
+            count, last = count + 1, row
+            if len(parts) >= 2 * STREAM_CHUNK_ROWS:
+                yield b"".join(parts)
+                parts = []
+
+    parts.append(b'],"next_cursor":' + orjson.dumps(next_cursor) + b"}")
+    yield b"".join(parts)
@@ -0,0 +1,224 @@
+"""Monthly partition maintenance for ``recommender.user_interactions``.
+
+The table is range-partitioned by month on ``created_at`` (one partition named
+``user_interactions_pYYYYMM`` per month plus a default partition). This service
+keeps partitions created ahead of time, rolls months past the raw retention
+window into ``user_interaction_daily`` counts before dropping them, and prunes
+daily counts past their own retention.
+"""
+
+import re
+from datetime import date, datetime
+from typing import Any
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from recommendation_service.config import get_settings
+
+logger = structlog.get_logger()
+
+PARTITION_PREFIX = "user_interactions_p"
+DEFAULT_PARTITION = "user_interactions_default"
+_PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month ``months`` after ``month`` (negative goes back)."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding ``month``."""
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def partition_month(name: str) -> date | None:
+    """Month held by a partition, or None for names outside the scheme."""
+    match = _PARTITION_NAME.match(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def plan_partitions(
+    existing: list[date], today: date, premake_months: int, retention_months: int
+) -> tuple[list[date], list[date]]:
+    """
+    Work out which monthly partitions to create and which to expire.
+
+    Args:
+        existing: Months that already have a partition
+        today: Current date
+        premake_months: Months ahead of the current one to keep created
+        retention_months: Months of raw interactions to keep, counting the current one
+
+    Returns:
+        Months to create and months to roll up and drop, both oldest first
+    """
+    current = today.replace(day=1)
+    wanted = [add_months(current, i) for i in range(premake_months + 1)]
+    cutoff = add_months(current, -(retention_months - 1))
+    missing = [month for month in wanted if month not in existing]
+    expired = sorted(month for month in existing if month < cutoff)
+    return missing, expired
+
+
+class InteractionPartitionService:
+    """Creates, rolls up and drops monthly interaction partitions."""
+
+    def __init__(self, session: AsyncSession):
+        """Initialize with database session."""
+        self.session = session
+        settings = get_settings()
+        self.premake_months = settings.interaction_partition_premake_months
+        self.retention_months = settings.interaction_raw_retention_months
+        self.daily_retention_months = settings.interaction_daily_retention_months
+
+    async def maintain(self, today: date | None = None) -> dict[str, Any]:
+        """
+        Run one maintenance pass.
+
+        Each step commits on its own, so a failure part-way keeps the work done
+        so far and the next run picks up where this one stopped.
+
+        Returns:
+            Summary of the pass
+        """
+        today = today or datetime.now().date()
+        existing = await self.list_partitions()
+        missing, expired = plan_partitions(
+            existing, today, self.premake_months, self.retention_months
+        )
+
+        for month in missing:
+            await self.create_partition(month)
+
+        rolled_up = 0
+        for month in expired:
+            rolled_up += await self.rollup_partition(month)
+
+        cutoff = add_months(today.replace(day=1), -(self.retention_months - 1))
+        rolled_up += await self.rollup_default_partition(cutoff)
+        pruned = await self.prune_daily_counts(
+            add_months(today.replace(day=1), -self.daily_retention_months)
+        )
+
+        summary = {
+            "created": [partition_name(m) for m in missing],
+            "dropped": [partition_name(m) for m in expired],
+            "daily_rows_written": rolled_up,
+            "daily_rows_pruned": pruned,
+        }
+        logger.info("Interaction partitions maintained", **summary)
+        return summary
+
+    async def list_partitions(self) -> list[date]:
+        """Months that currently have a partition."""
+        result = await self.session.execute(
+            text("""
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'recommender.user_interactions'::regclass
+            """)
+        )
+        months = (partition_month(row.relname) for row in result.fetchall())
+        return sorted(month for month in months if month is not None)
+
+    async def create_partition(self, month: date) -> None:
+        """
+        Create the partition for ``month``.
+
+        Rows that already landed in the default partition for that month are
+        moved into the new table before it is attached, since attaching a range
+        the default partition still holds rows for would fail.
+        """
+        name = partition_name(month)
+        params = {"start": month, "end": add_months(month, 1)}
+        await self.session.execute(
+            text(f"""
+                CREATE TABLE recommender.{name}
+                (LIKE recommender.user_interactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+            """)
+        )
+        await self.session.execute(
+            text(f"""
+                WITH moved AS (
+                    DELETE FROM recommender.{DEFAULT_PARTITION}
+                    WHERE created_at >= :start AND created_at < :end
+                    RETURNING *
+                )
+                INSERT INTO recommender.{name} SELECT * FROM moved
+            """),
+            params,
+        )
+        await self.session.execute(
+            text(f"""
+                ALTER TABLE recommender.user_interactions
+                ATTACH PARTITION recommender.{name}
+                FOR VALUES FROM ('{params["start"]}') TO ('{params["end"]}')
+            """)
+        )
+        await self.session.commit()
+        logger.info("Created interaction partition", partition=name)
+
+    async def rollup_partition(self, month: date) -> int:
+        """Roll one month into daily counts and drop its partition, atomically.
+
+        Returns:
+            Daily count rows written
+        """
+        name = partition_name(month)
+        result = await self.session.execute(
+            text(f"""
+                INSERT INTO recommender.user_interaction_daily
+                (day, external_user_id, external_product_id, interaction_type, interaction_count)
+                SELECT created_at::date, external_user_id, external_product_id,
+                       interaction_type, COUNT(*)
+                FROM recommender.{name}
+                GROUP BY 1, 2, 3, 4
+            """)
+        )
+        await self.session.execute(text(f"DROP TABLE recommender.{name}"))
+        await self.session.commit()
+        logger.info("Rolled up interaction partition", partition=name, rows=result.rowcount)
+        return result.rowcount
+
+    async def rollup_default_partition(self, cutoff: date) -> int:
+        """Roll up and delete default-partition rows older than ``cutoff``.
+
+        Returns:
+            Daily count rows written
+        """
+        result = await self.session.execute(
+            text(f"""
+                WITH expired AS (
+                    DELETE FROM recommender.{DEFAULT_PARTITION}
+                    WHERE created_at < :cutoff
+                    RETURNING created_at, external_user_id, external_product_id, interaction_type
+                )
+                INSERT INTO recommender.user_interaction_daily
+                (day, external_user_id, external_product_id, interaction_type, interaction_count)
+                SELECT created_at::date, external_user_id, external_product_id,
+                       interaction_type, COUNT(*)
+                FROM expired
+                GROUP BY 1, 2, 3, 4
+            """),
+            {"cutoff": cutoff},
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def prune_daily_counts(self, cutoff: date) -> int:
+        """Delete daily counts older than ``cutoff``.
+
+        Returns:
+            Rows deleted
+        """
+        result = await self.session.execute(
+            text("DELETE FROM recommender.user_interaction_daily WHERE day < :cutoff"),
+            {"cutoff": cutoff},
+        )
+        await self.session.commit()
+        return result.rowcount
@@ -0,0 +1,119 @@
+"""Durable interaction ingestion through a Redis stream.
+
+With ``INTERACTION_INGEST_MODE=stream`` the tracking API ``XADD``s each
+interaction to a capped Redis stream instead of buffering it in-process, so
+events survive API restarts and slow database periods. ``interaction_worker``
+processes read the stream in a consumer group, write batches with COPY, apply
+the incremental preference and popularity updates and only then ``XACK``.
+
+Entries are one field, ``e``, holding the :data:`INTERACTION_COLUMNS` row as a
+compact orjson array.
+"""
+
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+import orjson
+import structlog
+from sqlalchemy import text
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.database.connection import get_db_session
+from recommendation_service.infrastructure.redis.client import get_redis
+from recommendation_service.services.interaction_buffer import (
+    EVENT_ID_INDEX,
+    INTERACTION_COLUMNS,
+    InteractionRecord,
+)
+from recommendation_service.services.user_preference import UserPreferenceService
+
+logger = structlog.get_logger()
+
+ENTRY_FIELD = b"e"
+
+
+def encode_interaction(record: InteractionRecord) -> bytes:
+    """Serialise a row for the stream (naive datetimes become ISO strings)."""
+    return orjson.dumps(record)
+
+
+def decode_interaction(data: bytes) -> InteractionRecord:
+    """Inverse of :func:`encode_interaction`."""
+    values = orjson.loads(data)
+    values[-1] = datetime.fromisoformat(values[-1])
+    if len(values) == len(INTERACTION_COLUMNS) - 1:
+        # Entry written before event ids existed
+        values.insert(EVENT_ID_INDEX, None)
+    return tuple(values)
+
+
+async def publish_interactions(records: Sequence[InteractionRecord]) -> None:
+    """Append rows to the interaction stream in one round trip.
+
+    The stream is trimmed approximately to ``INTERACTION_STREAM_MAXLEN`` entries.
+    """
+    settings = get_settings()
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for record in records:
+            pipe.xadd(
+                settings.interaction_stream_key,
+                {ENTRY_FIELD: encode_interaction(record)},
+                maxlen=settings.interaction_stream_maxlen,
+                approximate=True,
+            )
+        await pipe.execute()
+
+
+def popularity_deltas(records: Sequence[InteractionRecord]) -> dict[str, float]:
+    """Sum interaction weights per product, the increment to its popularity score."""
+    deltas: dict[str, float] = {}
+    for record in records:
+        product_id, interaction_type = record[1], record[2]
+        weight = UserPreferenceService.INTERACTION_WEIGHTS.get(interaction_type)
+        if product_id and weight:
+            deltas[product_id] = deltas.get(product_id, 0.0) + weight
+    return deltas
+
+
+async def apply_incremental_updates(records: Sequence[InteractionRecord]) -> dict[str, Any]:
+    """
+    Apply the online side effects of a committed batch of interactions.
+
+    Popularity scores get one set-based increment for the whole batch;
+    preference vectors are folded one interaction at a time unless
+    ``PREFERENCE_ONLINE_UPDATES=off``.
+
+    Args:
+        records: Rows already written to ``user_interactions``
+
+    Returns:
+        Summary of the updates
+    """
+    deltas = popularity_deltas(records)
+    preferences_updated = 0
+
+    async with get_db_session() as session:
+        if deltas:
+            await session.execute(
+                text("""
+                    UPDATE recommender.product_embeddings p
+                    SET popularity_score = p.popularity_score + d.delta
+                    FROM unnest(CAST(:product_ids AS text[]), CAST(:deltas AS float8[]))
+                        AS d(product_id, delta)
+                    WHERE p.external_product_id = d.product_id
+                """),
+                {"product_ids": list(deltas), "deltas": list(deltas.values())},
+            )
+            await session.commit()
+
+        if get_settings().preference_online_updates != "off":
+            service = UserPreferenceService(session)
+            for user_id, product_id, interaction_type, *_, created_at in records:
+                if product_id and interaction_type in service.INTERACTION_WEIGHTS:
+                    result = await service.apply_interaction(
+                        user_id, product_id, interaction_type, created_at
+                    )
+                    preferences_updated += result["applied"]
+
+    return {"products_updated": len(deltas), "preferences_updated": preferences_updated}
@@ -0,0 +1,312 @@
+"""Order synchronization service.
+
+Turns orders in the e-commerce ``public`` schema into ``PURCHASE``
+interactions and keeps ``recommender.product_copurchase_counts`` up to date.
+
+Orders are read in pages in keyset order of ``("createdAt", id)`` after a
+watermark kept in ``recommender.sync_status`` (id ``orders``). Each page's
+order lines are written with one COPY, and the co-purchase counts of its
+orders are added with one set-based upsert. Both happen in the same
+transaction as the watermark, so a crashed run resumes after its last page.
+The first run backfills the whole order history.
+
+Every order line and every order gets a deterministic event id (see
+:func:`order_event_id` and :func:`order_copurchase_key`), registered in the
+same transaction. Lines and orders re-read in the overlap window before the
+watermark are dropped as duplicates and never counted twice; guest orders
+count towards co-purchases even though they record no interactions.
+
+Writing the ``PURCHASE`` rows marks their users dirty (see
+:func:`~recommendation_service.services.interaction_buffer.write_interactions`),
+so the next preference rebuild includes them whatever the orders'
+``createdAt``.
+"""
+
+import hashlib
+from collections import Counter
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from itertools import permutations
+from typing import Any
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from recommendation_service.config import get_settings
+from recommendation_service.services.event_dedup import register_event_ids
+from recommendation_service.services.interaction_buffer import (
+    InteractionRecord,
+    interaction_record,
+    write_interactions,
+)
+from recommendation_service.services.product_sync import (
+    Watermark,
+    encode_watermark,
+    parse_watermark,
+)
+
+logger = structlog.get_logger()
+
+# Distinct products per order that take part in co-purchase counting; larger
+# (bulk or wholesale) orders would add quadratically many weak pairs
+MAX_COPURCHASE_ITEMS = 50
+
+
+def order_event_id(order_id: str, product_id: str) -> str:
+    """Deterministic event id of one order line (fits the 64-character column)."""
+    digest = hashlib.blake2b(f"{order_id}:{product_id}".encode(), digest_size=16)
+    return f"order:{digest.hexdigest()}"
+
+
+def order_copurchase_key(order_id: str) -> str:
+    """Event id marking an order's co-purchases as counted (fits the 64-character column).
+
+    MD5 so that migrations can compute the same key in SQL.
+    """
+    return f"copurchase:{hashlib.md5(order_id.encode(), usedforsecurity=False).hexdigest()}"
+
+
+def copurchase_pairs(orders: dict[str, Sequence[str]]) -> Counter[tuple[str, str]]:
+    """
+    Count ordered product pairs over orders.
+
+    Each pair of distinct products in an order counts once, in both
+    directions. Orders with more than :data:`MAX_COPURCHASE_ITEMS` distinct
+    products are skipped.
+
+    Args:
+        orders: Product ids per order
+
+    Returns:
+        Number of orders per ``(product_id, co_product_id)``
+    """
+    pairs: Counter[tuple[str, str]] = Counter()
+    for product_ids in orders.values():
+        distinct = sorted(set(product_ids))
+        if len(distinct) <= MAX_COPURCHASE_ITEMS:
+            pairs.update(permutations(distinct, 2))
+    return pairs
+
+
+class OrderSyncService:
+    """Service for synchronizing orders from e-commerce to recommender."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_ecommerce_orders(
+        self, limit: int = 500, after: Watermark | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Fetch orders created after ``after`` with their lines.
+
+        Orders come in ``("createdAt", id)`` order; lines of the same product
+        are merged and their quantities summed.
+        """
+        query = text(f"""
+            SELECT o.id, o."userId" AS user_id, o."createdAt" AS created_at,
+                   oi."productId" AS product_id, SUM(oi.quantity) AS quantity
+            FROM (
+                SELECT id, "userId", "createdAt"
+                FROM public.orders
+                {'WHERE ("createdAt", id) > (:created_at, :order_id)' if after else ""}
+                ORDER BY "createdAt", id
+                LIMIT :limit
+            ) o
+            LEFT JOIN public.order_items oi ON oi."orderId" = o.id
+            GROUP BY o.id, o."userId", o."createdAt", oi."productId"
+            ORDER BY o."createdAt", o.id
+        """)
+        params: dict[str, Any] = {"limit": limit}
+        if after:
+            params["created_at"], params["order_id"] = after
+        result = await self.session.execute(query, params)
+
+        orders: dict[str, dict[str, Any]] = {}
+        for row in result.fetchall():
+            order = orders.setdefault(
+                row.id,
+                {"id": row.id, "user_id": row.user_id, "created_at": row.created_at, "items": []},
+            )
+            if row.product_id is not None:
+                order["items"].append((str(row.product_id), int(row.quantity or 1)))
+        return list(orders.values())
+
+    def purchase_records(self, orders: Sequence[dict[str, Any]]) -> list[InteractionRecord]:
+        """Build one ``PURCHASE`` interaction per line of orders placed by a known user."""
+        return [
+            interaction_record(
+                str(order["user_id"]),
+                product_id,
+                "PURCHASE",
+                metadata={"order_id": str(order["id"]), "quantity": quantity},
+                event_id=order_event_id(str(order["id"]), product_id),
+                created_at=order["created_at"],
+            )
+            for order in orders
+            if order["user_id"] is not None
+            for product_id, quantity in order["items"]
+        ]
+
+    async def uncounted_orders(self, orders: Sequence[dict[str, Any]]) -> dict[str, list[str]]:
+        """
+        Register the orders' co-purchase keys and return the products of those not counted yet.
+
+        Runs in the caller's transaction, so the keys roll back with a failed page.
+        """
+        keys = {order_copurchase_key(str(order["id"])): order for order in orders}
+        new_keys = await register_event_ids(self.session, list(keys), datetime.now())
+        return {
+            str(keys[key]["id"]): [product_id for product_id, _ in keys[key]["items"]]
+            for key in new_keys
+        }
+
+    async def add_copurchase_counts(self, pairs: Counter[tuple[str, str]]) -> int:
+        """Add pair counts to ``product_copurchase_counts`` with one upsert. Does not commit."""
+        if not pairs:
+            return 0
+        await self.session.execute(
+            text("""
+                INSERT INTO recommender.product_copurchase_counts
+                (product_id, co_product_id, order_count, updated_at)
+                SELECT p.product_id, p.co_product_id, p.order_count, :now
+                FROM unnest(
+                    CAST(:product_ids AS text[]),
+                    CAST(:co_product_ids AS text[]),
+                    CAST(:order_counts AS integer[])
+                ) AS p(product_id, co_product_id, order_count)
+                ON CONFLICT (product_id, co_product_id) DO UPDATE SET
+                    order_count = product_copurchase_counts.order_count + EXCLUDED.order_count,
+                    updated_at = EXCLUDED.updated_at
+            """),
+            {
+                "product_ids": [product_id for product_id, _ in pairs],
+                "co_product_ids": [co_product_id for _, co_product_id in pairs],
+                "order_counts": list(pairs.values()),
+                "now": datetime.now(),  # Use naive datetime for DB
+            },
+        )
+        return len(pairs)
+
+    async def sync_orders(self, batch_size: int | None = None) -> dict[str, int]:
+        """
+        Sync orders created since the last run.
+
+        For each page of orders, ``PURCHASE`` interactions are written for the
+        lines of orders with a user, the co-purchase counts of orders not
+        counted before (guest orders included) are incremented, and the
+        watermark is advanced, all in one transaction. A run starts ``ORDER_SYNC_OVERLAP_SECONDS`` before the
+        stored watermark so orders committed late are not missed.
+
+        Args:
+            batch_size: Orders per page (defaults to ``ORDER_SYNC_BATCH_SIZE``)
+
+        Returns:
+            Summary of sync operation
+        """
+        settings = get_settings()
+        batch_size = batch_size or settings.order_sync_batch_size
+        watermark = await self._load_watermark()
+        after = (
+            (watermark[0] - timedelta(seconds=settings.order_sync_overlap_seconds), "")
+            if watermark
+            else None
+        )
+
+        await self._update_sync_status("running")
+        logger.info("Starting order sync", since=watermark[0].isoformat() if watermark else None)
+
+        synced = 0
+        interactions = 0
+        pairs_updated = 0
+        skipped = 0
+
+        try:
+            while True:
+                orders = await self.get_ecommerce_orders(limit=batch_size, after=after)
+                if not orders:
+                    break
+
+                records = self.purchase_records(orders)
+                written = await write_interactions(self.session, records)
+                pairs_updated += await self.add_copurchase_counts(
+                    copurchase_pairs(await self.uncounted_orders(orders))
+                )
+
+                synced += len(orders)
+                interactions += len(written)
+                skipped += sum(1 for order in orders if order["user_id"] is None)
+
+                after = (orders[-1]["created_at"], str(orders[-1]["id"]))
+                # Commits the page together with its watermark
+                await self._update_sync_status(
+                    "running", records_synced=synced, cursor=encode_watermark(*after)
+                )
+                logger.info("Order batch synced", synced=synced, watermark=after[0].isoformat())
+
+                if len(orders) < batch_size:
+                    break
+        except Exception as e:
+            logger.error("Error in order sync", synced=synced, error=str(e))
+            await self.session.rollback()
+            await self._update_sync_status("error", records_synced=synced, error_message=str(e))
+            raise
+
+        await self._update_sync_status("idle", records_synced=synced)
+
+        summary = {
+            "orders_synced": synced,
+            "interactions_created": interactions,
+            "pairs_updated": pairs_updated,
+            "orders_skipped": skipped,
+        }
+        logger.info("Order sync completed", **summary)
+        return summary
+
+    async def _load_watermark(self) -> Watermark | None:
+        """Return the ``("createdAt", id)`` position reached by earlier runs."""
+        result = await self.session.execute(
+            text("SELECT last_sync_cursor FROM recommender.sync_status WHERE id = 'orders'")
+        )
+        return parse_watermark(result.scalar())
+
+    async def _update_sync_status(
+        self,
+        status: str,
+        records_synced: int = 0,
+        cursor: str | None = None,
+        error_message: str | None = None,
+    ) -> None:
+        """Update the ``orders`` sync status record and commit."""
+        now = datetime.now()  # Use naive datetime for DB
+        await self.session.execute(
+            text("""
+                INSERT INTO recommender.sync_status
+                (id, status, records_synced, last_sync_cursor, last_sync_at, updated_at, error_message)
+                VALUES ('orders', :status, :records_synced, :cursor, :last_sync_at, :updated_at,
+                        :error_message)
+                ON CONFLICT (id) DO UPDATE SET
+                    status = :status,
+                    records_synced = CASE
+                        WHEN :records_synced > 0 THEN :records_synced
+                        ELSE recommender.sync_status.records_synced
+                    END,
+                    last_sync_cursor = COALESCE(:cursor, recommender.sync_status.last_sync_cursor),
+                    last_sync_at = CASE
+                        WHEN :status = 'idle' THEN :last_sync_at
+                        ELSE recommender.sync_status.last_sync_at
+                    END,
+                    updated_at = :updated_at,
+                    error_message = :error_message
+            """),
+            {
+                "status": status,
+                "records_synced": records_synced,
+                "cursor": cursor,
+                "last_sync_at": now if status == "idle" else None,
+                "updated_at": now,
+                "error_message": error_message,
+            },
+        )
+        await self.session.commit()
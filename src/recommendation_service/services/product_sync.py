@@ -1,228 +1,487 @@
 """Product synchronization service.
 
 Syncs products from the e-commerce public schema to the recommender schema.
+
+Sync is incremental: products are read in keyset order of
+``("updatedAt", id)`` starting after a watermark kept in
+``recommender.sync_status.last_sync_cursor``. The watermark is saved in the
+same transaction as each batch, so a routine run only reads products changed
+since the previous one and a crashed run resumes after its last batch.
+
+A content fingerprint over the embedding text detects which products actually
+need re-embedding; other changes (stock, price within its bracket, active
+flag) are pushed straight to the API catalog caches.
+
+Between scheduled runs, products reported changed by the
+``public.products`` NOTIFY trigger are synced by id within seconds
+(see :meth:`ProductSyncService.sync_products_by_id`).
 """
 
-from datetime import datetime, timezone
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
 from typing import Any
 
 import structlog
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from recommendation_service.infrastructure.database.models import (
-    ProductEmbedding,
-    SyncStatus,
-)
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.database.models import SyncStatus
+from recommendation_service.infrastructure.http.ecommerce import EcommerceClient
+from recommendation_service.services.catalog_updates import ProductUpdate, publish_catalog_updates
+from recommendation_service.services.embedding import EmbeddingService
+from recommendation_service.services.interaction_buffer import is_row_error
 
 logger = structlog.get_logger()
 
+Watermark = tuple[datetime, str]
+
+
+def product_from_api(item: dict[str, Any]) -> dict[str, Any]:
+    """Map an e-commerce API product to the row shape of :meth:`ProductSyncService.get_ecommerce_products`.
+
+    ``updatedAt`` is converted to naive UTC, like the ``public`` schema column.
+    """
+    updated_at = datetime.fromisoformat(item["updatedAt"].replace("Z", "+00:00"))
+    if updated_at.tzinfo is not None:
+        updated_at = updated_at.astimezone(UTC).replace(tzinfo=None)
+    category = item.get("category")
+    return {
+        "id": str(item["id"]),
+        "name": item.get("name"),
+        "description": item.get("description"),
+        "price_cents": item.get("priceCents") or 0,
+        "stock": item.get("stock") or 0,
+        "is_active": item.get("isActive", True),
+        "updated_at": updated_at,
+        "category_name": category.get("name") if isinstance(category, dict) else category,
+    }
+
+
+@dataclass
+class ProductUpsertResult:
+    """Outcome of one :meth:`ProductSyncService.upsert_products` batch."""
+
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # Active products without a current embedding (new, or content changed)
+    stale_ids: list[str] = field(default_factory=list)
+    # (id, stock, price_cents, is_active) of updated rows, for the catalog caches
+    cache_updates: list[ProductUpdate] = field(default_factory=list)
+
+
+def encode_watermark(updated_at: datetime, product_id: str) -> str:
+    """Serialise a ``("updatedAt", id)`` position for ``last_sync_cursor``."""
+    return f"{updated_at.isoformat()}|{product_id}"
+
+
+def parse_watermark(value: str | None) -> Watermark | None:
+    """Inverse of :func:`encode_watermark`; None for a missing or legacy cursor."""
+    if not value or "|" not in value:
+        return None
+    updated_at, product_id = value.split("|", 1)
+    try:
+        return datetime.fromisoformat(updated_at), product_id
+    except ValueError:
+        return None
+
+
+_PRODUCT_SELECT = """
+    SELECT
+        p.id,
+        p.name,
+        p.description,
+        p."priceCents" as price_cents,
+        p.stock,
+        p."isActive" as is_active,
+        p."updatedAt" as updated_at,
+        c.name as category_name
+    FROM public.products p
+    LEFT JOIN public.categories c ON p."categoryId" = c.id
+"""
+
+
+def _product_row(row: Any) -> dict[str, Any]:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "description": row.description,
+        "price_cents": row.price_cents,
+        "stock": row.stock,
+        "is_active": row.is_active,
+        "updated_at": row.updated_at,
+        "category_name": row.category_name,
+    }
+
 
 class ProductSyncService:
     """Service for synchronizing products from e-commerce to recommender."""
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, embedding_service: EmbeddingService | None = None):
         self.session = session
+        self.embedding_service = embedding_service or EmbeddingService()
 
     async def get_ecommerce_products(
-        self, limit: int = 1000, offset: int = 0
+        self, limit: int = 1000, after: Watermark | None = None
     ) -> list[dict[str, Any]]:
-        """Fetch products from the e-commerce public schema."""
-        query = text("""
-            SELECT
-                p.id,
-                p.name,
-                p.description,
-                p."priceCents" as price_cents,
-                p.stock,
-                p."isActive" as is_active,
-                c.name as category_name
-            FROM public.products p
-            LEFT JOIN public.categories c ON p."categoryId" = c.id
-            ORDER BY p."createdAt" DESC
-            LIMIT :limit OFFSET :offset
+        """Fetch products changed after ``after``, in ``("updatedAt", id)`` order."""
+        query = text(f"""
+            {_PRODUCT_SELECT}
+            {'WHERE (p."updatedAt", p.id) > (:updated_at, :product_id)' if after else ""}
+            ORDER BY p."updatedAt", p.id
+            LIMIT :limit
         """)
-        result = await self.session.execute(query, {"limit": limit, "offset": offset})
-        rows = result.fetchall()
-        return [
-            {
-                "id": row.id,
-                "name": row.name,
-                "description": row.description,
-                "price_cents": row.price_cents,
-                "stock": row.stock,
-                "is_active": row.is_active,
-                "category_name": row.category_name,
-            }
-            for row in rows
-        ]
-
-    async def get_ecommerce_product_count(self) -> int:
-        """Get total count of products in e-commerce schema."""
-        query = text("SELECT COUNT(*) FROM public.products")
-        result = await self.session.execute(query)
-        return result.scalar() or 0
-
-    async def upsert_product_embedding(
-        self, product: dict[str, Any], embedding: list[float] | None = None
-    ) -> ProductEmbedding:
-        """Upsert a product to the product_embeddings table."""
-        # Check if product already exists
+        params: dict[str, Any] = {"limit": limit}
+        if after:
+            params["updated_at"], params["product_id"] = after
+        result = await self.session.execute(query, params)
+        return [_product_row(row) for row in result.fetchall()]
+
+    async def get_ecommerce_products_by_id(self, product_ids: list[str]) -> list[dict[str, Any]]:
+        """Fetch the given products; ids that no longer exist are left out."""
+        query = text(f"""
+            {_PRODUCT_SELECT}
+            WHERE p.id = ANY(CAST(:product_ids AS text[]))
+        """)
+        result = await self.session.execute(query, {"product_ids": product_ids})
+        return [_product_row(row) for row in result.fetchall()]
+
+    async def upsert_products(self, products: list[dict[str, Any]]) -> ProductUpsertResult:
+        """
+        Upsert a batch of products with one statement.
+
+        The rows are passed as arrays and ``unnest``-ed into a multi-row
+        ``INSERT ... ON CONFLICT (external_product_id) DO UPDATE``; ``xmax = 0``
+        in ``RETURNING`` is true only for freshly inserted rows. Rows whose
+        synced fields are all unchanged are not touched. When a product's
+        content fingerprint changes its ``embedding_updated_at`` is cleared,
+        marking the embedding stale. A missing fingerprint counts as a change;
+        migration ``3c8e1f52a9d0`` fingerprints the rows synced before they
+        existed. Embeddings are left untouched. Does not commit.
+
+        Returns:
+            Counts, ids needing (re-)embedding and cache updates for changed rows
+        """
+        # A row may only be affected once per statement; the last version wins
+        latest = {product["id"]: product for product in products}
+        outcome = ProductUpsertResult()
+        if not latest:
+            return outcome
+
         query = text("""
-            SELECT id FROM recommender.product_embeddings
-            WHERE external_product_id = :external_id
+            INSERT INTO recommender.product_embeddings AS pe
+            (external_product_id, name, category, price_cents, stock, is_active,
+             content_fingerprint, popularity_score, created_at, updated_at)
+            SELECT p.external_product_id, p.name, p.category, p.price_cents, p.stock,
+                   p.is_active, p.content_fingerprint, 0.0, :now, :now
+            FROM unnest(
+                CAST(:external_ids AS text[]),
+                CAST(:names AS text[]),
+                CAST(:categories AS text[]),
+                CAST(:price_cents AS integer[]),
+                CAST(:stocks AS integer[]),
+                CAST(:is_active AS boolean[]),
+                CAST(:fingerprints AS text[])
+            ) AS p(external_product_id, name, category, price_cents, stock, is_active,
+                   content_fingerprint)
+            ON CONFLICT (external_product_id) DO UPDATE SET
+                name = EXCLUDED.name,
+                category = EXCLUDED.category,
+                price_cents = EXCLUDED.price_cents,
+                stock = EXCLUDED.stock,
+                is_active = EXCLUDED.is_active,
+                content_fingerprint = EXCLUDED.content_fingerprint,
+                embedding_updated_at = CASE
+                    WHEN pe.content_fingerprint IS DISTINCT FROM EXCLUDED.content_fingerprint THEN NULL
+                    ELSE pe.embedding_updated_at
+                END,
+                updated_at = EXCLUDED.updated_at
+            WHERE (pe.name, pe.category, pe.price_cents, pe.stock, pe.is_active,
+                   pe.content_fingerprint)
+                IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.category, EXCLUDED.price_cents,
+                   EXCLUDED.stock, EXCLUDED.is_active, EXCLUDED.content_fingerprint)
+            RETURNING pe.external_product_id, pe.stock, pe.price_cents, pe.is_active,
+                      (xmax = 0) AS inserted,
+                      (pe.embedding_updated_at IS NULL AND pe.is_active) AS needs_embedding
         """)
-        result = await self.session.execute(query, {"external_id": product["id"]})
-        existing = result.scalar()
+        rows = list(latest.values())
+        result = await self.session.execute(
+            query,
+            {
+                "external_ids": [str(p["id"]) for p in rows],
+                "names": [p["name"] for p in rows],
+                "categories": [p.get("category_name") for p in rows],
+                "price_cents": [p["price_cents"] or 0 for p in rows],
+                "stocks": [p["stock"] or 0 for p in rows],
+                "is_active": [bool(p["is_active"]) for p in rows],
+                "fingerprints": [self.embedding_service.content_fingerprint(p) for p in rows],
+                "now": datetime.now(),  # Use naive datetime for DB
+            },
+        )
+        for row in result.fetchall():
+            if row.inserted:
+                outcome.created += 1
+            else:
+                outcome.updated += 1
+                outcome.cache_updates.append(
+                    (row.external_product_id, row.stock, row.price_cents, row.is_active)
+                )
+            if row.needs_embedding:
+                outcome.stale_ids.append(row.external_product_id)
+        outcome.unchanged = len(rows) - outcome.created - outcome.updated
+        return outcome
 
-        now = datetime.now()  # Use naive datetime for DB
+    async def upsert_products_isolating(
+        self, products: list[dict[str, Any]]
+    ) -> tuple[ProductUpsertResult, list[str]]:
+        """
+        Upsert a batch like :meth:`upsert_products`, skipping rows the database rejects.
 
-        if existing:
-            # Update existing product
-            update_query = text("""
-                UPDATE recommender.product_embeddings
-                SET name = :name,
-                    category = :category,
-                    price_cents = :price_cents,
-                    stock = :stock,
-                    is_active = :is_active,
-                    embedding = :embedding,
-                    updated_at = :updated_at,
-                    embedding_updated_at = CASE
-                        WHEN :embedding IS NOT NULL THEN :updated_at
-                        ELSE embedding_updated_at
-                    END
-                WHERE external_product_id = :external_id
-                RETURNING id
-            """)
-            await self.session.execute(
-                update_query,
-                {
-                    "external_id": product["id"],
-                    "name": product["name"],
-                    "category": product.get("category_name"),
-                    "price_cents": product["price_cents"],
-                    "stock": product["stock"],
-                    "is_active": product["is_active"],
-                    "embedding": embedding,
-                    "updated_at": now,
-                },
-            )
-            logger.debug("Updated product embedding", external_id=product["id"])
-        else:
-            # Insert new product
-            insert_query = text("""
-                INSERT INTO recommender.product_embeddings
-                (external_product_id, name, category, price_cents, stock, is_active,
-                 embedding, popularity_score, created_at, updated_at, embedding_updated_at)
-                VALUES
-                (:external_id, :name, :category, :price_cents, :stock, :is_active,
-                 :embedding, 0.0, :created_at, :updated_at, :embedding_updated_at)
-            """)
-            await self.session.execute(
-                insert_query,
-                {
-                    "external_id": product["id"],
-                    "name": product["name"],
-                    "category": product.get("category_name"),
-                    "price_cents": product["price_cents"],
-                    "stock": product["stock"],
-                    "is_active": product["is_active"],
-                    "embedding": embedding,
-                    "created_at": now,
-                    "updated_at": now,
-                    "embedding_updated_at": now if embedding else None,
-                },
-            )
-            logger.debug("Inserted new product embedding", external_id=product["id"])
+        Each attempt runs in a savepoint. A batch that fails with a row error
+        (see :func:`~recommendation_service.services.interaction_buffer.is_row_error`)
+        is split in halves until each rejected product is alone; other errors
+        propagate. Does not commit.
 
-        return product
+        Returns:
+            The combined outcome and the ids of the rejected products
+        """
+        outcome = ProductUpsertResult()
+        rejected: list[str] = []
+        segments = deque([products])
+        while segments:
+            segment = segments.popleft()
+            if not segment:
+                continue
+            try:
+                async with self.session.begin_nested():
+                    part = await self.upsert_products(segment)
+            except Exception as e:
+                if not is_row_error(e):
+                    raise
+                if len(segment) == 1:
+                    product_id = str(segment[0]["id"])
+                    logger.error(
+                        "Skipping product rejected by the database",
+                        product_id=product_id,
+                        error=str(e),
+                    )
+                    rejected.append(product_id)
+                    continue
+                half = len(segment) // 2
+                segments.extendleft((segment[half:], segment[:half]))
+                continue
+            outcome.created += part.created
+            outcome.updated += part.updated
+            outcome.unchanged += part.unchanged
+            outcome.stale_ids.extend(part.stale_ids)
+            outcome.cache_updates.extend(part.cache_updates)
+        return outcome, rejected
 
     async def sync_all_products(
-        self, batch_size: int = 100, generate_embeddings: bool = False
+        self,
+        batch_size: int | None = None,
+        full_resync: bool = False,
+        on_stale: Callable[[list[str]], Any] | None = None,
+        client: EcommerceClient | None = None,
     ) -> dict[str, int]:
         """
-        Sync all products from e-commerce to recommender schema.
+        Sync products changed since the last run from e-commerce to recommender schema.
+
+        Products are read from the shared ``public`` schema or, when a
+        ``client`` is given, streamed page by page from the e-commerce API.
+        Each batch is written with one set-based upsert (see
+        :meth:`upsert_products`) and committed together with the watermark
+        after it. Products without a name, and products the database rejects
+        (see :meth:`upsert_products_isolating`), are skipped and counted as
+        errors; the watermark still moves past them. A new
+        run starts ``PRODUCT_SYNC_OVERLAP_SECONDS`` before the stored watermark
+        so rows committed late with an older ``updatedAt`` are not missed;
+        re-syncing them is harmless.
+
+        After each commit, the stock, price and active flag of updated
+        products are published to the API catalog caches, and ids whose
+        embedding went stale are passed to ``on_stale``.
 
         Args:
-            batch_size: Number of products to process per batch
-            generate_embeddings: Whether to generate embeddings (requires embedding service)
+            batch_size: Number of products per database batch (defaults to
+                ``PRODUCT_SYNC_BATCH_SIZE``; API pages use the client's page size)
+            full_resync: Ignore the watermark and sync the whole catalog
+            on_stale: Called with each batch's ids that need (re-)embedding
+            client: Read from the e-commerce API instead of the database
 
         Returns:
             Summary of sync operation
         """
+        settings = get_settings()
+        batch_size = batch_size or settings.product_sync_batch_size
+        watermark = None if full_resync else await self._load_watermark()
+        since = (
+            watermark[0] - timedelta(seconds=settings.product_sync_overlap_seconds)
+            if watermark
+            else None
+        )
+        pages = (
+            self._api_pages(client, since)
+            if client is not None
+            else self._database_pages(batch_size, (since, "") if since else None)
+        )
+
         # Update sync status to running
         await self._update_sync_status("products", "running")
-
-        total_count = await self.get_ecommerce_product_count()
-        logger.info("Starting product sync", total_products=total_count)
+        logger.info(
+            "Starting product sync",
+            source="api" if client is not None else "database",
+            since=watermark[0].isoformat() if watermark else None,
+        )
 
         synced = 0
         created = 0
         updated = 0
+        unchanged = 0
+        stale = 0
         errors = 0
-        offset = 0
 
-        while offset < total_count:
-            try:
-                products = await self.get_ecommerce_products(
-                    limit=batch_size, offset=offset
-                )
+        try:
+            async for products in pages:
+                valid = [p for p in products if p["name"] is not None]
+                outcome, rejected = await self.upsert_products_isolating(valid)
+
+                errors += len(products) - len(valid) + len(rejected)
+                synced += len(valid) - len(rejected)
+                created += outcome.created
+                updated += outcome.updated
+                unchanged += outcome.unchanged
+                stale += len(outcome.stale_ids)
 
-                for product in products:
-                    try:
-                        # Check if product exists
-                        query = text("""
-                            SELECT id FROM recommender.product_embeddings
-                            WHERE external_product_id = :external_id
-                        """)
-                        result = await self.session.execute(
-                            query, {"external_id": product["id"]}
-                        )
-                        exists = result.scalar() is not None
-
-                        await self.upsert_product_embedding(product)
-
-                        synced += 1
-                        if exists:
-                            updated += 1
-                        else:
-                            created += 1
-
-                    except Exception as e:
-                        logger.error(
-                            "Error syncing product",
-                            external_id=product["id"],
-                            error=str(e),
-                        )
-                        errors += 1
-
-                await self.session.commit()
-                offset += batch_size
-                logger.info(
-                    "Batch synced", synced=synced, total=total_count, offset=offset
+                position = max((p["updated_at"], str(p["id"])) for p in products)
+                # Commits the batch together with its watermark
+                await self._update_sync_status(
+                    "products",
+                    "running",
+                    records_synced=synced,
+                    cursor=encode_watermark(*position),
                 )
+                logger.info("Batch synced", synced=synced, watermark=position[0].isoformat())
 
-            except Exception as e:
-                logger.error("Error in batch sync", offset=offset, error=str(e))
-                errors += 1
-                offset += batch_size
+                await publish_catalog_updates(outcome.cache_updates)
+                if on_stale is not None and outcome.stale_ids:
+                    on_stale(outcome.stale_ids)
+        except Exception as e:
+            logger.error("Error in batch sync", synced=synced, error=str(e))
+            await self.session.rollback()
+            await self._update_sync_status(
+                "products", "error", records_synced=synced, error_message=str(e)
+            )
+            raise
 
         # Update sync status to idle
-        await self._update_sync_status(
-            "products", "idle", records_synced=synced, cursor=str(offset)
-        )
+        await self._update_sync_status("products", "idle", records_synced=synced)
 
         summary = {
-            "total_products": total_count,
             "synced": synced,
             "created": created,
             "updated": updated,
+            "unchanged": unchanged,
+            "stale_embeddings": stale,
             "errors": errors,
         }
         logger.info("Product sync completed", **summary)
         return summary
 
+    async def sync_products_by_id(
+        self,
+        product_ids: list[str],
+        on_stale: Callable[[list[str]], Any] | None = None,
+    ) -> dict[str, int]:
+        """
+        Sync specific products now, e.g. those reported changed by a notification.
+
+        The products are re-read from the ``public`` schema and written with
+        one :meth:`upsert_products` statement. Ids that no longer exist there
+        are deactivated. After the commit, stock, price and active flag
+        changes are published to the API catalog caches and ids needing
+        (re-)embedding are passed to ``on_stale``. The sync watermark is not
+        moved; the next scheduled run finds these rows unchanged.
+
+        Args:
+            product_ids: External product ids to sync
+            on_stale: Called with the ids that need (re-)embedding
+
+        Returns:
+            Summary of sync operation
+        """
+        product_ids = list(dict.fromkeys(str(product_id) for product_id in product_ids))
+        products = await self.get_ecommerce_products_by_id(product_ids)
+        valid = [p for p in products if p["name"] is not None]
+        outcome, rejected = await self.upsert_products_isolating(valid)
+
+        found = {str(p["id"]) for p in products}
+        deleted = [product_id for product_id in product_ids if product_id not in found]
+        if deleted:
+            result = await self.session.execute(
+                text("""
+                    UPDATE recommender.product_embeddings
+                    SET is_active = false, updated_at = :now
+                    WHERE external_product_id = ANY(CAST(:product_ids AS text[]))
+                      AND is_active
+                    RETURNING external_product_id, stock, price_cents
+                """),
+                {"product_ids": deleted, "now": datetime.now()},  # Use naive datetime for DB
+            )
+            deactivated = [
+                (row.external_product_id, row.stock, row.price_cents, False)
+                for row in result.fetchall()
+            ]
+            outcome.cache_updates.extend(deactivated)
+        else:
+            deactivated = []
+        await self.session.commit()
+
+        await publish_catalog_updates(outcome.cache_updates)
+        if on_stale is not None and outcome.stale_ids:
+            on_stale(outcome.stale_ids)
+
+        summary = {
+            "synced": len(valid) - len(rejected),
+            "created": outcome.created,
+            "updated": outcome.updated,
+            "unchanged": outcome.unchanged,
+            "deactivated": len(deactivated),
+            "stale_embeddings": len(outcome.stale_ids),
+            "errors": len(products) - len(valid) + len(rejected),
+        }
+        logger.info("Products synced by id", **summary)
+        return summary
+
+    async def _database_pages(
+        self, batch_size: int, after: Watermark | None
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Keyset-paginate changed products from the ``public`` schema."""
+        while True:
+            products = await self.get_ecommerce_products(limit=batch_size, after=after)
+            if products:
+                yield products
+            if len(products) < batch_size:
+                return
+            after = (products[-1]["updated_at"], products[-1]["id"])
+
+    async def _api_pages(
+        self, client: EcommerceClient, since: datetime | None
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Stream changed products from the e-commerce API in the database row shape."""
+        async for page in client.iter_products(updated_since=since):
+            yield [product_from_api(item) for item in page]
+
+    async def _load_watermark(self) -> Watermark | None:
+        """Return the ``("updatedAt", id)`` position reached by earlier runs."""
+        result = await self.session.execute(
+            text("SELECT last_sync_cursor FROM recommender.sync_status WHERE id = 'products'")
+        )
+        return parse_watermark(result.scalar())
+
     async def _update_sync_status(
         self,
         sync_id: str,
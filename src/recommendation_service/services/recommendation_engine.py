@@ -3,17 +3,23 @@
 Provides personalized product recommendations using embedding similarity search.
 """
 
-import json
-import math
 from collections import defaultdict
 from datetime import datetime, timezone
 from typing import Any
 from uuid import uuid4
 
+import numpy as np
 import structlog
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from recommendation_service.infrastructure.vector.ops import (
+    as_vector,
+    cosine_similarities,
+    mean_vector,
+    stack_vectors,
+    top_k_indices,
+)
 from recommendation_service.services.embedding import EmbeddingService
 
 logger = structlog.get_logger()
@@ -48,7 +54,7 @@ class RecommendationEngine:
         # Try to get user preference embedding
         user_embedding = await self._get_user_embedding(user_id)
 
-        if user_embedding:
+        if user_embedding is not None:
             # Personalized recommendations based on user embedding
             products = await self._search_similar_products(
                 user_embedding, limit=limit * 2, exclude_ids=[]
@@ -107,7 +113,7 @@ class RecommendationEngine:
             }
 
         source_embedding = source_product.get("embedding")
-        if not source_embedding:
+        if source_embedding is None:
             # Fall back to products in same category
             products = await self._get_products_by_category(
                 source_product.get("category"), limit=limit, exclude_ids=[product_id]
@@ -121,7 +127,7 @@ class RecommendationEngine:
         # If user_id provided, optionally blend with user preferences
         if user_id:
             user_embedding = await self._get_user_embedding(user_id)
-            if user_embedding:
+            if user_embedding is not None:
                 # Re-rank based on user preferences
                 products = self._rerank_with_user_preferences(
                     products, user_embedding, weight=0.3
@@ -163,7 +169,7 @@ class RecommendationEngine:
         cart_embeddings = []
         for pid in cart_product_ids:
             product = await self._get_product_by_external_id(pid)
-            if product and product.get("embedding"):
+            if product and product.get("embedding") is not None:
                 cart_embeddings.append(product["embedding"])
 
         if not cart_embeddings:
@@ -171,7 +177,7 @@ class RecommendationEngine:
             products = await self._get_popular_products(limit=limit)
         else:
             # Aggregate cart embeddings (average)
-            aggregated = self._aggregate_embeddings(cart_embeddings)
+            aggregated = mean_vector(np.stack(cart_embeddings))
 
             # Search for similar/complementary products
             products = await self._search_similar_products(
@@ -208,38 +214,21 @@ class RecommendationEngine:
         """
         request_id = str(uuid4())
 
-        # Query co-purchase data from order history
+        # Co-purchase counts are maintained by order sync
         query = text("""
-            WITH source_orders AS (
-                -- Orders containing the source product
-                SELECT DISTINCT oi."orderId"
-                FROM public.order_items oi
-                WHERE oi."productId" = :product_id
-            ),
-            copurchased AS (
-                -- Products in the same orders
-                SELECT
-                    oi."productId" as co_product_id,
-                    COUNT(*) as frequency
-                FROM public.order_items oi
-                JOIN source_orders so ON oi."orderId" = so."orderId"
-                WHERE oi."productId" != :product_id
-                GROUP BY oi."productId"
-                ORDER BY frequency DESC
-                LIMIT :limit
-            )
             SELECT
                 pe.external_product_id as product_id,
                 pe.name,
                 pe.category,
                 pe.price_cents,
                 pe.is_active,
-                cp.frequency,
+                cc.order_count as frequency,
                 pe.embedding
-            FROM copurchased cp
-            JOIN recommender.product_embeddings pe ON pe.external_product_id = cp.co_product_id
-            WHERE pe.is_active = true
-            ORDER BY cp.frequency DESC
+            FROM recommender.product_copurchase_counts cc
+            JOIN recommender.product_embeddings pe ON pe.external_product_id = cc.co_product_id
+            WHERE cc.product_id = :product_id AND pe.is_active = true
+            ORDER BY cc.order_count DESC
+            LIMIT :limit
         """)
 
         result = await self.session.execute(
@@ -281,7 +270,7 @@ class RecommendationEngine:
     # Helper Methods
     # ==========================================================================
 
-    async def _get_user_embedding(self, user_id: str) -> list[float] | None:
+    async def _get_user_embedding(self, user_id: str) -> np.ndarray | None:
         """Get user preference embedding from database."""
         query = text("""
             SELECT embedding
@@ -291,12 +280,7 @@ class RecommendationEngine:
         result = await self.session.execute(query, {"user_id": user_id})
         row = result.fetchone()
 
-        if row and row.embedding:
-            # Parse JSON embedding
-            if isinstance(row.embedding, str):
-                return json.loads(row.embedding)
-            return row.embedding
-        return None
+        return as_vector(row.embedding) if row else None
 
     async def _get_product_by_external_id(
         self, external_id: str
@@ -320,10 +304,6 @@ class RecommendationEngine:
         row = result.fetchone()
 
         if row:
-            embedding = row.embedding
-            if isinstance(embedding, str):
-                embedding = json.loads(embedding)
-
             return {
                 "id": row.id,
                 "product_id": str(row.external_product_id),
@@ -333,7 +313,7 @@ class RecommendationEngine:
                 "price": row.price_cents / 100,
                 "stock": row.stock,
                 "is_active": row.is_active,
-                "embedding": embedding,
+                "embedding": as_vector(row.embedding),
                 "popularity_score": row.popularity_score,
             }
         return None
@@ -416,7 +396,7 @@ class RecommendationEngine:
 
     async def _search_similar_products(
         self,
-        query_embedding: list[float],
+        query_embedding: np.ndarray,
         limit: int = 12,
         exclude_ids: list[str] = None,
     ) -> list[dict[str, Any]]:
@@ -424,7 +404,7 @@ class RecommendationEngine:
         Search for products similar to a query embedding.
 
         Since we don't have pgvector, this loads embeddings and computes
-        similarity in Python. For large catalogs, consider using a vector
+        similarity with NumPy. For large catalogs, consider using a vector
         database or pgvector.
         """
         exclude_ids = exclude_ids or []
@@ -447,57 +427,22 @@ class RecommendationEngine:
         result = await self.session.execute(query, {"exclude_ids": exclude_ids})
         rows = result.fetchall()
 
-        # Calculate similarity scores
-        scored_products = []
-        for row in rows:
-            embedding = row.embedding
-            if isinstance(embedding, str):
-                embedding = json.loads(embedding)
-
-            if embedding:
-                similarity = self._cosine_similarity(query_embedding, embedding)
-                scored_products.append(
-                    {
-                        "product_id": str(row.external_product_id),
-                        "external_product_id": row.external_product_id,
-                        "name": row.name,
-                        "category": row.category or "Unknown",
-                        "price": row.price_cents / 100,
-                        "image_url": None,
-                        "score": similarity,
-                    }
-                )
-
-        # Sort by similarity score
-        scored_products.sort(key=lambda x: x["score"], reverse=True)
-
-        return scored_products[:limit]
-
-    def _cosine_similarity(self, vec1: list[float], vec2: list[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        norm1 = math.sqrt(sum(a * a for a in vec1))
-        norm2 = math.sqrt(sum(b * b for b in vec2))
+        # Score every candidate in one matrix-vector product
+        matrix, positions = stack_vectors(row.embedding for row in rows)
+        scores = cosine_similarities(query_embedding, matrix)
 
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-
-        return dot_product / (norm1 * norm2)
-
-    def _aggregate_embeddings(self, embeddings: list[list[float]]) -> list[float]:
-        """Aggregate multiple embeddings by averaging."""
-        if not embeddings:
-            return []
-
-        dim = len(embeddings[0])
-        aggregated = [0.0] * dim
-
-        for emb in embeddings:
-            for i, val in enumerate(emb):
-                aggregated[i] += val
-
-        n = len(embeddings)
-        return [v / n for v in aggregated]
+        return [
+            {
+                "product_id": str(rows[positions[i]].external_product_id),
+                "external_product_id": rows[positions[i]].external_product_id,
+                "name": rows[positions[i]].name,
+                "category": rows[positions[i]].category or "Unknown",
+                "price": rows[positions[i]].price_cents / 100,
+                "image_url": None,
+                "score": float(scores[i]),
+            }
+            for i in top_k_indices(scores, limit)
+        ]
 
     def _apply_diversity(
         self, products: list[dict[str, Any]], limit_per_category: int
@@ -517,7 +462,7 @@ class RecommendationEngine:
     def _rerank_with_user_preferences(
         self,
         products: list[dict[str, Any]],
-        user_embedding: list[float],
+        user_embedding: np.ndarray,
         weight: float = 0.3,
     ) -> list[dict[str, Any]]:
         """Re-rank products based on user preference similarity."""
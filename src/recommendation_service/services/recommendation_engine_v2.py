@@ -1,16 +1,26 @@
 """Hybrid recommendation engine with 4-stage pipeline."""
 
 import json
-import math
 from collections import defaultdict
 from datetime import datetime, timezone
 from typing import Any
 from uuid import uuid4
 
+import numpy as np
 import structlog
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from recommendation_service.infrastructure.vector.ops import (
+    as_vector,
+    mean_vector,
+    unpack_vectors,
+)
+from recommendation_service.services.catalog_cache import (
+    CatalogSnapshot,
+    allocate_quotas,
+    get_catalog_cache,
+)
 from recommendation_service.services.embedding import EmbeddingService
 from recommendation_service.services.reranker import RerankerService
 
@@ -42,11 +52,13 @@ class HybridRecommendationEngine:
         has_user_data = False
 
         if user_id:
-            user_embedding = await self._get_user_embedding(user_id)
-            if user_embedding:
+            interests = await self._get_user_interests(user_id)
+            if interests is not None:
                 has_user_data = True
-                content_candidates = await self._search_similar_products(
-                    user_embedding, limit=limit * 3, exclude_ids=[]
+                # Per-interest quotas already spread results across the user's
+                # interests, so less over-fetching is needed for diversity
+                content_candidates = await self._search_by_interests(
+                    *interests, limit=limit * 2
                 )
                 candidates.extend(content_candidates)
 
@@ -105,7 +117,7 @@ class HybridRecommendationEngine:
         candidates = []
         source_embedding = source_product.get("embedding")
 
-        if source_embedding:
+        if source_embedding is not None:
             candidates = await self._search_similar_products(
                 source_embedding, limit=limit * 4, exclude_ids=[product_id]
             )
@@ -153,14 +165,14 @@ class HybridRecommendationEngine:
         for pid in cart_product_ids:
             product = await self._get_product_by_external_id(pid)
             if product:
-                if product.get("embedding"):
+                if product.get("embedding") is not None:
                     cart_embeddings.append(product["embedding"])
                 if product.get("category"):
                     cart_categories.add(product["category"])
 
         candidates = []
         if cart_embeddings:
-            aggregated = self._aggregate_embeddings(cart_embeddings)
+            aggregated = mean_vector(np.stack(cart_embeddings))
             candidates = await self._search_similar_products(
                 aggregated, limit=limit * 4, exclude_ids=cart_product_ids
             )
@@ -203,7 +215,7 @@ class HybridRecommendationEngine:
 
         if len(candidates) < limit:
             source_product = await self._get_product_by_external_id(product_id)
-            if source_product and source_product.get("embedding"):
+            if source_product and source_product.get("embedding") is not None:
                 similar = await self._search_similar_products(
                     source_product["embedding"],
                     limit=limit - len(candidates),
@@ -341,21 +353,35 @@ class HybridRecommendationEngine:
         """Apply business rules."""
         return [c for c in candidates if c.get("stock", 1) > 0]
 
-    async def _get_user_embedding(self, user_id: str) -> list[float] | None:
-        """Get user preference embedding."""
+    async def _get_user_interests(
+        self, user_id: str
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        """Get the user's interest centroids and weights.
+
+        Users without stored interests fall back to their single preference
+        embedding as one interest.
+        """
         query = text("""
-            SELECT embedding
+            SELECT embedding, interest_centroids, interest_weights
             FROM recommender.user_preference_embeddings
             WHERE external_user_id = :user_id
         """)
         result = await self.session.execute(query, {"user_id": user_id})
         row = result.fetchone()
-
-        if row and row.embedding:
-            if isinstance(row.embedding, str):
-                return json.loads(row.embedding)
-            return row.embedding
-        return None
+        if not row:
+            return None
+
+        embedding = as_vector(row.embedding)
+        if row.interest_centroids and embedding is not None:
+            weights = row.interest_weights
+            if isinstance(weights, str):
+                weights = json.loads(weights)
+            centroids = unpack_vectors(row.interest_centroids, embedding.shape[0])
+            if weights and len(weights) == len(centroids):
+                return centroids, np.asarray(weights, dtype=np.float32)
+        if embedding is None:
+            return None
+        return embedding[np.newaxis, :], np.ones(1, dtype=np.float32)
 
     async def _get_user_preference_data(self, user_id: str) -> dict[str, Any]:
         """Get user preference data."""
@@ -438,22 +464,15 @@ class HybridRecommendationEngine:
     async def _get_co_purchased_products(
         self, product_id: str, limit: int = 10
     ) -> list[dict[str, Any]]:
-        """Get products frequently bought together."""
+        """Get products frequently bought together, from the counts kept by order sync."""
         query = text("""
-            WITH source_orders AS (
-                SELECT DISTINCT oi."orderId"
-                FROM public.order_items oi
-                WHERE oi."productId" = :product_id
-            )
             SELECT
                 pe.external_product_id as product_id, pe.name, pe.category,
-                pe.price_cents, pe.stock, COUNT(*) as frequency
-            FROM public.order_items oi
-            JOIN source_orders so ON oi."orderId" = so."orderId"
-            JOIN recommender.product_embeddings pe ON pe.external_product_id = oi."productId"
-            WHERE oi."productId" != :product_id AND pe.is_active = true
-            GROUP BY pe.external_product_id, pe.name, pe.category, pe.price_cents, pe.stock
-            ORDER BY frequency DESC
+                pe.price_cents, pe.stock, cc.order_count as frequency
+            FROM recommender.product_copurchase_counts cc
+            JOIN recommender.product_embeddings pe ON pe.external_product_id = cc.co_product_id
+            WHERE cc.product_id = :product_id AND pe.is_active = true
+            ORDER BY cc.order_count DESC
             LIMIT :limit
         """)
 
@@ -487,10 +506,6 @@ class HybridRecommendationEngine:
         row = result.fetchone()
 
         if row:
-            embedding = row.embedding
-            if isinstance(embedding, str):
-                embedding = json.loads(embedding)
-
             return {
                 "id": row.id,
                 "product_id": str(row.external_product_id),
@@ -500,54 +515,54 @@ class HybridRecommendationEngine:
                 "price": row.price_cents / 100,
                 "stock": row.stock,
                 "is_active": row.is_active,
-                "embedding": embedding,
+                "embedding": as_vector(row.embedding),
                 "popularity_score": row.popularity_score,
             }
         return None
 
     async def _search_similar_products(
-        self, query_embedding: list[float], limit: int = 12, exclude_ids: list[str] | None = None
+        self, query_embedding: np.ndarray, limit: int = 12, exclude_ids: list[str] | None = None
     ) -> list[dict[str, Any]]:
-        """Search for products similar to query embedding using cosine similarity."""
+        """Search the most popular products for those most similar to the query embedding."""
         exclude_ids = exclude_ids or []
         candidate_limit = min(limit * 10, 200)
-
-        query = text("""
-            SELECT external_product_id, name, category, price_cents,
-                   embedding, popularity_score, stock
-            FROM recommender.product_embeddings
-            WHERE is_active = true AND embedding IS NOT NULL
-            AND external_product_id != ALL(:exclude_ids)
-            ORDER BY popularity_score DESC NULLS LAST
-            LIMIT :candidate_limit
-        """)
-        result = await self.session.execute(
-            query, {"exclude_ids": exclude_ids, "candidate_limit": candidate_limit}
+        snapshot = await self._get_catalog_snapshot(exclude_ids, candidate_limit)
+        return snapshot.search(
+            query_embedding, limit, exclude_ids=exclude_ids, candidate_limit=candidate_limit
         )
-        rows = result.fetchall()
 
-        scored = []
-        for row in rows:
-            embedding = row.embedding
-            if isinstance(embedding, str):
-                embedding = json.loads(embedding)
-            if isinstance(embedding, list) and embedding:
-                similarity = self._cosine_similarity(query_embedding, embedding)
-                scored.append({
-                    "product_id": str(row.external_product_id),
-                    "external_product_id": row.external_product_id,
-                    "name": row.name,
-                    "category": row.category or "Unknown",
-                    "price": row.price_cents / 100,
-                    "stock": row.stock,
-                    "image_url": None,
-                    "score": similarity,
-                    "popularity_score": row.popularity_score,
-                    "signal": "content",
-                })
-
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:limit]
+    async def _get_catalog_snapshot(
+        self, exclude_ids: list[str], candidate_limit: int
+    ) -> CatalogSnapshot:
+        """The cached catalog, or just the top candidates when the cache is disabled."""
+        cache = get_catalog_cache()
+        if cache.enabled:
+            snapshot = await cache.get(self.session)
+        else:
+            query = text("""
+                SELECT external_product_id, name, category, price_cents,
+                       embedding, popularity_score, stock
+                FROM recommender.product_embeddings
+                WHERE is_active = true AND embedding IS NOT NULL
+                AND external_product_id != ALL(:exclude_ids)
+                ORDER BY popularity_score DESC NULLS LAST
+                LIMIT :candidate_limit
+            """)
+            result = await self.session.execute(
+                query, {"exclude_ids": exclude_ids, "candidate_limit": candidate_limit}
+            )
+            snapshot = CatalogSnapshot.from_rows(result.fetchall())
+        return snapshot
+
+    async def _search_by_interests(
+        self, centroids: np.ndarray, weights: np.ndarray, limit: int = 24
+    ) -> list[dict[str, Any]]:
+        """Search for all interest centroids in one batch, merged by weight quotas."""
+        candidate_limit = min(limit * 10, 200)
+        snapshot = await self._get_catalog_snapshot([], candidate_limit)
+        return snapshot.search_many(
+            centroids, allocate_quotas(weights, limit), candidate_limit=candidate_limit
+        )
 
     async def _get_popular_products(self, limit: int = 12) -> list[dict[str, Any]]:
         """Get popular products as fallback."""
@@ -613,32 +628,6 @@ class HybridRecommendationEngine:
             for r in rows
         ]
 
-    def _cosine_similarity(self, vec1: list[float], vec2: list[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        norm1 = math.sqrt(sum(a * a for a in vec1))
-        norm2 = math.sqrt(sum(b * b for b in vec2))
-
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-
-        return dot_product / (norm1 * norm2)
-
-    def _aggregate_embeddings(self, embeddings: list[list[float]]) -> list[float]:
-        """Aggregate embeddings by averaging."""
-        if not embeddings:
-            return []
-
-        dim = len(embeddings[0])
-        aggregated = [0.0] * dim
-
-        for emb in embeddings:
-            for i, val in enumerate(emb):
-                aggregated[i] += val
-
-        n = len(embeddings)
-        return [v / n for v in aggregated]
-
     def _empty_response(
         self, request_id: str, context: str, user_id: str | None
     ) -> dict[str, Any]:
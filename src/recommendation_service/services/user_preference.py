@@ -3,17 +3,148 @@
 Builds user preference vectors from interaction history with weighted signals.
 """
 
+import asyncio
 import json
-from collections import defaultdict
+import time
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
+import numpy as np
 import structlog
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from recommendation_service.config import get_settings
+from recommendation_service.core.metrics import PREFERENCE_DIRTY_USERS
+from recommendation_service.infrastructure.database.connection import get_session_factory
+from recommendation_service.infrastructure.vector.ops import (
+    as_vector,
+    normalize,
+    pack_vectors,
+    segment_weighted_sums,
+    spherical_kmeans,
+    stack_vectors,
+    to_json,
+    unpack_vectors,
+    weighted_mean,
+)
+
 logger = structlog.get_logger()
 
+UPSERT_PREFERENCE_QUERY = text("""
+    INSERT INTO recommender.user_preference_embeddings
+    (external_user_id, embedding, weighted_sum, total_weight, decay_updated_at,
+     interest_centroids, interest_weights, top_categories, avg_price_min, avg_price_max,
+     interaction_count, created_at, updated_at, last_active_at)
+    VALUES
+    (:user_id, :embedding, :weighted_sum, :total_weight, :now,
+     :interest_centroids, :interest_weights, :top_categories, :avg_price_min, :avg_price_max,
+     :interaction_count, :now, :now, :now)
+    ON CONFLICT (external_user_id) DO UPDATE SET
+        embedding = :embedding,
+        weighted_sum = :weighted_sum,
+        total_weight = :total_weight,
+        decay_updated_at = :now,
+        interest_centroids = :interest_centroids,
+        interest_weights = :interest_weights,
+        top_categories = :top_categories,
+        avg_price_min = :avg_price_min,
+        avg_price_max = :avg_price_max,
+        interaction_count = :interaction_count,
+        updated_at = :now,
+        last_active_at = :now
+""")
+
+# Online update: the running state is replaced, the stats are merged in SQL
+APPLY_INTERACTION_QUERY = text("""
+    INSERT INTO recommender.user_preference_embeddings
+    (external_user_id, embedding, weighted_sum, total_weight, decay_updated_at,
+     interest_centroids, interest_weights, top_categories, avg_price_min, avg_price_max,
+     interaction_count, created_at, updated_at, last_active_at)
+    VALUES
+    (:user_id, :embedding, :weighted_sum, :total_weight, :decay_updated_at,
+     :interest_centroids, :interest_weights, :top_categories, :price, :price,
+     1, :now, :now, :now)
+    ON CONFLICT (external_user_id) DO UPDATE SET
+        embedding = :embedding,
+        weighted_sum = :weighted_sum,
+        total_weight = :total_weight,
+        decay_updated_at = :decay_updated_at,
+        interest_centroids = :interest_centroids,
+        interest_weights = :interest_weights,
+        top_categories = :top_categories,
+        avg_price_min = LEAST(user_preference_embeddings.avg_price_min, :price),
+        avg_price_max = GREATEST(user_preference_embeddings.avg_price_max, :price),
+        interaction_count = user_preference_embeddings.interaction_count + 1,
+        updated_at = :now,
+        last_active_at = :now
+""")
+
+
+async def mark_dirty_users(session: AsyncSession, user_ids: Sequence[str]) -> None:
+    """Mark users for the next preference rebuild, in the caller's transaction.
+
+    The mark time is read from the database clock once the row is locked, so a
+    mark made while a rebuild runs is always later than the one it read.
+    """
+    if not user_ids:
+        return
+    await session.execute(
+        text("""
+            INSERT INTO recommender.preference_dirty_users (external_user_id, marked_at)
+            SELECT u, clock_timestamp()::timestamp
+            FROM unnest(CAST(:user_ids AS text[])) AS u
+            ON CONFLICT (external_user_id) DO UPDATE SET
+                marked_at = clock_timestamp()::timestamp
+        """),
+        {"user_ids": sorted(set(user_ids))},
+    )
+
+
+async def count_dirty_users(session: AsyncSession) -> int:
+    """Number of users waiting for a preference rebuild."""
+    result = await session.execute(
+        text("SELECT COUNT(*) FROM recommender.preference_dirty_users")
+    )
+    return int(result.scalar() or 0)
+
+
+async def report_dirty_users(interval_seconds: float) -> None:
+    """Keep the ``PREFERENCE_DIRTY_USERS`` gauge at the backlog size until cancelled.
+
+    Runs in the API process, whose ``/metrics`` is scraped; the rebuild
+    itself runs in Celery workers without a metrics endpoint.
+    """
+    while True:
+        try:
+            async with get_session_factory()() as session:
+                PREFERENCE_DIRTY_USERS.set(await count_dirty_users(session))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Failed to count dirty preference users", error=str(e))
+        await asyncio.sleep(interval_seconds)
+
+
+def _json_list(value: Any) -> list:
+    """A JSON column value as a list (raw ``text()`` queries may return the JSON text)."""
+    if isinstance(value, str):
+        value = json.loads(value)
+    return list(value or [])
+
+
+@dataclass
+class ProductMatrix:
+    """Product embeddings stacked into one matrix, with row-aligned attributes."""
+
+    index: dict[str, int]
+    vectors: np.ndarray
+    categories: list[str | None]
+    price_cents: np.ndarray
+
 
 class UserPreferenceService:
     """Service for building and updating user preference embeddings."""
@@ -32,6 +163,18 @@ class UserPreferenceService:
     # Recency decay: weight = base_weight * exp(-days / decay_factor)
     RECENCY_DECAY_DAYS = 30.0
 
+    # Bulk rebuild: interaction rows reduced per step (bounds the gathered
+    # rows x dimension block) and users per upsert batch
+    BULK_CHUNK_ROWS = 50_000
+    BULK_UPSERT_BATCH_SIZE = 1000
+
+    # Prefix of the sync_status rows holding the preference shard checkpoints
+    SHARD_CHECKPOINT_PREFIX = "user_preferences"
+
+    # Online updates start a new interest for a product less similar than this
+    # to every existing centroid (while below PREFERENCE_MAX_INTERESTS)
+    NEW_INTEREST_SIMILARITY = 0.5
+
     def __init__(self, session: AsyncSession):
         self.session = session
 
@@ -77,40 +220,43 @@ class UserPreferenceService:
             logger.info("No interactions found for user", user_id=user_id)
             return {"user_id": user_id, "interactions_processed": 0}
 
-        # Build weighted embedding
-        weighted_embeddings = []
+        # Stack embeddings once; rows with unusable embeddings are dropped
+        embeddings, positions = stack_vectors(i.embedding for i in interactions)
+        if embeddings.shape[0] == 0:
+            logger.info("No usable embeddings for user", user_id=user_id)
+            return {"user_id": user_id, "interactions_processed": 0}
+
         category_counts: dict[str, int] = defaultdict(int)
         prices = []
         now = datetime.now()  # Use naive datetime for DB
 
-        for interaction in interactions:
-            interaction_type = interaction.interaction_type
-            created_at = interaction.created_at
-            embedding = interaction.embedding
-            category = interaction.category
-            price_cents = interaction.price_cents
-
-            # Parse embedding
-            if isinstance(embedding, str):
-                embedding = json.loads(embedding)
-
-            # Calculate weight with recency decay
-            base_weight = self.INTERACTION_WEIGHTS.get(interaction_type, 1.0)
-            days_old = (now - created_at).days
-            recency_factor = self._calculate_recency_weight(days_old)
-            final_weight = base_weight * recency_factor
-
-            # Add weighted embedding
-            weighted_embeddings.append((embedding, final_weight))
+        base_weights = np.array(
+            [
+                self.INTERACTION_WEIGHTS.get(interactions[i].interaction_type, 1.0)
+                for i in positions
+            ],
+            dtype=np.float32,
+        )
+        days_old = np.array(
+            [(now - interactions[i].created_at).days for i in positions], dtype=np.float32
+        )
+        weights = base_weights * self._calculate_recency_weights(days_old)
 
+        for interaction in interactions:
             # Track category and price stats
-            if category:
-                category_counts[category] += 1
-            if price_cents:
-                prices.append(price_cents)
+            if interaction.category:
+                category_counts[interaction.category] += 1
+            if interaction.price_cents:
+                prices.append(interaction.price_cents)
 
-        # Aggregate embeddings
-        aggregated_embedding = self._aggregate_weighted_embeddings(weighted_embeddings)
+        # Aggregate embeddings; the raw sum seeds the online running state
+        aggregated_embedding = self._aggregate_weighted_embeddings(embeddings, weights)
+        weighted_sum = weights @ embeddings
+        interests = self._build_interests(
+            np.array([interactions[i].external_product_id for i in positions], dtype=object),
+            embeddings,
+            weights,
+        )
 
         # Calculate stats
         top_categories = sorted(
@@ -125,10 +271,14 @@ class UserPreferenceService:
         await self._upsert_user_preference(
             user_id=user_id,
             embedding=aggregated_embedding,
+            weighted_sum=weighted_sum,
+            total_weight=float(weights.sum()),
+            interests=interests,
             top_categories=top_categories_list,
             avg_price_min=avg_price_min,
             avg_price_max=avg_price_max,
             interaction_count=len(interactions),
+            now=now,
         )
 
         logger.info(
@@ -145,29 +295,41 @@ class UserPreferenceService:
         }
 
     async def update_all_active_users(
-        self, min_interactions: int = 3, batch_size: int = 100
+        self, min_interactions: int = 3, batch_size: int = 1000, bulk: bool = True
     ) -> dict[str, int]:
         """
         Update preference embeddings for all active users.
 
         Args:
             min_interactions: Minimum interactions required to build preference
-            batch_size: Number of users to process per batch
+            batch_size: Number of users upserted per statement batch (bulk mode)
+            bulk: Rebuild everyone in one set-based pass (see ``rebuild_all_users``)
+                instead of one query and commit per user
 
         Returns:
             Summary of the operation
         """
+        if bulk:
+            return await self.rebuild_all_users(
+                min_interactions=min_interactions, upsert_batch_size=batch_size
+            )
+
         # Get active users with enough interactions
         query = text("""
             SELECT DISTINCT external_user_id, COUNT(*) as interaction_count
             FROM recommender.user_interactions
-            WHERE created_at >= NOW() - INTERVAL '90 days'
+            WHERE created_at >= :cutoff_date
             GROUP BY external_user_id
             HAVING COUNT(*) >= :min_interactions
             ORDER BY COUNT(*) DESC
         """)
 
-        result = await self.session.execute(query, {"min_interactions": min_interactions})
+        # A naive bound compares directly with created_at, so only the
+        # partitions inside the window are scanned
+        cutoff_date = datetime.now() - timedelta(days=90)
+        result = await self.session.execute(
+            query, {"min_interactions": min_interactions, "cutoff_date": cutoff_date}
+        )
         users = result.fetchall()
 
         updated = 0
@@ -187,79 +349,683 @@ class UserPreferenceService:
 
         return {"updated": updated, "errors": errors, "total_users": len(users)}
 
-    def _calculate_recency_weight(self, days_old: int) -> float:
-        """Calculate recency decay weight."""
-        import math
+    async def rebuild_all_users(
+        self,
+        min_interactions: int = 3,
+        lookback_days: int = 90,
+        user_ids: list[str] | None = None,
+        upsert_batch_size: int | None = None,
+        products: ProductMatrix | None = None,
+    ) -> dict[str, int]:
+        """
+        Rebuild preference embeddings for many users in one set-based pass.
 
-        return math.exp(-days_old / self.RECENCY_DECAY_DAYS)
+        Product embeddings are loaded once into a matrix. Interactions are then
+        streamed in user order and reduced ``BULK_CHUNK_ROWS`` at a time: each
+        chunk becomes one gather of product vectors and one segmented weighted
+        sum (``np.add.reduceat``) over its users. Results are upserted with
+        executemany in batches of ``upsert_batch_size`` users. Weights, decay and
+        stats match ``update_user_preference``.
 
-    def _aggregate_weighted_embeddings(
-        self, weighted_embeddings: list[tuple[list[float], float]]
-    ) -> list[float]:
-        """Aggregate multiple embeddings with weights."""
-        if not weighted_embeddings:
-            return []
+        Args:
+            min_interactions: Minimum interactions in the window to be rebuilt
+            lookback_days: Number of days of interactions to use
+            user_ids: Restrict the rebuild to these users
+            upsert_batch_size: Users per upsert batch and commit
+            products: Product matrix to reuse (loaded here when omitted)
+
+        Returns:
+            Summary of the operation
+        """
+        started_at = time.perf_counter()
+        upsert_batch_size = upsert_batch_size or self.BULK_UPSERT_BATCH_SIZE
+        now = datetime.now()  # Use naive datetime for DB
+        params: dict[str, Any] = {
+            "cutoff_date": now - timedelta(days=lookback_days),
+            "min_interactions": min_interactions,
+        }
+        user_clause = ""
+        if user_ids is not None:
+            user_clause = "AND external_user_id = ANY(:user_ids)"
+            params["user_ids"] = list(user_ids)
 
-        dim = len(weighted_embeddings[0][0])
-        aggregated = [0.0] * dim
-        total_weight = 0.0
+        query = text(f"""
+            WITH active_users AS (
+                SELECT external_user_id
+                FROM recommender.user_interactions
+                WHERE created_at >= :cutoff_date
+                {user_clause}
+                GROUP BY external_user_id
+                HAVING COUNT(*) >= :min_interactions
+            )
+            SELECT ui.external_user_id, ui.external_product_id,
+                   ui.interaction_type, ui.created_at
+            FROM recommender.user_interactions ui
+            JOIN active_users au ON au.external_user_id = ui.external_user_id
+            WHERE ui.created_at >= :cutoff_date
+            ORDER BY ui.external_user_id, ui.created_at DESC
+        """)
 
-        for embedding, weight in weighted_embeddings:
-            for i, val in enumerate(embedding):
-                aggregated[i] += val * weight
-            total_weight += weight
+        stats = {"updated": 0, "errors": 0, "total_users": 0}
+        pending_upserts: list[dict[str, Any]] = []
 
-        if total_weight > 0:
-            aggregated = [v / total_weight for v in aggregated]
+        async def flush(force: bool = False) -> None:
+            while pending_upserts and (force or len(pending_upserts) >= upsert_batch_size):
+                batch = pending_upserts[:upsert_batch_size]
+                del pending_upserts[:upsert_batch_size]
+                try:
+                    await self.session.execute(UPSERT_PREFERENCE_QUERY, batch)
+                    await self.session.commit()
+                    stats["updated"] += len(batch)
+                except Exception as e:
+                    await self.session.rollback()
+                    logger.error("Error upserting preference batch", users=len(batch), error=str(e))
+                    stats["errors"] += len(batch)
 
-        # Normalize the vector
-        import math
+        # Reads use their own session so upsert commits do not close the stream's cursor
+        async with get_session_factory()() as read_session:
+            if products is None:
+                products = await self._load_product_matrix(read_session)
+            if products is None:
+                logger.warning("No product embeddings available for preference rebuild")
+                return stats
 
-        norm = math.sqrt(sum(v * v for v in aggregated))
-        if norm > 0:
-            aggregated = [v / norm for v in aggregated]
+            stream = await read_session.stream(query, params)
+            carry: list[Any] = []
+            async for partition in stream.partitions(self.BULK_CHUNK_ROWS):
+                rows = carry + list(partition)
+                # The last user's rows may continue in the next partition
+                cut = len(rows)
+                last_user = rows[-1].external_user_id
+                while cut > 0 and rows[cut - 1].external_user_id == last_user:
+                    cut -= 1
+                rows, carry = rows[:cut], rows[cut:]
+                if rows:
+                    stats["total_users"] += self._reduce_chunk(rows, products, now, pending_upserts)
+                    await flush()
+            if carry:
+                stats["total_users"] += self._reduce_chunk(carry, products, now, pending_upserts)
 
-        return aggregated
+        await flush(force=True)
 
-    async def _upsert_user_preference(
+        logger.info(
+            "Rebuilt user preferences",
+            seconds=round(time.perf_counter() - started_at, 2),
+            **stats,
+        )
+        return stats
+
+    async def update_dirty_users(
         self,
-        user_id: str,
-        embedding: list[float],
-        top_categories: list[str],
-        avg_price_min: int | None,
-        avg_price_max: int | None,
-        interaction_count: int,
+        min_interactions: int = 3,
+        lookback_days: int = 90,
+        chunk_size: int | None = None,
+        concurrency: int | None = None,
+    ) -> dict[str, int]:
+        """
+        Rebuild preferences only for users with interactions written since their last rebuild.
+
+        Every interaction write marks its users in
+        ``recommender.preference_dirty_users`` (see :func:`mark_dirty_users`),
+        whatever the interaction's own timestamp, and a successful rebuild
+        clears the mark. Online updates do not clear it, so users tracked live
+        still get their categories, interests and lookback window recomputed.
+        Decay scales all of a user's weights equally, so a clean user's vector
+        only changes when old interactions leave the lookback window; those
+        are left to full rebuilds.
+
+        Args:
+            min_interactions: Minimum interactions required to build preference
+            lookback_days: Number of days of interactions to use
+            chunk_size: Users per rebuild chunk
+            concurrency: Chunks rebuilt concurrently, each in its own session
+
+        Returns:
+            Summary of the operation
+        """
+        return await self.rebuild_dirty_users(
+            min_interactions=min_interactions,
+            lookback_days=lookback_days,
+            chunk_size=chunk_size,
+            concurrency=concurrency,
+        )
+
+    async def rebuild_dirty_users(
+        self,
+        min_interactions: int = 3,
+        lookback_days: int = 90,
+        chunk_size: int | None = None,
+        concurrency: int | None = None,
+        shard_index: int = 0,
+        shard_count: int = 1,
+    ) -> dict[str, int]:
+        """
+        Rebuild the dirty users of one hash partition.
+
+        Dirty users are rebuilt in chunks of ``chunk_size``, up to
+        ``concurrency`` chunks at a time, sharing one product matrix. Each
+        chunk that rebuilt without errors clears its users' marks, except for
+        users marked again while it ran. Retries are idempotent: a repeated
+        call continues with whoever is still dirty.
+
+        Args:
+            min_interactions: Minimum interactions required to build preference
+            lookback_days: Number of days of interactions to use
+            chunk_size: Users per rebuild chunk
+            concurrency: Chunks rebuilt concurrently, each in its own session
+            shard_index: Partition to rebuild, in ``range(shard_count)``
+            shard_count: Number of hash partitions of the user id space
+
+        Returns:
+            Summary of the operation
+        """
+        settings = get_settings()
+        chunk_size = chunk_size or settings.preference_rebuild_chunk_size
+        concurrency = concurrency or settings.preference_rebuild_concurrency
+
+        dirty_users = await self.find_dirty_users(shard_index, shard_count)
+        stats = {"dirty_users": len(dirty_users), "updated": 0, "errors": 0, "total_users": 0}
+        if not dirty_users:
+            return stats
+
+        async with get_session_factory()() as read_session:
+            products = await self._load_product_matrix(read_session)
+        if products is None:
+            logger.warning("No product embeddings available for preference rebuild")
+            stats["errors"] = len(dirty_users)
+            return stats
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def rebuild_chunk(chunk: list[str]) -> dict[str, int]:
+            async with semaphore, get_session_factory()() as session:
+                service = UserPreferenceService(session)
+                result = await service.rebuild_all_users(
+                    min_interactions=min_interactions,
+                    lookback_days=lookback_days,
+                    user_ids=chunk,
+                    products=products,
+                )
+                if result["errors"] == 0:
+                    await service.clear_dirty_users({u: dirty_users[u] for u in chunk})
+                return result
+
+        user_ids = list(dirty_users)
+        chunks = [user_ids[i : i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+        for result in await asyncio.gather(*(rebuild_chunk(c) for c in chunks)):
+            for key in ("updated", "errors", "total_users"):
+                stats[key] += result[key]
+
+        logger.info(
+            "Updated dirty user preferences", shard=f"{shard_index}/{shard_count}", **stats
+        )
+        return stats
+
+    async def find_dirty_users(
+        self, shard_index: int = 0, shard_count: int = 1
+    ) -> dict[str, datetime]:
+        """Users marked dirty, with the time of their latest mark, in user id order.
+
+        With ``shard_count > 1`` only users whose id hashes to ``shard_index``
+        are returned; the partitions are disjoint and cover every user.
+        """
+        shard_clause = ""
+        if shard_count > 1:
+            shard_clause = (
+                "WHERE ((hashtext(external_user_id) % :shard_count) + :shard_count)"
+                " % :shard_count = :shard_index"
+            )
+        query = text(f"""
+            SELECT external_user_id, marked_at
+            FROM recommender.preference_dirty_users
+            {shard_clause}
+            ORDER BY external_user_id
+        """)
+        result = await self.session.execute(
+            query, {"shard_index": shard_index, "shard_count": shard_count}
+        )
+        return {row.external_user_id: row.marked_at for row in result.fetchall()}
+
+    async def clear_dirty_users(self, marks: dict[str, datetime]) -> None:
+        """Clear the marks read by :meth:`find_dirty_users`; newer marks are kept."""
+        await self.session.execute(
+            text("""
+                DELETE FROM recommender.preference_dirty_users d
+                USING unnest(CAST(:user_ids AS text[]), CAST(:marked_at AS timestamp[]))
+                    AS m(external_user_id, marked_at)
+                WHERE d.external_user_id = m.external_user_id
+                AND d.marked_at <= m.marked_at
+            """),
+            {"user_ids": list(marks), "marked_at": list(marks.values())},
+        )
+        await self.session.commit()
+
+    async def load_shard_checkpoint(
+        self, run_id: str, shard_index: int, shard_count: int
+    ) -> dict[str, int] | None:
+        """Result of a shard that already completed cleanly in run ``run_id``, if any."""
+        result = await self.session.execute(
+            text("""
+                SELECT status, last_sync_cursor, records_synced
+                FROM recommender.sync_status
+                WHERE id = :id
+            """),
+            {"id": self._shard_checkpoint_id(shard_index, shard_count)},
+        )
+        row = result.fetchone()
+        if row and row.status == "done" and row.last_sync_cursor == run_id:
+            return {"dirty_users": row.records_synced, "updated": row.records_synced, "errors": 0}
+        return None
+
+    async def save_shard_checkpoint(
+        self,
+        run_id: str,
+        shard_index: int,
+        shard_count: int,
+        status: str,
+        updated: int = 0,
+        error_message: str | None = None,
     ) -> None:
-        """Upsert user preference embedding to database."""
+        """Record a shard's progress (``running``, ``done`` or ``error``) for run ``run_id``."""
+        await self.session.execute(
+            text("""
+                INSERT INTO recommender.sync_status
+                (id, status, last_sync_cursor, records_synced, last_sync_at, updated_at, error_message)
+                VALUES (:id, :status, :run_id, :records_synced, :now, :now, :error_message)
+                ON CONFLICT (id) DO UPDATE SET
+                    status = :status,
+                    last_sync_cursor = :run_id,
+                    records_synced = :records_synced,
+                    last_sync_at = :now,
+                    updated_at = :now,
+                    error_message = :error_message
+            """),
+            {
+                "id": self._shard_checkpoint_id(shard_index, shard_count),
+                "status": status,
+                "run_id": run_id,
+                "records_synced": updated,
+                "now": datetime.now(),
+                "error_message": error_message,
+            },
+        )
+        await self.session.commit()
+
+    def _shard_checkpoint_id(self, shard_index: int, shard_count: int) -> str:
+        return f"{self.SHARD_CHECKPOINT_PREFIX}:{shard_index}/{shard_count}"
+
+    async def _load_product_matrix(self, session: AsyncSession) -> ProductMatrix | None:
+        """Load every product embedding into one matrix keyed by external product id."""
+        result = await session.execute(
+            text("""
+                SELECT external_product_id, embedding, category, price_cents
+                FROM recommender.product_embeddings
+                WHERE embedding IS NOT NULL
+            """)
+        )
+        rows = result.fetchall()
+        vectors, positions = stack_vectors(r.embedding for r in rows)
+        if vectors.shape[0] == 0:
+            return None
+        kept = [rows[i] for i in positions]
+        return ProductMatrix(
+            index={r.external_product_id: i for i, r in enumerate(kept)},
+            vectors=vectors,
+            categories=[r.category for r in kept],
+            price_cents=np.array([r.price_cents or 0 for r in kept], dtype=np.int64),
+        )
+
+    def _reduce_chunk(
+        self,
+        rows: list[Any],
+        products: ProductMatrix,
+        now: datetime,
+        out: list[dict[str, Any]],
+    ) -> int:
+        """
+        Reduce user-ordered interaction rows into upsert parameters.
+
+        Rows must be grouped by user and newest first within a user.
+
+        Args:
+            rows: Interaction rows for complete users
+            products: Product embedding matrix
+            now: Reference time for recency decay
+            out: List the upsert parameters are appended to
+
+        Returns:
+            Number of distinct users in ``rows``
+        """
+        users_in_chunk = len({r.external_user_id for r in rows})
+
+        # Inner join with product embeddings, done in memory
+        product_rows = np.fromiter(
+            (products.index.get(r.external_product_id, -1) for r in rows),
+            dtype=np.int64,
+            count=len(rows),
+        )
+        kept = np.flatnonzero(product_rows >= 0)
+        if kept.size == 0:
+            return users_in_chunk
+        product_rows = product_rows[kept]
+        rows = [rows[i] for i in kept]
+
+        user_ids = np.array([r.external_user_id for r in rows], dtype=object)
+        starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+        ends = np.r_[starts[1:], len(rows)]
+
+        base_weights = np.fromiter(
+            (self.INTERACTION_WEIGHTS.get(r.interaction_type, 1.0) for r in rows),
+            dtype=np.float32,
+            count=len(rows),
+        )
+        created_at = np.array([r.created_at for r in rows], dtype="datetime64[us]")
+        days_old = (
+            (np.datetime64(now, "us") - created_at) // np.timedelta64(1, "D")
+        ).astype(np.float32)
+        weights = base_weights * self._calculate_recency_weights(days_old)
+
+        # Normalising the sum gives the same direction as weighted_mean
+        sums, totals = segment_weighted_sums(products.vectors, product_rows, weights, starts)
+        embeddings = normalize(sums)
+
+        # Price range over priced products only; 0 marks a user with no prices
+        prices = products.price_cents[product_rows]
+        price_max = np.maximum.reduceat(prices, starts)
+        price_min = np.minimum.reduceat(
+            np.where(prices > 0, prices, np.iinfo(np.int64).max), starts
+        )
+
+        for user_index, (start, end) in enumerate(zip(starts.tolist(), ends.tolist(), strict=True)):
+            segment = product_rows[start:end]
+            categories = Counter(c for c in (products.categories[i] for i in segment) if c)
+            has_prices = price_max[user_index] > 0
+            out.append(
+                self._preference_params(
+                    user_ids[start],
+                    embeddings[user_index],
+                    sums[user_index],
+                    float(totals[user_index]),
+                    self._build_interests(segment, products.vectors[segment], weights[start:end]),
+                    [category for category, _ in categories.most_common(5)],
+                    int(price_min[user_index]) if has_prices else None,
+                    int(price_max[user_index]) if has_prices else None,
+                    end - start,
+                    now,
+                )
+            )
+        return users_in_chunk
+
+    async def apply_interaction(
+        self,
+        user_id: str,
+        product_id: str,
+        interaction_type: str,
+        occurred_at: datetime | None = None,
+    ) -> dict[str, Any]:
+        """
+        Fold one interaction into the user's preference embedding in O(1).
+
+        The row keeps a running weighted sum of product vectors and its total
+        weight, both decayed to ``decay_updated_at``. Because decay is
+        exponential, moving the state from ``t0`` to ``t1`` is one multiply by
+        ``exp(-(t1 - t0) / RECENCY_DECAY_DAYS)``; the new product vector is then
+        added with its interaction weight. No interaction history is read.
+        Events older than the state are added with their own decay instead.
+
+        Args:
+            user_id: The user's ID
+            product_id: The product interacted with
+            interaction_type: Interaction type as stored (e.g. ``PURCHASE``)
+            occurred_at: When the interaction happened (naive; defaults to now)
+
+        Returns:
+            Summary of the operation
+        """
         now = datetime.now()  # Use naive datetime for DB
+        occurred_at = occurred_at or now
+        base_weight = self.INTERACTION_WEIGHTS.get(interaction_type.upper(), 1.0)
 
-        query = text("""
-            INSERT INTO recommender.user_preference_embeddings
-            (external_user_id, embedding, top_categories, avg_price_min, avg_price_max,
-             interaction_count, created_at, updated_at, last_active_at)
-            VALUES
-            (:user_id, :embedding, :top_categories, :avg_price_min, :avg_price_max,
-             :interaction_count, :now, :now, :now)
-            ON CONFLICT (external_user_id) DO UPDATE SET
-                embedding = :embedding,
-                top_categories = :top_categories,
-                avg_price_min = :avg_price_min,
-                avg_price_max = :avg_price_max,
-                interaction_count = :interaction_count,
-                updated_at = :now,
-                last_active_at = :now
-        """)
+        result = await self.session.execute(
+            text("""
+                SELECT embedding, category, price_cents
+                FROM recommender.product_embeddings
+                WHERE external_product_id = :product_id
+                AND embedding IS NOT NULL
+            """),
+            {"product_id": product_id},
+        )
+        product = result.fetchone()
+        vector = as_vector(product.embedding) if product else None
+        if vector is None:
+            return {"user_id": user_id, "applied": False, "reason": "no_product_embedding"}
 
+        # Serialise concurrent updates for the same user. The row lock alone is
+        # not enough: a user without a row yet has nothing to lock, and two
+        # first interactions would each start from an empty state
         await self.session.execute(
-            query,
+            text("SELECT pg_advisory_xact_lock(hashtext(:user_id))"), {"user_id": user_id}
+        )
+        result = await self.session.execute(
+            text("""
+                SELECT embedding, weighted_sum, total_weight, decay_updated_at,
+                       interest_centroids, interest_weights, top_categories
+                FROM recommender.user_preference_embeddings
+                WHERE external_user_id = :user_id
+                FOR UPDATE
+            """),
+            {"user_id": user_id},
+        )
+        current = result.fetchone()
+
+        weighted_sum, total_weight, state_at = self._load_running_state(current, vector, occurred_at)
+        if weighted_sum.shape != vector.shape:
+            # Embedding dimension changed; start the running state over
+            weighted_sum, total_weight = np.zeros_like(vector), 0.0
+
+        age_days = (occurred_at - state_at).total_seconds() / 86400
+        if age_days >= 0:
+            decay, weight = float(np.exp(-age_days / self.RECENCY_DECAY_DAYS)), base_weight
+            state_at = occurred_at
+        else:
+            decay, weight = 1.0, base_weight * float(np.exp(age_days / self.RECENCY_DECAY_DAYS))
+        weighted_sum = weighted_sum * decay + weight * vector
+        total_weight = total_weight * decay + weight
+        interests = self._update_interests(current, vector, weight, decay)
+
+        top_categories = _json_list(current.top_categories) if current else []
+        if product.category and product.category not in top_categories and len(top_categories) < 5:
+            top_categories.append(product.category)
+
+        await self.session.execute(
+            APPLY_INTERACTION_QUERY,
             {
                 "user_id": user_id,
-                "embedding": json.dumps(embedding),
+                "embedding": to_json(normalize(weighted_sum)),
+                "weighted_sum": to_json(weighted_sum),
+                "total_weight": total_weight,
+                "decay_updated_at": state_at,
+                **self._interest_params(*interests),
                 "top_categories": json.dumps(top_categories),
-                "avg_price_min": avg_price_min / 100 if avg_price_min else None,
-                "avg_price_max": avg_price_max / 100 if avg_price_max else None,
-                "interaction_count": interaction_count,
+                "price": product.price_cents / 100 if product.price_cents else None,
                 "now": now,
             },
         )
         await self.session.commit()
+
+        return {"user_id": user_id, "applied": True, "total_weight": total_weight}
+
+    def _load_running_state(
+        self, current: Any, vector: np.ndarray, occurred_at: datetime
+    ) -> tuple[np.ndarray, float, datetime]:
+        """Running ``(weighted_sum, total_weight, as_of)`` for a preference row.
+
+        Rows written before the running state existed only have a normalised
+        embedding; it is carried forward as one unit of weight until the next
+        rebuild replaces it.
+        """
+        if current is None:
+            return np.zeros_like(vector), 0.0, occurred_at
+
+        weighted_sum = as_vector(current.weighted_sum)
+        if weighted_sum is not None and current.decay_updated_at is not None:
+            return weighted_sum, float(current.total_weight or 0.0), current.decay_updated_at
+
+        embedding = as_vector(current.embedding)
+        if embedding is None:
+            return np.zeros_like(vector), 0.0, occurred_at
+        return embedding, 1.0, occurred_at
+
+    def _build_interests(
+        self, keys: np.ndarray, vectors: np.ndarray, weights: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Cluster a user's weighted item vectors into interest centroids.
+
+        Repeat interactions with one product are merged first. Only products
+        with a positive net weight take part; clusters below
+        ``PREFERENCE_MIN_INTEREST_SHARE`` of the total are dropped, keeping at
+        least the heaviest one.
+
+        Args:
+            keys: ``(n,)`` product key of each interaction
+            vectors: ``(n, d)`` product vector of each interaction
+            weights: ``(n,)`` decayed interaction weights
+
+        Returns:
+            ``(k, d)`` unit centroids and their ``(k,)`` decayed weights
+        """
+        settings = get_settings()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        product_weights = np.bincount(inverse, weights=weights)
+        positive = product_weights > 0
+        centroids, cluster_weights = spherical_kmeans(
+            normalize(vectors[first[positive]]),
+            product_weights[positive],
+            settings.preference_max_interests,
+        )
+        if cluster_weights.size:
+            keep = cluster_weights >= settings.preference_min_interest_share * cluster_weights.sum()
+            keep[0] = True
+            centroids, cluster_weights = centroids[keep], cluster_weights[keep]
+        return centroids, cluster_weights
+
+    def _update_interests(
+        self,
+        current: Any,
+        vector: np.ndarray,
+        weight: float,
+        decay: float,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Sequential (online) k-means step for one new interaction.
+
+        Existing interest weights decay like the running sum. A positive
+        interaction moves the most similar centroid towards the product by its
+        share of that cluster's weight, or starts a new interest when no
+        centroid is within ``NEW_INTEREST_SIMILARITY`` and there is room.
+        """
+        centroids = np.empty((0, vector.shape[0]), dtype=np.float32)
+        weights = np.empty(0, dtype=np.float32)
+        if current is not None and current.interest_centroids:
+            centroids = unpack_vectors(current.interest_centroids, vector.shape[0])
+            weights = np.asarray(_json_list(current.interest_weights), dtype=np.float32)
+            if weights.shape[0] != centroids.shape[0]:
+                weights = np.ones(centroids.shape[0], dtype=np.float32)
+        weights = weights * decay
+        if weight <= 0:
+            return centroids, weights
+
+        unit = normalize(vector)
+        similarities = centroids @ unit
+        if centroids.shape[0] < get_settings().preference_max_interests and (
+            similarities.size == 0 or similarities.max() < self.NEW_INTEREST_SIMILARITY
+        ):
+            return (
+                np.vstack([centroids, unit]),
+                np.append(weights, np.float32(weight)),
+            )
+
+        nearest = int(np.argmax(similarities))
+        centroids[nearest] = normalize(centroids[nearest] * weights[nearest] + unit * weight)
+        weights[nearest] += weight
+        return centroids, weights
+
+    def _calculate_recency_weights(self, days_old: np.ndarray) -> np.ndarray:
+        """Calculate recency decay weights for an array of interaction ages."""
+        return np.exp(-days_old / self.RECENCY_DECAY_DAYS)
+
+    def _aggregate_weighted_embeddings(
+        self, embeddings: np.ndarray, weights: np.ndarray
+    ) -> np.ndarray:
+        """Aggregate ``(n, d)`` embeddings into one normalized vector."""
+        return weighted_mean(embeddings, weights)
+
+    async def _upsert_user_preference(
+        self,
+        user_id: str,
+        embedding: np.ndarray,
+        weighted_sum: np.ndarray,
+        total_weight: float,
+        interests: tuple[np.ndarray, np.ndarray],
+        top_categories: list[str],
+        avg_price_min: int | None,
+        avg_price_max: int | None,
+        interaction_count: int,
+        now: datetime,
+    ) -> None:
+        """Upsert user preference embedding to database."""
+        await self.session.execute(
+            UPSERT_PREFERENCE_QUERY,
+            self._preference_params(
+                user_id,
+                embedding,
+                weighted_sum,
+                total_weight,
+                interests,
+                top_categories,
+                avg_price_min,
+                avg_price_max,
+                interaction_count,
+                now,
+            ),
+        )
+        await self.session.commit()
+
+    def _preference_params(
+        self,
+        user_id: str,
+        embedding: np.ndarray,
+        weighted_sum: np.ndarray,
+        total_weight: float,
+        interests: tuple[np.ndarray, np.ndarray],
+        top_categories: list[str],
+        avg_price_min: int | None,
+        avg_price_max: int | None,
+        interaction_count: int,
+        now: datetime,
+    ) -> dict[str, Any]:
+        """Build the bind parameters for ``UPSERT_PREFERENCE_QUERY``.
+
+        ``weighted_sum``, ``total_weight`` and the interest weights are the
+        decayed running state as of ``now``, which ``apply_interaction``
+        continues from.
+        """
+        return {
+            "user_id": user_id,
+            "embedding": to_json(embedding),
+            "weighted_sum": to_json(weighted_sum),
+            "total_weight": total_weight,
+            **self._interest_params(*interests),
+            "top_categories": json.dumps(top_categories),
+            "avg_price_min": avg_price_min / 100 if avg_price_min else None,
+            "avg_price_max": avg_price_max / 100 if avg_price_max else None,
+            "interaction_count": interaction_count,
+            "now": now,
+        }
+
+    def _interest_params(self, centroids: np.ndarray, weights: np.ndarray) -> dict[str, Any]:
+        """Bind parameters for the interest columns (float16 centroids, JSON weights)."""
+        return {
+            "interest_centroids": pack_vectors(centroids) if len(centroids) else None,
+            "interest_weights": json.dumps([round(float(w), 6) for w in weights]),
+        }
@@ -0,0 +1,37 @@
+"""Product change listener entry point.
+
+Runs one :class:`ProductChangeListener` until SIGINT/SIGTERM. One listener
+process per deployment is enough; more would sync the same changes twice.
+"""
+
+import asyncio
+import signal
+
+import structlog
+
+from recommendation_service.infrastructure.redis.client import close_redis
+from sync_worker.services.product_listener import ProductChangeListener
+
+logger = structlog.get_logger()
+
+
+async def main() -> None:
+    """Listen for product changes until asked to stop."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await ProductChangeListener().run(stop)
+    finally:
+        await close_redis()
+
+
+def run() -> None:
+    """Run the product change listener."""
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()
@@ -16,6 +16,7 @@ app = Celery(
         "sync_worker.tasks.sync_products",
         "sync_worker.tasks.sync_orders",
         "sync_worker.tasks.update_embeddings",
+        "sync_worker.tasks.maintenance",
     ],
 )
 
@@ -65,6 +66,11 @@ app.conf.beat_schedule = {
         "task": "sync_worker.tasks.update_embeddings.refresh_analytics_views",
         "schedule": crontab(minute=0, hour=2),
     },
+    # Create, roll up and drop monthly interaction partitions daily at 3 AM
+    "maintain-interaction-partitions": {
+        "task": "sync_worker.tasks.maintenance.maintain_interaction_partitions",
+        "schedule": crontab(minute=0, hour=3),
+    },
 }
 
 
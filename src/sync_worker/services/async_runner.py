@@ -0,0 +1,20 @@
+"""Run async service code from synchronous Celery tasks."""
+
+import asyncio
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# One loop per worker process. The database engine's pooled connections are
+# bound to the loop that opened them, so a fresh loop per task (asyncio.run)
+# would strand them.
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on the worker's persistent event loop."""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
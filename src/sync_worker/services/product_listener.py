@@ -0,0 +1,244 @@
+"""Near-real-time product sync driven by Postgres LISTEN/NOTIFY.
+
+A trigger on ``public.products`` sends the id of every changed product on the
+``recommender_product_changes`` channel. :class:`ProductChangeListener` holds
+one dedicated asyncpg connection that LISTENs on it, collects ids for
+``PRODUCT_LISTENER_DEBOUNCE_SECONDS`` after the first notification of a burst
+and then syncs the whole set with one bulk upsert (see
+:meth:`~recommendation_service.services.product_sync.ProductSyncService.sync_products_by_id`),
+which also pushes stock, price and active flag changes to the API catalog
+caches.
+
+Notifications sent while the listener is disconnected are lost, so every
+(re)connect queues a regular incremental product sync to catch up. The same
+catch-up covers ids the listener gives up on: notifications ignored while
+``PRODUCT_LISTENER_MAX_PENDING`` ids are already pending, and products whose
+sync keeps failing on their own.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from itertools import chain
+from typing import Any
+
+import asyncpg
+import kombu.exceptions
+import redis.exceptions
+import sqlalchemy.exc
+import structlog
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.database.connection import get_db_session
+from recommendation_service.services.product_sync import ProductSyncService
+from sync_worker.tasks.sync_products import sync_products_from_ecommerce
+from sync_worker.tasks.update_embeddings import reembed_products
+
+logger = structlog.get_logger()
+
+# Must match the channel used by the notify_product_change() trigger function
+PRODUCT_CHANGES_CHANNEL = "recommender_product_changes"
+
+# Seconds between connection health checks, and before reconnecting after an error
+HEALTH_CHECK_SECONDS = 30.0
+RECONNECT_DELAY_SECONDS = 5.0
+
+
+async def sync_changed_products(product_ids: list[str]) -> dict[str, int]:
+    """Sync one batch of changed products and queue re-embedding where needed."""
+    async with get_db_session() as session:
+        return await ProductSyncService(session).sync_products_by_id(
+            product_ids, on_stale=reembed_products.delay
+        )
+
+
+def queue_catch_up_sync() -> None:
+    """Queue an incremental product sync for changes missed or dropped by the listener."""
+    sync_products_from_ecommerce.delay()
+
+
+def is_unavailable(error: BaseException | None) -> bool:
+    """Whether a sync failed because the database, Redis or the broker was unreachable.
+
+    Such failures say nothing about the products in the batch, so the batch is
+    kept whole for the next flush instead of being bisected.
+    """
+    seen: set[int] = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(
+            error,
+            (
+                OSError,
+                TimeoutError,
+                asyncpg.PostgresConnectionError,
+                sqlalchemy.exc.OperationalError,
+                sqlalchemy.exc.InterfaceError,
+                redis.exceptions.ConnectionError,
+                redis.exceptions.TimeoutError,
+                kombu.exceptions.OperationalError,
+            ),
+        ):
+            return True
+        error = getattr(error, "orig", None) or error.__cause__
+    return False
+
+
+class ProductChangeListener:
+    """
+    LISTENs for product change notifications and syncs them in debounced batches.
+
+    A batch that fails because a service is unreachable stays pending and is
+    retried whole. Any other failure is blamed on the products: the batch is
+    bisected until the failing ids are alone, the rest are synced, and an id
+    that fails alone ``PRODUCT_LISTENER_MAX_ATTEMPTS`` times is logged and
+    dropped. At most ``PRODUCT_LISTENER_MAX_PENDING`` ids are kept; once that
+    many are pending further notifications are ignored and a catch-up sync is
+    queued when the backlog is drained.
+    """
+
+    def __init__(
+        self,
+        dsn: str | None = None,
+        debounce_seconds: float | None = None,
+        max_batch: int | None = None,
+        sync: Callable[[list[str]], Awaitable[Any]] = sync_changed_products,
+        on_connect: Callable[[], Any] | None = queue_catch_up_sync,
+        on_overflow: Callable[[], Any] | None = queue_catch_up_sync,
+        max_pending: int | None = None,
+        max_attempts: int | None = None,
+    ):
+        settings = get_settings()
+        self.dsn = dsn or settings.database_url_sync
+        self.debounce_seconds = (
+            settings.product_listener_debounce_seconds
+            if debounce_seconds is None
+            else debounce_seconds
+        )
+        self.max_batch = max_batch or settings.product_sync_batch_size
+        self.sync = sync
+        self.on_connect = on_connect
+        self.on_overflow = on_overflow
+        self.max_pending = max_pending or settings.product_listener_max_pending
+        self.max_attempts = max(1, max_attempts or settings.product_listener_max_attempts)
+        self.pending: dict[str, None] = {}
+        # Failed syncs per product id that failed on its own
+        self.attempts: dict[str, int] = {}
+        self.overflowed = False
+        self._wake = asyncio.Event()
+
+    def notify(self, _connection: Any, _pid: int, _channel: str, payload: str) -> None:
+        """asyncpg notification callback: remember the product id."""
+        if payload not in self.pending and len(self.pending) >= self.max_pending:
+            if not self.overflowed:
+                logger.warning(
+                    "Product change backlog full, ignoring notifications until it drains",
+                    max_pending=self.max_pending,
+                )
+            self.overflowed = True
+        else:
+            self.pending[payload] = None
+        self._wake.set()
+
+    async def flush(self) -> int:
+        """
+        Sync up to ``max_batch`` pending ids.
+
+        Returns:
+            Number of ids synced (0 if nothing could be synced)
+        """
+        product_ids = list(self.pending)[: self.max_batch]
+        if not product_ids:
+            return 0
+        for product_id in product_ids:
+            del self.pending[product_id]
+
+        synced = 0
+        segments = deque([product_ids])
+        while segments:
+            segment = segments.popleft()
+            try:
+                await self.sync(segment)
+            except Exception as e:
+                if is_unavailable(e):
+                    # Keep everything not synced yet, in order, for the next flush
+                    self.pending = dict.fromkeys(chain(segment, *segments, self.pending))
+                    logger.error("Product change sync failed", products=len(segment), error=str(e))
+                    return synced
+                if len(segment) > 1:
+                    half = len(segment) // 2
+                    segments.extendleft((segment[half:], segment[:half]))
+                else:
+                    self._fail_alone(segment[0], e)
+                continue
+            synced += len(segment)
+            for product_id in segment:
+                self.attempts.pop(product_id, None)
+
+        logger.info("Product changes synced", products=synced)
+        if self.overflowed and not self.pending:
+            self.overflowed = False
+            if self.on_overflow is not None:
+                self.on_overflow()
+        return synced
+
+    def _fail_alone(self, product_id: str, error: Exception) -> None:
+        """Queue a product that failed on its own for retry, or drop it after ``max_attempts``."""
+        attempts = self.attempts.get(product_id, 0) + 1
+        if attempts < self.max_attempts:
+            self.attempts[product_id] = attempts
+            # Retried after the ids already pending
+            self.pending.pop(product_id, None)
+            self.pending[product_id] = None
+            return
+        self.attempts.pop(product_id, None)
+        logger.error(
+            "Dropping product change that keeps failing",
+            product_id=product_id,
+            attempts=attempts,
+            error=str(error),
+        )
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Listen and sync until ``stop`` is set, reconnecting after errors."""
+        stop_task = asyncio.create_task(stop.wait())
+        try:
+            while not stop.is_set():
+                try:
+                    await self._listen(stop, stop_task)
+                except Exception as e:
+                    logger.error("Product change listener error", error=str(e))
+                    await asyncio.wait([stop_task], timeout=RECONNECT_DELAY_SECONDS)
+        finally:
+            stop_task.cancel()
+        logger.info("Product change listener stopped")
+
+    async def _listen(self, stop: asyncio.Event, stop_task: asyncio.Task) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            await connection.add_listener(PRODUCT_CHANGES_CHANNEL, self.notify)
+            logger.info("Listening for product changes", channel=PRODUCT_CHANGES_CHANNEL)
+            if self.on_connect is not None:
+                self.on_connect()
+
+            while not stop.is_set():
+                wake_task = asyncio.create_task(self._wake.wait())
+                done, _ = await asyncio.wait(
+                    [wake_task, stop_task],
+                    timeout=HEALTH_CHECK_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                wake_task.cancel()
+                if not done:
+                    # Idle for a while: make sure the connection is still alive
+                    await connection.execute("SELECT 1")
+                if not self.pending:
+                    self._wake.clear()
+                    continue
+                # Let the rest of the burst arrive, then sync it in batches
+                await asyncio.wait([stop_task], timeout=self.debounce_seconds)
+                self._wake.clear()
+                while self.pending and await self.flush():
+                    pass
+        finally:
+            await connection.close()
@@ -0,0 +1,42 @@
+"""Database maintenance tasks."""
+
+from datetime import datetime, timedelta
+
+import structlog
+from celery import shared_task
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.database.connection import get_db_session
+from recommendation_service.services.event_dedup import prune_event_ids
+from recommendation_service.services.interaction_partitions import InteractionPartitionService
+from sync_worker.services.async_runner import run_async
+
+logger = structlog.get_logger()
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=600)
+def maintain_interaction_partitions(self) -> dict:
+    """
+    Keep the monthly user_interactions partitions in shape.
+
+    Creates the partitions for the coming months, rolls months past the raw
+    retention window into daily counts and drops them, and prunes daily
+    counts past their own retention and event ids past the dedup window.
+
+    Returns:
+        dict: Summary of the maintenance pass
+    """
+    logger.info("Maintaining interaction partitions")
+
+    async def maintain() -> dict:
+        async with get_db_session() as session:
+            summary = await InteractionPartitionService(session).maintain()
+            window = timedelta(seconds=get_settings().interaction_dedup_window_seconds)
+            summary["event_ids_pruned"] = await prune_event_ids(session, datetime.now() - window)
+            return summary
+
+    try:
+        return run_async(maintain())
+    except Exception as exc:
+        logger.error("Interaction partition maintenance failed", error=str(exc))
+        raise self.retry(exc=exc) from exc
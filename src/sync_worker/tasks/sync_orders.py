@@ -3,35 +3,45 @@
 import structlog
 from celery import shared_task
 
+from recommendation_service.infrastructure.database.connection import get_db_session
+from recommendation_service.services.order_sync import OrderSyncService
+from sync_worker.services.async_runner import run_async
+
 logger = structlog.get_logger()
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=300)
 def sync_orders_from_ecommerce(self) -> dict:
     """
-    Synchronize orders from the e-commerce API.
+    Synchronize orders created since the last run.
 
     This task:
-    1. Fetches recent orders from the e-commerce API
-    2. Records purchase interactions for each order item
-    3. Updates user activity timestamps
+    1. Reads the ``createdAt`` watermark from the sync_status table
+    2. Pages through new orders in ``("createdAt", id)`` order
+    3. Records a purchase interaction for each order line
+    4. Increments the co-purchase counts and advances the watermark with
+       each page
+
+    A retry resumes after the last committed page.
 
     Returns:
         dict: Summary of sync operation
     """
-    logger.info("Starting order sync from e-commerce API")
+    logger.info("Starting order sync from e-commerce")
+
+    async def sync() -> dict:
+        async with get_db_session() as session:
+            return await OrderSyncService(session).sync_orders()
 
-    # TODO: Implement actual sync logic
-    # 1. Get last sync timestamp
-    # 2. Fetch orders since last sync
-    # 3. For each order:
-    #    - Record purchase interactions
-    #    - Update user last_active_at
-    # 4. Update sync_status
+    try:
+        result = run_async(sync())
+    except Exception as exc:
+        logger.error("Order sync failed", error=str(exc))
+        raise self.retry(exc=exc) from exc
 
     return {
-        "orders_synced": 0,
-        "interactions_created": 0,
-        "users_updated": 0,
-        "errors": 0,
+        "orders_synced": result["orders_synced"],
+        "interactions_created": result["interactions_created"],
+        "copurchase_pairs_updated": result["pairs_updated"],
+        "orders_skipped": result["orders_skipped"],
     }
@@ -3,44 +3,70 @@
 import structlog
 from celery import shared_task
 
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.database.connection import get_db_session
+from recommendation_service.infrastructure.http.ecommerce import get_ecommerce_client
+from recommendation_service.services.product_sync import ProductSyncService
+from sync_worker.services.async_runner import run_async
+from sync_worker.tasks.update_embeddings import reembed_products
+
 logger = structlog.get_logger()
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=300)
-def sync_products_from_ecommerce(self) -> dict:
+def sync_products_from_ecommerce(self, full_resync: bool = False) -> dict:
     """
-    Synchronize products from the e-commerce API.
+    Synchronize products changed since the last run.
 
     This task:
-    1. Fetches products from the e-commerce API (paginated)
-    2. Upserts product data to local PostgreSQL
-    3. Marks products for embedding update if changed
+    1. Reads the ``updatedAt`` watermark from the sync_status table
+    2. Pages through changed products in ``("updatedAt", id)`` order, from the
+       shared database or the e-commerce API (``PRODUCT_SYNC_SOURCE``)
+    3. Upserts each batch and advances the watermark with it
+    4. Queues re-embedding for products whose embedding text changed
+
+    A retry resumes after the last committed batch.
+
+    Args:
+        full_resync: Ignore the watermark and sync the whole catalog
 
     Returns:
         dict: Summary of sync operation
     """
-    logger.info("Starting product sync from e-commerce API")
+    logger.info("Starting product sync from e-commerce", full_resync=full_resync)
+
+    async def sync() -> dict:
+        client = (
+            get_ecommerce_client() if get_settings().product_sync_source == "api" else None
+        )
+        async with get_db_session() as session:
+            return await ProductSyncService(session).sync_all_products(
+                full_resync=full_resync, on_stale=reembed_products.delay, client=client
+            )
 
-    # TODO: Implement actual sync logic
-    # 1. Get last sync cursor from sync_status table
-    # 2. Fetch products from e-commerce API
-    # 3. Upsert to products table
-    # 4. Update sync_status with new cursor
+    try:
+        result = run_async(sync())
+    except Exception as exc:
+        logger.error("Product sync failed", error=str(exc))
+        raise self.retry(exc=exc) from exc
 
     return {
-        "products_synced": 0,
-        "products_created": 0,
-        "products_updated": 0,
-        "errors": 0,
+        "products_synced": result["synced"],
+        "products_created": result["created"],
+        "products_updated": result["updated"],
+        "embeddings_queued": result["stale_embeddings"],
+        "errors": result["errors"],
     }
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def sync_single_product(self, external_product_id: str) -> dict:
     """
-    Sync a single product from the e-commerce API.
+    Sync a single product from the shared database now.
 
-    Useful for real-time updates when a product is modified.
+    Useful for real-time updates when a product is modified; the product
+    change listener does the same for batches of notified products. A
+    product that no longer exists is deactivated.
 
     Args:
         external_product_id: The product ID in the e-commerce system
@@ -50,9 +76,23 @@ def sync_single_product(self, external_product_id: str) -> dict:
     """
     logger.info("Syncing single product", external_product_id=external_product_id)
 
-    # TODO: Implement single product sync
+    async def sync() -> dict:
+        async with get_db_session() as session:
+            return await ProductSyncService(session).sync_products_by_id(
+                [external_product_id], on_stale=reembed_products.delay
+            )
+
+    try:
+        result = run_async(sync())
+    except Exception as exc:
+        logger.error(
+            "Single product sync failed", external_product_id=external_product_id, error=str(exc)
+        )
+        raise self.retry(exc=exc) from exc
 
     return {
         "success": True,
         "external_product_id": external_product_id,
+        "changed": bool(result["created"] or result["updated"] or result["deactivated"]),
+        "embedding_queued": bool(result["stale_embeddings"]),
     }
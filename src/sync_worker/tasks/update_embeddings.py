@@ -1,7 +1,17 @@
 """Embedding update tasks for Pinecone."""
 
+from datetime import datetime
+from uuid import uuid4
+
 import structlog
-from celery import shared_task
+from celery import chord, shared_task
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.database.connection import get_db_session
+from recommendation_service.services.catalog_updates import publish_catalog_updates
+from recommendation_service.services.embedding_backfill import EmbeddingBackfillPipeline
+from recommendation_service.services.user_preference import UserPreferenceService
+from sync_worker.services.async_runner import run_async
 
 logger = structlog.get_logger()
 
@@ -15,22 +25,108 @@ def update_stale_embeddings(self) -> dict:
     - The product was updated after its embedding was last generated
     - The product has no embedding at all
 
+    Fans out one shard task per ``id % SYNC_REBUILD_SHARDS`` partition as a
+    chord; ``aggregate_embedding_shards`` runs once all shards finish. Each
+    shard runs the backfill pipeline with its own resumable checkpoint.
+
     Returns:
-        dict: Summary of update operation
+        dict: The dispatched run
     """
-    logger.info("Updating stale product embeddings")
+    shard_count = get_settings().sync_rebuild_shards
+    run_id = self.request.id or uuid4().hex
+    logger.info("Updating stale product embeddings", run_id=run_id, shards=shard_count)
 
-    # TODO: Implement actual logic
-    # 1. Find products where updated_at > embedding_updated_at
-    # 2. Generate content text for each product
-    # 3. Upsert to Pinecone products index
-    # 4. Update embedding_updated_at
+    chord(
+        update_stale_embeddings_shard.s(run_id, shard_index, shard_count)
+        for shard_index in range(shard_count)
+    )(aggregate_embedding_shards.s(run_id))
 
-    return {
-        "products_checked": 0,
-        "embeddings_updated": 0,
-        "errors": 0,
+    return {"run_id": run_id, "shards": shard_count}
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def update_stale_embeddings_shard(self, run_id: str, shard_index: int, shard_count: int) -> dict:
+    """
+    Re-embed the stale products of one partition.
+
+    A retry resumes after the shard's last written product id.
+
+    Args:
+        run_id: ID of the fan-out run
+        shard_index: Partition to process
+        shard_count: Number of partitions
+
+    Returns:
+        dict: Backfill summary for the shard
+    """
+
+    async def backfill() -> dict:
+        async with get_db_session() as session:
+            return await EmbeddingBackfillPipeline(
+                session, shard_index=shard_index, shard_count=shard_count
+            ).run()
+
+    try:
+        result = run_async(backfill())
+    except Exception as exc:
+        logger.error("Embedding shard failed", run_id=run_id, shard=shard_index, error=str(exc))
+        raise self.retry(exc=exc) from exc
+    return {"shard": shard_index, **result}
+
+
+@shared_task
+def aggregate_embedding_shards(results: list[dict], run_id: str) -> dict:
+    """
+    Combine the shard results of an embedding run.
+
+    Args:
+        results: One summary per shard
+        run_id: ID of the fan-out run
+
+    Returns:
+        dict: Summary of update operation
+    """
+    summary = {
+        "run_id": run_id,
+        "products_checked": sum(r["read"] for r in results),
+        "embeddings_updated": sum(r["updated"] for r in results),
+        "errors": sum(r["errors"] for r in results),
     }
+    logger.info("Stale product embeddings updated", shards=len(results), **summary)
+    return summary
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def reembed_products(self, external_product_ids: list[str]) -> dict:
+    """
+    Re-embed products whose embedding was marked stale by product sync.
+
+    Products embedded in the meantime (by a full run) are skipped. Once the
+    new vectors are written, the API catalog caches are told to reload.
+
+    Args:
+        external_product_ids: Products whose content fingerprint changed
+
+    Returns:
+        dict: Backfill summary
+    """
+
+    async def reembed() -> dict:
+        async with get_db_session() as session:
+            result = await EmbeddingBackfillPipeline(
+                session, product_ids=external_product_ids
+            ).run()
+        if result["updated"]:
+            await publish_catalog_updates(invalidate=True)
+        return result
+
+    try:
+        return run_async(reembed())
+    except Exception as exc:
+        logger.error(
+            "Re-embedding products failed", products=len(external_product_ids), error=str(exc)
+        )
+        raise self.retry(exc=exc) from exc
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
@@ -61,28 +157,96 @@ def update_user_preferences_batch(self) -> dict:
     """
     Update user preference vectors for users with recent activity.
 
-    Finds users whose preference vectors are stale and regenerates them
-    based on their recent interaction history.
+    Only users marked dirty by interaction writes since their last rebuild
+    are rebuilt (see ``UserPreferenceService.rebuild_dirty_users``). The user
+    id space is hash-partitioned into ``SYNC_REBUILD_SHARDS`` shard tasks run
+    as a chord; ``aggregate_user_preference_shards`` sums their results.
 
     Returns:
-        dict: Summary of update operation
+        dict: The dispatched run
     """
-    logger.info("Updating user preference vectors")
+    shard_count = get_settings().sync_rebuild_shards
+    run_id = self.request.id or uuid4().hex
+    logger.info("Updating user preference vectors", run_id=run_id, shards=shard_count)
 
-    # TODO: Implement actual logic
-    # 1. Find users with activity since last preference update
-    # 2. For each user:
-    #    - Aggregate recent interactions (weighted by type)
-    #    - Generate preference text
-    #    - Upsert to Pinecone user preferences index
-    # 3. Update preference_vector_updated_at
+    chord(
+        update_user_preferences_shard.s(run_id, shard_index, shard_count)
+        for shard_index in range(shard_count)
+    )(aggregate_user_preference_shards.s(run_id))
 
-    return {
-        "users_checked": 0,
-        "preferences_updated": 0,
-        "errors": 0,
+    return {"run_id": run_id, "shards": shard_count}
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def update_user_preferences_shard(self, run_id: str, shard_index: int, shard_count: int) -> dict:
+    """
+    Rebuild the dirty users of one hash partition.
+
+    Idempotent: a shard already completed in this run returns its recorded
+    result, and a partially completed shard only finds the users still dirty.
+
+    Args:
+        run_id: ID of the fan-out run
+        shard_index: Partition to rebuild
+        shard_count: Number of partitions
+
+    Returns:
+        dict: Rebuild summary for the shard
+    """
+
+    async def rebuild() -> dict:
+        async with get_db_session() as session:
+            service = UserPreferenceService(session)
+            done = await service.load_shard_checkpoint(run_id, shard_index, shard_count)
+            if done is not None:
+                return {**done, "skipped": True}
+
+            await service.save_shard_checkpoint(run_id, shard_index, shard_count, "running")
+            result = await service.rebuild_dirty_users(
+                shard_index=shard_index,
+                shard_count=shard_count,
+            )
+            await service.save_shard_checkpoint(
+                run_id,
+                shard_index,
+                shard_count,
+                "done" if result["errors"] == 0 else "error",
+                updated=result["updated"],
+            )
+            return result
+
+    try:
+        result = run_async(rebuild())
+    except Exception as exc:
+        logger.error("Preference shard failed", run_id=run_id, shard=shard_index, error=str(exc))
+        raise self.retry(exc=exc) from exc
+    return {"shard": shard_index, **result}
+
+
+@shared_task
+def aggregate_user_preference_shards(results: list[dict], run_id: str) -> dict:
+    """
+    Combine the shard results of a preference run.
+
+    Users of a chunk that failed stay dirty and are retried by the next run.
+
+    Args:
+        results: One summary per shard
+        run_id: ID of the fan-out run
+
+    Returns:
+        dict: Summary of update operation
+    """
+    summary = {
+        "run_id": run_id,
+        "users_checked": sum(r["dirty_users"] for r in results),
+        "preferences_updated": sum(r["updated"] for r in results),
+        "errors": sum(r["errors"] for r in results),
     }
 
+    logger.info("User preference vectors updated", shards=len(results), **summary)
+    return summary
+
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def update_user_preference(self, user_id: str) -> dict:
@@ -107,6 +271,46 @@ def update_user_preference(self, user_id: str) -> dict:
     }
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def apply_user_interaction(
+    self,
+    user_id: str,
+    product_id: str,
+    interaction_type: str,
+    occurred_at: str | None = None,
+) -> dict:
+    """
+    Fold a single interaction into the user's preference vector.
+
+    Constant-time update of the decayed running state (see
+    ``UserPreferenceService.apply_interaction``); no history is scanned.
+
+    Args:
+        user_id: The external user ID
+        product_id: The external product ID
+        interaction_type: Interaction type (e.g. ``PURCHASE``)
+        occurred_at: ISO timestamp of the interaction (defaults to now)
+
+    Returns:
+        dict: Update result
+    """
+
+    async def apply() -> dict:
+        async with get_db_session() as session:
+            return await UserPreferenceService(session).apply_interaction(
+                user_id,
+                product_id,
+                interaction_type,
+                datetime.fromisoformat(occurred_at) if occurred_at else None,
+            )
+
+    try:
+        return run_async(apply())
+    except Exception as exc:
+        logger.error("Failed to apply interaction", user_id=user_id, error=str(exc))
+        raise self.retry(exc=exc) from exc
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def refresh_analytics_views(self) -> dict:
     """
@@ -0,0 +1,35 @@
+"""Unit tests for length-bucketed embedding batching."""
+
+import numpy as np
+
+from recommendation_service.infrastructure.vector.batching import (
+    encode_bucketed,
+    plan_batches,
+)
+
+
+def test_plan_batches_respects_token_budget() -> None:
+    """Every planned batch stays within the padded-token budget and size cap."""
+    lengths = np.array([5, 120, 8, 60, 7, 130, 6, 64])
+
+    batches = plan_batches(lengths, token_budget=200, max_batch_size=3)
+
+    assert sorted(np.concatenate(batches).tolist()) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= 3
+        assert len(batch) == 1 or len(batch) * lengths[batch].max() <= 200
+
+
+def test_encode_bucketed_restores_input_order() -> None:
+    """Rows come back aligned with the original texts despite length sorting."""
+    texts = ["a much longer piece of text", "short", "mid length text", "x"]
+    calls: list[list[str]] = []
+
+    def encode(batch: list[str]) -> np.ndarray:
+        calls.append(batch)
+        return np.array([[len(t), 0.0] for t in batch])
+
+    embeddings = encode_bucketed(encode, texts, token_budget=8, max_batch_size=2)
+
+    assert embeddings[:, 0].tolist() == [float(len(t)) for t in texts]
+    assert len(calls) > 1
@@ -0,0 +1,139 @@
+"""Unit tests for the in-process catalog vector cache."""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import orjson
+import pytest
+
+from recommendation_service.services import catalog_updates
+from recommendation_service.services.catalog_cache import (
+    CatalogSnapshot,
+    CatalogVectorCache,
+    allocate_quotas,
+)
+
+
+def _row(product_id: str, embedding: list[float]) -> SimpleNamespace:
+    return SimpleNamespace(
+        external_product_id=product_id,
+        name=f"Product {product_id}",
+        category="Garden",
+        price_cents=1000,
+        stock=5,
+        popularity_score=1.0,
+        embedding=embedding,
+    )
+
+
+def test_catalog_search_respects_exclusions_and_candidate_limit() -> None:
+    """Search skips excluded ids, scores only the most popular candidates, returns floats."""
+    snapshot = CatalogSnapshot.from_rows(
+        [
+            _row("a", [1.0, 0.0]),
+            _row("b", [0.6, 0.8]),
+            _row("c", [0.0, 1.0]),
+            _row("d", [1.0, 0.1]),
+        ]
+    )
+
+    results = snapshot.search(np.array([1.0, 0.0]), limit=3, exclude_ids=["a"], candidate_limit=2)
+
+    assert [r["product_id"] for r in results] == ["b", "c"]
+    assert all(type(r["score"]) is float for r in results)
+    assert results[0]["signal"] == "content"
+    assert "score" not in snapshot.products[1]
+
+
+def test_allocate_quotas_is_proportional_with_a_floor() -> None:
+    """Quotas follow the weights, every interest gets a slot and they sum to the total."""
+    assert allocate_quotas(np.array([6.0, 3.0, 1.0]), 10) == [6, 3, 1]
+    assert allocate_quotas(np.array([100.0, 1.0]), 4) == [3, 1]
+    assert allocate_quotas(np.array([1.0, 1.0, 1.0]), 2) == [1, 1, 0]
+
+
+def test_catalog_search_many_merges_interests_by_quota() -> None:
+    """Each interest fills its own quota from one batched scoring pass."""
+    snapshot = CatalogSnapshot.from_rows(
+        [
+            _row("a1", [1.0, 0.0]),
+            _row("a2", [0.9, 0.1]),
+            _row("a3", [0.8, 0.2]),
+            _row("b1", [0.0, 1.0]),
+            _row("b2", [0.1, 0.9]),
+        ]
+    )
+
+    results = snapshot.search_many(np.array([[1.0, 0.0], [0.0, 1.0]]), quotas=[2, 1])
+
+    assert [(r["product_id"], r["interest"]) for r in results] == [
+        ("a1", 0),
+        ("a2", 0),
+        ("b1", 1),
+    ]
+    assert results[0]["score"] == results[2]["score"] == 1.0
+
+
+def test_catalog_cache_applies_published_stock_updates(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Stock and price are patched in place; deactivating a cached product drops the snapshot."""
+    cache = CatalogVectorCache(ttl_seconds=60)
+    cache._snapshot = CatalogSnapshot.from_rows([_row("a", [1.0, 0.0]), _row("b", [0.0, 1.0])])
+    monkeypatch.setattr(catalog_updates, "get_catalog_cache", lambda: cache)
+
+    catalog_updates.apply_catalog_message(
+        orjson.dumps({"products": [["a", 0, 4500, True], ["zz", 1, 100, False]]})
+    )
+    assert cache.is_fresh()
+    assert cache._snapshot.products[0]["stock"] == 0
+    assert cache._snapshot.products[0]["price"] == 45.0
+
+    catalog_updates.apply_catalog_message(orjson.dumps({"products": [["b", 3, 100, False]]}))
+    assert not cache.is_fresh()
+
+
+class CountingLoader:
+    """Stands in for CatalogVectorCache.load, counting the reloads."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.loads = 0
+
+    async def __call__(self, session) -> CatalogSnapshot:
+        self.loads += 1
+        await asyncio.sleep(self.delay)
+        return CatalogSnapshot.from_rows([_row(f"p{self.loads}", [1.0, 0.0])])
+
+
+async def test_catalog_cache_reloads_once_for_concurrent_readers() -> None:
+    """Readers that miss together wait for a single reload and share its snapshot."""
+    cache = CatalogVectorCache(ttl_seconds=60)
+    cache.load = CountingLoader(delay=0.05)
+
+    snapshots = await asyncio.gather(*(cache.get(session=None) for _ in range(5)))
+
+    assert cache.load.loads == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+
+async def test_catalog_cache_reloads_after_the_ttl() -> None:
+    """A snapshot is reused within the TTL and replaced once it expires."""
+    cache = CatalogVectorCache(ttl_seconds=60)
+    cache.load = CountingLoader()
+
+    first = await cache.get(session=None)
+    first.loaded_at -= 59
+    assert await cache.get(session=None) is first
+
+    first.loaded_at -= 2
+    assert (await cache.get(session=None)).products[0]["product_id"] == "p2"
+    assert cache.load.loads == 2
+
+
+def test_catalog_cache_ttl_of_zero_disables_it() -> None:
+    """With a TTL of 0 the cache is disabled and never considered fresh."""
+    cache = CatalogVectorCache(ttl_seconds=0)
+    cache._snapshot = CatalogSnapshot.from_rows([_row("a", [1.0, 0.0])])
+
+    assert not cache.enabled
+    assert not cache.is_fresh()
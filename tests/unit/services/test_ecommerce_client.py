@@ -0,0 +1,122 @@
+"""Unit tests for the pooled e-commerce API client."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from recommendation_service.infrastructure.http.ecommerce import EcommerceClient
+from recommendation_service.services.product_sync import product_from_api
+
+
+def _catalog_server(total: int, failures: dict[int, int] | None = None):
+    """A stand-in /products endpoint; ``failures`` maps page -> 503s before success."""
+    failures = dict(failures or {})
+    requests: list[int] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        limit = int(request.url.params["limit"])
+        requests.append(page)
+        # Later pages answer first, so ordering must come from the client
+        await asyncio.sleep(0.001 * (10 - page % 10))
+        if failures.get(page):
+            failures[page] -= 1
+            return httpx.Response(503)
+        start = (page - 1) * limit
+        items = [{"id": i} for i in range(start, min(start + limit, total))]
+        return httpx.Response(200, json={"data": items})
+
+    return httpx.MockTransport(handler), requests
+
+
+async def test_iter_pages_prefetches_in_order_and_retries() -> None:
+    """Pages arrive in order despite concurrent requests; a 503 is retried."""
+    transport, requests = _catalog_server(total=23, failures={2: 1})
+    client = EcommerceClient(
+        base_url="http://ecommerce.test",
+        page_size=5,
+        prefetch_pages=3,
+        backoff_seconds=0.001,
+        transport=transport,
+    )
+
+    pages = [page async for page in client.iter_pages("/products")]
+    await client.aclose()
+
+    assert [item["id"] for page in pages for item in page] == list(range(23))
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert requests.count(2) == 2
+    # Never more than prefetch_pages beyond the last page consumed
+    assert max(requests) <= 5 + 2
+
+
+async def test_iter_keyset_does_not_skip_rows_updated_during_the_read() -> None:
+    """Each page continues after the last item, so re-sorted rows shift nothing."""
+    catalog = {f"p{i:02d}": f"2026-10-19T09:{i:02d}:00Z" for i in range(12)}
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        params = dict(request.url.params)
+        requests.append(params)
+        position = (params.get("updatedSince", ""), params.get("afterId", ""))
+        items = sorted(
+            (updated_at, product_id)
+            for product_id, updated_at in catalog.items()
+            if (updated_at, product_id) > position
+            or ("afterId" not in params and updated_at >= position[0])
+        )[: int(params["limit"])]
+        if len(requests) == 1:
+            # A product already read is updated: it moves to the end of the sort
+            catalog["p00"] = "2026-10-19T10:00:00Z"
+        data = [{"id": product_id, "updatedAt": updated_at} for updated_at, product_id in items]
+        return httpx.Response(200, json={"data": data})
+
+    client = EcommerceClient(
+        base_url="http://ecommerce.test", page_size=5, transport=httpx.MockTransport(handler)
+    )
+    pages = [page async for page in client.iter_products()]
+    await client.aclose()
+
+    ids = [item["id"] for page in pages for item in page]
+    assert sorted(set(ids)) == sorted(catalog)
+    assert ids[-1] == "p00"
+    assert requests[1]["updatedSince"] == "2026-10-19T09:04:00Z"
+    assert requests[1]["afterId"] == "p04"
+
+
+async def test_get_json_gives_up_on_client_errors() -> None:
+    """A 4xx other than 429 is not retried."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(404)
+
+    client = EcommerceClient(
+        base_url="http://ecommerce.test", transport=httpx.MockTransport(handler)
+    )
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.get_json("/products/missing")
+    await client.aclose()
+
+    assert len(calls) == 1
+
+
+def test_product_from_api_matches_database_row_shape() -> None:
+    """API products map to the sync row shape with a naive UTC updatedAt."""
+    product = product_from_api(
+        {
+            "id": 7,
+            "name": "Kettle",
+            "priceCents": 2999,
+            "stock": 4,
+            "isActive": True,
+            "category": {"name": "Kitchen"},
+            "updatedAt": "2026-10-19T09:30:00.000Z",
+        }
+    )
+
+    assert product["id"] == "7"
+    assert product["category_name"] == "Kitchen"
+    assert product["updated_at"].isoformat() == "2026-10-19T09:30:00"
@@ -0,0 +1,96 @@
+"""Unit tests for the async embedding encoder pool."""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from recommendation_service.infrastructure.vector import embeddings as embedding_module
+from recommendation_service.infrastructure.vector import encoder_pool
+from recommendation_service.infrastructure.vector.encoder_pool import (
+    AsyncEmbeddingEncoder,
+    EncoderOverloadedError,
+)
+from recommendation_service.services.embedding_backfill import _DONE, EmbeddingBackfillPipeline
+
+
+class SlowModel:
+    """Fake model that encodes each text as its length, after a short delay."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def encode(self, texts: list[str], **kwargs) -> np.ndarray:
+        time.sleep(self.delay)
+        return np.array([[float(len(t))] * 4 for t in texts])
+
+
+@pytest.fixture
+def thread_executor():
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+async def test_encode_many_returns_float32_rows_in_order(monkeypatch, thread_executor) -> None:
+    """Encoded rows come back as float32 in the same order as the input texts."""
+    monkeypatch.setattr(embedding_module, "_embedding_model", SlowModel())
+    encoder = AsyncEmbeddingEncoder(max_workers=1, max_queue=4, executor=thread_executor)
+
+    embeddings = await encoder.encode_many(["a", "abc", "ab"])
+
+    assert embeddings.dtype == np.float32
+    assert embeddings.shape == (3, 4)
+    assert embeddings[:, 0].tolist() == [1.0, 3.0, 2.0]
+    assert encoder.pending == 0
+
+
+async def test_encode_many_rejects_when_queue_full(monkeypatch, thread_executor) -> None:
+    """Requests beyond max_queue are rejected instead of queueing forever."""
+    monkeypatch.setattr(embedding_module, "_embedding_model", SlowModel(delay=0.2))
+    encoder = AsyncEmbeddingEncoder(max_workers=1, max_queue=1, executor=thread_executor)
+
+    first = asyncio.create_task(encoder.encode_many(["slow"]))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(EncoderOverloadedError):
+        await encoder.encode_many(["rejected"])
+
+    assert (await first).shape == (1, 4)
+
+
+def encode_backfill_batch(results: multiprocessing.Queue) -> None:
+    """Run the backfill encode stage on the global encoder and report the result."""
+    embedding_module._embedding_model = SlowModel()
+    encoder_pool._async_encoder = None
+
+    async def encode() -> list[float]:
+        inbox: asyncio.Queue = asyncio.Queue()
+        out: asyncio.Queue = asyncio.Queue()
+        for item in (([1, 2], ["a", "abc"]), _DONE):
+            inbox.put_nowait(item)
+        await EmbeddingBackfillPipeline(session=None)._encode_stage(inbox, out)
+        _, embeddings = out.get_nowait()
+        return embeddings[:, 0].tolist()
+
+    try:
+        results.put(asyncio.run(encode()))
+    except BaseException as e:
+        results.put(repr(e))
+    finally:
+        encoder_pool.shutdown_async_encoder()
+
+
+def test_backfill_encodes_inside_a_daemonic_process() -> None:
+    """A Celery prefork child is daemonic: the encoder must not try to start worker processes."""
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    process = context.Process(target=encode_backfill_batch, args=(results,), daemon=True)
+    process.start()
+    try:
+        assert results.get(timeout=30) == [1.0, 3.0]
+    finally:
+        process.join(timeout=5)
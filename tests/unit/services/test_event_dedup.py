@@ -0,0 +1,69 @@
+"""Unit tests for client event id deduplication."""
+
+import pytest
+
+from recommendation_service.services import event_dedup
+from recommendation_service.services.event_dedup import (
+    EventDeduplicator,
+    MemoryBloomFilter,
+    bloom_parameters,
+    drop_registered,
+)
+
+
+def test_bloom_parameters_match_the_target_error_rate() -> None:
+    """One million ids at 0.1% fit in about 1.8 MB per generation with ten hash functions."""
+    bits, hashes = bloom_parameters(1_000_000, 0.001)
+    assert 14_000_000 < bits < 14_500_000
+    assert hashes == 10
+
+
+async def test_memory_bloom_filter_forgets_after_two_generations(monkeypatch) -> None:
+    """Ids are remembered for the current and previous half-window only."""
+    now = [1_000.0]
+    monkeypatch.setattr(event_dedup.time, "time", lambda: now[0])
+    bloom = MemoryBloomFilter(capacity=1000, false_positive_rate=0.01, window_seconds=100)
+
+    assert await bloom.check_and_add("evt-1") is False
+    assert await bloom.check_and_add("evt-1") is True
+
+    now[0] += 50
+    assert await bloom.check_and_add("evt-2") is False
+    assert await bloom.check_and_add("evt-1") is True
+
+    now[0] += 100
+    assert await bloom.check_and_add("evt-2") is False
+
+
+def test_memory_bloom_filter_packs_eight_bits_per_byte() -> None:
+    """Each generation takes one byte per eight bits of the filter."""
+    bloom = MemoryBloomFilter(capacity=1_000_000, false_positive_rate=0.001, window_seconds=60)
+    assert bloom._current.nbytes == (bloom.bits + 7) // 8 < 1_850_000
+
+
+async def test_deduplicator_only_queries_database_for_bloom_hits(monkeypatch) -> None:
+    """New ids never hit the database; repeats are confirmed there."""
+    lookups = []
+
+    async def is_registered(event_id: str) -> bool:
+        lookups.append(event_id)
+        return event_id == "evt-1"
+
+    monkeypatch.setattr(event_dedup, "is_registered", is_registered)
+    dedup = EventDeduplicator(MemoryBloomFilter(1000, 0.01, 3600))
+
+    assert await dedup.is_duplicate("evt-1") is False
+    assert await dedup.is_duplicate("evt-2") is False
+    assert lookups == []
+    assert await dedup.is_duplicate("evt-1") is True
+    assert lookups == ["evt-1"]
+
+
+@pytest.mark.parametrize("new_ids", [{"a", "b"}, {"b"}])
+def test_drop_registered_keeps_first_row_per_new_id(new_ids) -> None:
+    """Rows without ids always pass; each newly registered id is written once."""
+    records = [("u", "a"), ("u", None), ("u", "b"), ("u", "b")]
+
+    kept = drop_registered(records, 1, new_ids)
+
+    assert kept == [r for r in [("u", "a"), ("u", None), ("u", "b")] if r[1] in new_ids | {None}]
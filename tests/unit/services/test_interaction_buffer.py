@@ -0,0 +1,148 @@
+"""Unit tests for the buffered interaction writer."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from recommendation_service.services import interaction_buffer
+from recommendation_service.services.interaction_buffer import (
+    InteractionBuffer,
+    InteractionBufferFullError,
+    interaction_record,
+    is_row_error,
+    write_interactions,
+)
+
+
+class StringTooLongError(Exception):
+    """Stands in for a Postgres data exception (SQLSTATE class 22)."""
+
+    sqlstate = "22001"
+
+
+def _records(n: int) -> list[tuple]:
+    return [interaction_record(f"user-{i}", f"product-{i}", "VIEW") for i in range(n)]
+
+
+async def test_writer_flushes_by_size_and_drains_on_stop() -> None:
+    """A full batch is written immediately; the remainder is written on shutdown."""
+    batches = []
+
+    async def sink(records) -> None:
+        batches.append(list(records))
+
+    buffer = InteractionBuffer(max_size=100, flush_size=3, flush_interval=60, sink=sink)
+    buffer.start()
+    buffer.add_many(_records(2))
+    await asyncio.sleep(0.01)
+    assert batches == []
+
+    buffer.add_many(_records(1))
+    await asyncio.sleep(0.01)
+    assert [len(b) for b in batches] == [3]
+
+    buffer.add(interaction_record("user-3", None, "SEARCH", search_query="trowel"))
+
+    await buffer.stop(timeout=1)
+    assert [len(b) for b in batches] == [3, 1]
+    assert batches[0][0][:3] == ("user-0", "product-0", "VIEW")
+    assert len(buffer) == 0
+
+
+async def test_failed_flush_keeps_rows_in_order() -> None:
+    """A failed COPY puts its batch back at the front for the next attempt."""
+    calls = []
+
+    async def sink(records) -> None:
+        calls.append([r[0] for r in records])
+        if len(calls) == 1:
+            raise ConnectionError("database unavailable")
+
+    buffer = InteractionBuffer(max_size=100, flush_size=2, flush_interval=60, sink=sink)
+    buffer.add_many(_records(3))
+
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+    assert len(buffer) == 3
+
+    assert await buffer.flush() == 3
+    assert calls[1:] == [["user-0", "user-1"], ["user-2"]]
+
+
+async def test_rejected_row_is_isolated_and_dropped() -> None:
+    """A bad row is bisected out of its batch and dropped after its attempts."""
+    calls = []
+
+    async def sink(records) -> None:
+        calls.append([r[0] for r in records])
+        if any(r[0] == "user-2" for r in records):
+            raise StringTooLongError("value too long for type character varying(255)")
+
+    buffer = InteractionBuffer(
+        max_size=100, flush_size=5, flush_interval=60, sink=sink, row_attempts=2
+    )
+    buffer.add_many(_records(5))
+
+    assert await buffer.flush() == 4
+    assert len(buffer) == 0
+    written = [c for c in calls[1:] if "user-2" not in c]
+    assert sorted(u for c in written for u in c) == ["user-0", "user-1", "user-3", "user-4"]
+    assert calls.count(["user-2"]) == 2
+
+
+def test_is_row_error_follows_wrapped_causes() -> None:
+    """Data errors count however wrapped; connection errors do not."""
+    wrapped = RuntimeError("COPY failed")
+    wrapped.__cause__ = StringTooLongError()
+
+    assert is_row_error(wrapped)
+    assert is_row_error(ValueError("invalid input for query argument"))
+    assert not is_row_error(ConnectionError("database unavailable"))
+
+
+def test_full_buffer_rejects_whole_batch() -> None:
+    """Rows that do not all fit are rejected without buffering any of them."""
+    buffer = InteractionBuffer(max_size=3, flush_size=10, flush_interval=1)
+    buffer.add_many(_records(2))
+
+    with pytest.raises(InteractionBufferFullError):
+        buffer.add_many(_records(2))
+    assert len(buffer) == 2
+
+
+async def test_write_interactions_marks_users_of_written_product_rows(monkeypatch) -> None:
+    """Users of newly written product interactions are marked for the preference rebuild."""
+    copied, marked = [], []
+
+    async def copy_records_to_table(table, schema_name, columns, records):
+        copied.extend(records)
+
+    class FakeSession:
+        async def connection(self):
+            driver = SimpleNamespace(copy_records_to_table=copy_records_to_table)
+            raw = SimpleNamespace(driver_connection=driver)
+
+            async def get_raw_connection():
+                return raw
+
+            return SimpleNamespace(get_raw_connection=get_raw_connection)
+
+    async def register(session, event_ids, recorded_at):
+        return set(event_ids) - {"seen"}
+
+    async def mark(session, user_ids):
+        marked.append(sorted(user_ids))
+
+    monkeypatch.setattr(interaction_buffer, "register_event_ids", register)
+    monkeypatch.setattr(interaction_buffer, "mark_dirty_users", mark)
+    records = [
+        interaction_record("u1", "p1", "PURCHASE", event_id="order:1"),
+        interaction_record("u2", "p1", "PURCHASE", event_id="seen"),
+        interaction_record("u3", None, "SEARCH", search_query="trowel"),
+    ]
+
+    written = await write_interactions(FakeSession(), records)
+
+    assert [r[0] for r in written] == [r[0] for r in copied] == ["u1", "u3"]
+    assert marked == [["u1"]]
@@ -0,0 +1,31 @@
+"""Unit tests for monthly interaction partition planning."""
+
+from datetime import date
+
+from recommendation_service.services.interaction_partitions import (
+    add_months,
+    partition_month,
+    partition_name,
+    plan_partitions,
+)
+
+
+def test_partition_names_round_trip() -> None:
+    """Partition names encode their month and unrelated names are ignored."""
+    assert partition_name(date(2026, 3, 1)) == "user_interactions_p202603"
+    assert partition_month("user_interactions_p202603") == date(2026, 3, 1)
+    assert partition_month("user_interactions_default") is None
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_plan_partitions_premakes_ahead_and_expires_past_retention() -> None:
+    """Future months are created and months outside the retention window expire."""
+    existing = [date(2026, m, 1) for m in range(1, 12)]
+
+    missing, expired = plan_partitions(
+        existing, date(2026, 10, 19), premake_months=3, retention_months=6
+    )
+
+    assert missing == [date(2026, 12, 1), date(2027, 1, 1)]
+    assert expired == [date(2026, m, 1) for m in range(1, 5)]
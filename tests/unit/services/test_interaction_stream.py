@@ -0,0 +1,201 @@
+"""Unit tests for stream-based interaction ingestion."""
+
+from datetime import datetime
+
+import pytest
+
+from interaction_worker.consumer import InteractionStreamConsumer
+from recommendation_service.services.interaction_buffer import interaction_record
+from recommendation_service.services.interaction_stream import (
+    ENTRY_FIELD,
+    decode_interaction,
+    encode_interaction,
+    popularity_deltas,
+)
+
+
+class FakePipeline:
+    """Queues XPENDING lookups and runs them on execute()."""
+
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.calls: list[dict] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    def xpending_range(self, stream, group, **kwargs) -> None:
+        self.calls.append(kwargs)
+
+    async def execute(self) -> list:
+        return [await self.redis.xpending_range(None, None, **call) for call in self.calls]
+
+
+class FakeRedis:
+    """Records acknowledgements and dead letters.
+
+    Entries were delivered ``deliveries`` times, or as many times as given per entry id.
+    """
+
+    def __init__(self, deliveries: int | dict[bytes, int] = 1) -> None:
+        self.acked: list[bytes] = []
+        self.dead: list[dict] = []
+        self.deliveries = deliveries
+        self.pending_lookups: list[tuple[bytes, bytes, str]] = []
+
+    async def xack(self, stream, group, *ids) -> int:
+        self.acked.extend(ids)
+        return len(ids)
+
+    def pipeline(self, transaction=True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def xpending_range(self, stream, group, min, max, count, consumername=None) -> list:
+        self.pending_lookups.append((min, max, consumername))
+        deliveries = (
+            self.deliveries.get(min, 1) if isinstance(self.deliveries, dict) else self.deliveries
+        )
+        return [{"message_id": min, "consumer": consumername, "times_delivered": deliveries}]
+
+    async def xadd(self, stream, fields, maxlen=None, approximate=True) -> bytes:
+        self.dead.append(fields)
+        return b"0-1"
+
+
+class StringTooLongError(Exception):
+    """Stands in for a Postgres data exception (SQLSTATE class 22)."""
+
+    sqlstate = "22001"
+
+
+def test_encode_round_trips_records() -> None:
+    """Rows survive the stream encoding, including the naive timestamp."""
+    record = interaction_record(
+        "user-1",
+        "product-1",
+        "PURCHASE",
+        metadata={"source": "app"},
+        created_at=datetime(2026, 3, 1, 12, 30, 15, 250),
+    )
+    assert decode_interaction(encode_interaction(record)) == record
+
+
+def test_popularity_deltas_sum_weights_per_product() -> None:
+    """Weighted product interactions add up; searches do not count."""
+    records = [
+        interaction_record("u1", "p1", "PURCHASE"),
+        interaction_record("u2", "p1", "VIEW"),
+        interaction_record("u2", "p2", "CART_REMOVE"),
+        interaction_record("u3", None, "SEARCH", search_query="trowel"),
+    ]
+    assert popularity_deltas(records) == {"p1": 6.0, "p2": -1.0}
+
+
+def _consumer(redis, writer, updater) -> InteractionStreamConsumer:
+    return InteractionStreamConsumer(
+        redis=redis, consumer_name="test", max_deliveries=3, writer=writer, updater=updater
+    )
+
+
+async def test_consumer_acks_only_after_the_batch_is_written() -> None:
+    """Entries are acknowledged after the COPY; malformed entries are dropped and acked."""
+    redis, written, updated = FakeRedis(), [], []
+
+    async def writer(records) -> list:
+        assert redis.acked == []
+        written.extend(records)
+        return list(records)
+
+    async def updater(records) -> None:
+        updated.extend(records)
+
+    record = interaction_record("user-1", "product-1", "VIEW")
+    entries = [(b"1-0", {ENTRY_FIELD: encode_interaction(record)}), (b"2-0", {ENTRY_FIELD: b"{"})]
+
+    assert await _consumer(redis, writer, updater).process(entries) == 1
+    assert written == updated == [record]
+    assert redis.acked == [b"1-0", b"2-0"]
+    assert [d[b"entry_id"] for d in redis.dead] == [b"2-0"]
+
+
+async def test_consumer_leaves_batch_pending_when_write_fails() -> None:
+    """A failed write is not acknowledged, so the batch is redelivered."""
+    redis = FakeRedis()
+
+    async def writer(records) -> None:
+        raise ConnectionError("database unavailable")
+
+    async def updater(records) -> None:
+        raise AssertionError("not reached")
+
+    entry = (b"1-0", {ENTRY_FIELD: encode_interaction(interaction_record("u", "p", "VIEW"))})
+    with pytest.raises(ConnectionError):
+        await _consumer(redis, writer, updater).process([entry])
+    assert redis.acked == []
+
+
+async def test_consumer_dead_letters_rejected_entries_after_max_deliveries() -> None:
+    """A batch delivered too often is written entry by entry; rejected entries are moved aside."""
+    redis, updated = FakeRedis(deliveries=3), []
+    good = interaction_record("user-1", "product-1", "VIEW")
+    bad = interaction_record("user-2", "x" * 300, "VIEW")
+
+    async def writer(records) -> list:
+        if bad in records:
+            raise StringTooLongError("value too long for type character varying(255)")
+        return list(records)
+
+    async def updater(records) -> None:
+        updated.extend(records)
+
+    entries = [
+        (b"1-0", {ENTRY_FIELD: encode_interaction(bad)}),
+        (b"2-0", {ENTRY_FIELD: encode_interaction(good)}),
+    ]
+
+    assert await _consumer(redis, writer, updater).process(entries) == 1
+    assert updated == [good]
+    assert [d[b"entry_id"] for d in redis.dead] == [b"1-0"]
+    assert redis.acked == [b"1-0", b"2-0"]
+
+
+async def test_consumer_counts_deliveries_of_every_entry_it_holds() -> None:
+    """A claimed entry redelivered too often is found even when others of the batch are fresh."""
+    redis = FakeRedis(deliveries={b"1-0": 1, b"7-0": 3})
+    bad = interaction_record("user-2", "x" * 300, "VIEW")
+
+    async def writer(records) -> list:
+        if bad in records:
+            raise StringTooLongError("value too long for type character varying(255)")
+        return list(records)
+
+    async def updater(records) -> None:
+        pass
+
+    entries = [
+        (b"1-0", {ENTRY_FIELD: encode_interaction(interaction_record("u", "p", "VIEW"))}),
+        (b"7-0", {ENTRY_FIELD: encode_interaction(bad)}),
+    ]
+
+    assert await _consumer(redis, writer, updater).process(entries) == 1
+    assert [d[b"entry_id"] for d in redis.dead] == [b"7-0"]
+    assert redis.pending_lookups == [(b"1-0", b"1-0", "test"), (b"7-0", b"7-0", "test")]
+
+
+async def test_consumer_keeps_entries_pending_while_the_database_is_down() -> None:
+    """Past max deliveries, connection errors still leave the entries pending."""
+    redis = FakeRedis(deliveries=5)
+
+    async def writer(records) -> None:
+        raise ConnectionError("database unavailable")
+
+    async def updater(records) -> None:
+        raise AssertionError("not reached")
+
+    entry = (b"1-0", {ENTRY_FIELD: encode_interaction(interaction_record("u", "p", "VIEW"))})
+    with pytest.raises(ConnectionError):
+        await _consumer(redis, writer, updater).process([entry])
+    assert redis.acked == redis.dead == []
@@ -0,0 +1,45 @@
+"""Unit tests for the deterministic mock embedding model."""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from recommendation_service.infrastructure.vector.embeddings import MockEmbeddingModel
+
+
+def test_encode_returns_normalized_float32_batches() -> None:
+    """Batches come back as unit-length float32 rows matching single encodes."""
+    model = MockEmbeddingModel(384)
+
+    batch = model.encode(["garden trowel", "headphones", "garden trowel"])
+    single = model.encode("headphones")
+
+    assert batch.dtype == np.float32
+    assert batch.shape == (3, 384)
+    np.testing.assert_allclose(np.linalg.norm(batch, axis=1), 1.0, rtol=1e-5)
+    np.testing.assert_array_equal(batch[0], batch[2])
+    np.testing.assert_array_equal(batch[1], single)
+    assert model.encode([]).shape == (0, 384)
+
+
+def test_encode_is_stable_across_processes() -> None:
+    """Vectors do not depend on the interpreter's hash randomization."""
+    code = (
+        "from recommendation_service.infrastructure.vector.embeddings import MockEmbeddingModel; "
+        "print(MockEmbeddingModel(8).encode('garden trowel').tolist())"
+    )
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path), "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ("1", "2")
+    }
+
+    assert len(outputs) == 1
+    assert outputs.pop().strip() == str(MockEmbeddingModel(8).encode("garden trowel").tolist())
@@ -0,0 +1,55 @@
+"""Unit tests for the ONNX embedding backend."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from recommendation_service.config import get_settings
+from recommendation_service.infrastructure.vector.onnx_backend import (
+    FP32_MODEL_FILE,
+    QUANTIZED_MODEL_FILE,
+    mean_pool,
+)
+
+PARITY_TEXTS = [
+    "Wireless Noise Cancelling Headphones | Category: Electronics | Premium",
+    "Stainless Garden Trowel | Category: Garden | Budget friendly",
+    "Organic cotton bed sheets, queen size | Category: Home & Kitchen | Mid-range",
+    "Kids building blocks set with 500 pieces | Category: Toys",
+]
+
+
+def test_mean_pool_ignores_padding() -> None:
+    """Padding positions do not contribute to the pooled vector."""
+    token_embeddings = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]])
+    attention_mask = np.array([[1, 1, 0]])
+
+    pooled = mean_pool(token_embeddings, attention_mask)
+
+    assert pooled.tolist() == [[2.0, 2.0]]
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("quantized, min_cosine", [(False, 0.999), (True, 0.98)])
+def test_onnx_matches_pytorch_embeddings(quantized: bool, min_cosine: float) -> None:
+    """ONNX outputs agree with the PyTorch model by cosine similarity."""
+    pytest.importorskip("onnxruntime")
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    settings = get_settings()
+    model_dir = Path(settings.embedding_onnx_path)
+    if not (model_dir / FP32_MODEL_FILE).exists():
+        pytest.skip("ONNX export not found; run scripts/export_onnx_model.py")
+    if quantized and not (model_dir / QUANTIZED_MODEL_FILE).exists():
+        pytest.skip("Quantized ONNX model not exported")
+
+    from recommendation_service.infrastructure.vector.onnx_backend import OnnxEmbeddingModel
+
+    reference = sentence_transformers.SentenceTransformer(settings.embedding_model)
+    onnx_model = OnnxEmbeddingModel(model_dir, quantized=quantized)
+
+    expected = reference.encode(PARITY_TEXTS, convert_to_numpy=True, normalize_embeddings=True)
+    actual = onnx_model.encode(PARITY_TEXTS)
+
+    cosines = (expected * actual).sum(axis=1)
+    assert cosines.min() >= min_cosine
@@ -0,0 +1,93 @@
+"""Unit tests for order sync and co-purchase counting."""
+
+import hashlib
+from datetime import datetime
+
+from recommendation_service.services import order_sync
+from recommendation_service.services.interaction_buffer import EVENT_ID_INDEX
+from recommendation_service.services.order_sync import (
+    MAX_COPURCHASE_ITEMS,
+    OrderSyncService,
+    copurchase_pairs,
+    order_copurchase_key,
+    order_event_id,
+)
+from recommendation_service.services.product_sync import encode_watermark
+
+
+def test_copurchase_pairs_count_each_order_once_in_both_directions() -> None:
+    """Repeated lines count once per order; oversized orders are skipped."""
+    pairs = copurchase_pairs(
+        {
+            "o1": ["a", "b", "a"],
+            "o2": ["b", "a", "c"],
+            "bulk": [f"p{i}" for i in range(MAX_COPURCHASE_ITEMS + 1)],
+        }
+    )
+
+    assert pairs[("a", "b")] == pairs[("b", "a")] == 2
+    assert pairs[("a", "c")] == pairs[("c", "b")] == 1
+    assert len(pairs) == 6
+
+
+async def test_sync_counts_each_order_once_including_guest_orders(monkeypatch) -> None:
+    """Orders re-read in the overlap add no counts; guest orders count without interactions."""
+    created_at = datetime(2026, 10, 19, 12, 0)
+    orders = [
+        {"id": "o1", "user_id": "u1", "created_at": created_at, "items": [("a", 1), ("b", 2)]},
+        {"id": "o2", "user_id": "u2", "created_at": created_at, "items": [("a", 1), ("c", 1)]},
+        {"id": "o3", "user_id": None, "created_at": created_at, "items": [("b", 1), ("c", 1)]},
+    ]
+    already_registered = {
+        order_event_id("o1", "a"),
+        order_event_id("o1", "b"),
+        order_copurchase_key("o1"),
+    }
+
+    service = OrderSyncService(session=None)
+    counted, statuses = [], []
+
+    async def load_watermark():
+        return None
+
+    async def get_orders(limit, after=None):
+        return orders if after is None else []
+
+    async def write(session, records):
+        return [r for r in records if r[EVENT_ID_INDEX] not in already_registered]
+
+    async def register(session, event_ids, recorded_at):
+        return set(event_ids) - already_registered
+
+    async def add_counts(pairs):
+        counted.append(dict(pairs))
+        return len(pairs)
+
+    async def update_status(status, records_synced=0, cursor=None, error_message=None):
+        statuses.append((status, cursor))
+
+    monkeypatch.setattr(order_sync, "write_interactions", write)
+    monkeypatch.setattr(order_sync, "register_event_ids", register)
+    service._load_watermark = load_watermark
+    service.get_ecommerce_orders = get_orders
+    service.add_copurchase_counts = add_counts
+    service._update_sync_status = update_status
+
+    summary = await service.sync_orders(batch_size=10)
+
+    assert counted == [{("a", "c"): 1, ("c", "a"): 1, ("b", "c"): 1, ("c", "b"): 1}]
+    assert summary == {
+        "orders_synced": 3,
+        "interactions_created": 2,
+        "pairs_updated": 4,
+        "orders_skipped": 1,
+    }
+    assert statuses[-2] == ("running", encode_watermark(created_at, "o3"))
+    assert statuses[-1] == ("idle", None)
+
+
+def test_order_copurchase_key_matches_the_sql_used_by_migrations() -> None:
+    """The key is 'copurchase:' || md5(order id), within the 64-character column."""
+    key = order_copurchase_key("order-1")
+    assert key == "copurchase:" + hashlib.md5(b"order-1").hexdigest()
+    assert len(key) <= 64
@@ -0,0 +1,80 @@
+"""Unit tests for the debounced product change listener."""
+
+from sync_worker.services.product_listener import ProductChangeListener
+
+
+def notify_all(listener: ProductChangeListener, product_ids: list[str]) -> None:
+    for product_id in product_ids:
+        listener.notify(None, 1, "recommender_product_changes", product_id)
+
+
+async def test_flush_batches_distinct_ids_and_keeps_them_when_unavailable() -> None:
+    """Repeated notifications sync once; a batch that hits an outage stays pending whole."""
+    batches = []
+    fail = True
+
+    async def sync(product_ids):
+        batches.append(product_ids)
+        if fail:
+            raise ConnectionError("database unavailable")
+
+    listener = ProductChangeListener(dsn="postgresql://test", max_batch=2, sync=sync)
+    notify_all(listener, ["a", "b", "a", "c"])
+
+    assert await listener.flush() == 0
+    assert list(listener.pending) == ["a", "b", "c"]
+
+    fail = False
+    assert await listener.flush() == 2
+    assert await listener.flush() == 1
+    assert batches == [["a", "b"], ["a", "b"], ["c"]]
+    assert not listener.pending
+
+
+async def test_flush_isolates_and_eventually_drops_a_failing_product() -> None:
+    """The rest of a batch syncs around a bad product, which is dropped after max_attempts."""
+    synced = []
+
+    async def sync(product_ids):
+        if "bad" in product_ids:
+            raise KeyError("bad")
+        synced.extend(product_ids)
+
+    listener = ProductChangeListener(
+        dsn="postgresql://test", max_batch=10, sync=sync, max_attempts=2
+    )
+    notify_all(listener, ["a", "bad", "b", "c"])
+
+    assert await listener.flush() == 3
+    assert sorted(synced) == ["a", "b", "c"]
+    assert list(listener.pending) == ["bad"]
+    assert listener.attempts == {"bad": 1}
+
+    assert await listener.flush() == 0
+    assert not listener.pending
+    assert not listener.attempts
+
+
+async def test_full_backlog_ignores_notifications_and_queues_catch_up_once_drained() -> None:
+    """Ids beyond max_pending are not kept; a catch-up sync covers them after the drain."""
+    catch_ups = []
+
+    async def sync(product_ids):
+        pass
+
+    listener = ProductChangeListener(
+        dsn="postgresql://test",
+        max_batch=1,
+        sync=sync,
+        on_overflow=lambda: catch_ups.append(True),
+        max_pending=2,
+    )
+    notify_all(listener, ["a", "b", "a", "c", "d"])
+    assert list(listener.pending) == ["a", "b"]
+    assert listener.overflowed
+
+    assert await listener.flush() == 1
+    assert catch_ups == []
+    assert await listener.flush() == 1
+    assert catch_ups == [True]
+    assert not listener.overflowed
@@ -0,0 +1,268 @@
+"""Unit tests for incremental product sync."""
+
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from recommendation_service.services import product_sync
+from recommendation_service.services.embedding import EmbeddingService
+from recommendation_service.services.product_sync import (
+    ProductSyncService,
+    ProductUpsertResult,
+    encode_watermark,
+    parse_watermark,
+)
+
+
+class SavepointSession:
+    """Session stub whose savepoints do nothing."""
+
+    def begin_nested(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class StringTooLongError(Exception):
+    """Stands in for a Postgres data exception (SQLSTATE class 22)."""
+
+    sqlstate = "22001"
+
+
+def test_watermark_round_trip() -> None:
+    """Watermarks encode (updatedAt, id); legacy offset cursors are ignored."""
+    position = (datetime(2026, 10, 19, 9, 30, 0, 123000), "prod|1")
+    assert parse_watermark(encode_watermark(*position)) == position
+    assert parse_watermark("400") is None
+    assert parse_watermark(None) is None
+
+
+async def test_sync_pages_by_keyset_and_saves_watermark_per_batch(monkeypatch) -> None:
+    """Each batch continues after the last (updatedAt, id) and commits its watermark."""
+    catalog = [
+        {"id": f"p{i}", "updated_at": datetime(2026, 10, 19, 9, i), "name": f"P{i}"}
+        for i in range(5)
+    ]
+
+    service = ProductSyncService(session=SavepointSession())
+    requested, statuses, upserted = [], [], []
+
+    async def load_watermark():
+        return None
+
+    async def get_products(limit, after=None):
+        requested.append(after)
+        rows = [p for p in catalog if after is None or (p["updated_at"], p["id"]) > after]
+        return rows[:limit]
+
+    async def upsert(products):
+        upserted.extend(p["id"] for p in products)
+        return ProductUpsertResult(created=len(products))
+
+    async def update_status(sync_id, status, records_synced=0, cursor=None, error_message=None):
+        statuses.append((status, cursor))
+
+    async def publish(updates):
+        pass
+
+    monkeypatch.setattr(product_sync, "publish_catalog_updates", publish)
+    service._load_watermark = load_watermark
+    service.get_ecommerce_products = get_products
+    service.upsert_products = upsert
+    service._update_sync_status = update_status
+
+    summary = await service.sync_all_products(batch_size=2)
+
+    assert upserted == ["p0", "p1", "p2", "p3", "p4"]
+    assert requested == [None, (catalog[1]["updated_at"], "p1"), (catalog[3]["updated_at"], "p3")]
+    assert statuses[-2] == ("running", encode_watermark(catalog[4]["updated_at"], "p4"))
+    assert statuses[-1] == ("idle", None)
+    assert summary["created"] == 5
+
+
+async def test_sync_skips_rejected_products_and_moves_the_watermark_past_them(
+    monkeypatch,
+) -> None:
+    """A row the database rejects is split out, counted as an error and passed by."""
+    catalog = [
+        {"id": f"p{i}", "updated_at": datetime(2026, 10, 19, 9, i), "name": f"P{i}"}
+        for i in range(4)
+    ]
+    service = ProductSyncService(session=SavepointSession())
+    statuses, upserted = [], []
+
+    async def load_watermark():
+        return None
+
+    async def get_products(limit, after=None):
+        return catalog if after is None else []
+
+    async def upsert(products):
+        if any(p["id"] == "p2" for p in products):
+            raise StringTooLongError("value too long for type character varying(255)")
+        upserted.extend(p["id"] for p in products)
+        return ProductUpsertResult(created=len(products))
+
+    async def update_status(sync_id, status, records_synced=0, cursor=None, error_message=None):
+        statuses.append((status, cursor))
+
+    async def publish(updates):
+        pass
+
+    monkeypatch.setattr(product_sync, "publish_catalog_updates", publish)
+    service._load_watermark = load_watermark
+    service.get_ecommerce_products = get_products
+    service.upsert_products = upsert
+    service._update_sync_status = update_status
+
+    summary = await service.sync_all_products(batch_size=10)
+
+    assert sorted(upserted) == ["p0", "p1", "p3"]
+    assert (summary["synced"], summary["created"], summary["errors"]) == (3, 3, 1)
+    assert statuses[-2] == ("running", encode_watermark(catalog[3]["updated_at"], "p3"))
+    assert statuses[-1] == ("idle", None)
+
+
+async def test_upsert_products_is_one_statement_reporting_changes() -> None:
+    """A batch is one upsert; changed rows feed re-embedding and the caches."""
+    calls = []
+
+    class FakeSession:
+        async def execute(self, query, params):
+            calls.append(params)
+            returned = [
+                SimpleNamespace(
+                    external_product_id="a",
+                    stock=0,
+                    price_cents=100,
+                    is_active=True,
+                    inserted=False,
+                    needs_embedding=False,
+                ),
+                SimpleNamespace(
+                    external_product_id="b",
+                    stock=1,
+                    price_cents=100,
+                    is_active=True,
+                    inserted=True,
+                    needs_embedding=True,
+                ),
+            ]
+            return SimpleNamespace(fetchall=lambda: returned)
+
+    product = {
+        "name": "P",
+        "category_name": None,
+        "price_cents": 100,
+        "stock": 1,
+        "is_active": True,
+    }
+    products = [
+        {**product, "id": "a"},
+        {**product, "id": "b"},
+        {**product, "id": "c"},
+        {**product, "id": "a", "stock": 0},
+    ]
+
+    outcome = await ProductSyncService(FakeSession()).upsert_products(products)
+
+    assert (outcome.created, outcome.updated, outcome.unchanged) == (1, 1, 1)
+    assert outcome.stale_ids == ["b"]
+    assert outcome.cache_updates == [("a", 0, 100, True)]
+    assert len(calls) == 1
+    assert calls[0]["external_ids"] == ["a", "b", "c"]
+    assert calls[0]["stocks"] == [0, 1, 1]
+
+
+def test_fingerprint_ignores_stock_and_price_within_bracket() -> None:
+    """Only changes to the embedding text change the content fingerprint."""
+    service = EmbeddingService()
+    product = {"name": "Kettle", "category_name": "Kitchen", "price_cents": 3000, "stock": 5}
+
+    fingerprint = service.content_fingerprint(product)
+
+    assert service.content_fingerprint({**product, "stock": 0, "price_cents": 3500}) == fingerprint
+    assert service.content_fingerprint({**product, "price_cents": 15000}) != fingerprint
+    assert service.content_fingerprint({**product, "name": "Kettle 2"}) != fingerprint
+
+
+def test_fingerprint_covers_exactly_the_text_the_backfill_encodes() -> None:
+    """The description is not stored for re-embedding, so it does not count."""
+    service = EmbeddingService()
+    product = {"name": "Kettle", "category_name": "Kitchen", "price_cents": 3000}
+    stored = {"name": "Kettle", "category": "Kitchen", "price_cents": 3000}
+
+    fingerprint = service.content_fingerprint({**product, "description": "1.7 litres"})
+
+    assert fingerprint == service.content_fingerprint(product)
+    assert fingerprint == service.content_fingerprint(stored)
+    assert service.stored_product_text(stored) == "Kettle | Category: Kitchen | Mid-range"
+
+
+def test_fingerprint_backfill_migration_matches_the_service() -> None:
+    """Rows fingerprinted by the migration only look changed if their text changes."""
+    pytest.importorskip("alembic")
+    path = next(
+        Path(product_sync.__file__)
+        .parents[1]
+        .glob("infrastructure/database/migrations/versions/*_3c8e1f52a9d0_*.py")
+    )
+    spec = importlib.util.spec_from_file_location("fingerprint_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    service = EmbeddingService()
+
+    for name, category, price_cents in [
+        ("Kettle", "Kitchen", 3000),
+        ("Sofa", None, 120000),
+        ("Gift card", "Vouchers", 0),
+        (None, "Garden", None),
+        ("Lamp", "Lighting", 2499),
+    ]:
+        stored = {"name": name, "category": category, "price_cents": price_cents}
+        assert migration.content_fingerprint(name, category, price_cents) == (
+            service.content_fingerprint(stored)
+        )
+
+
+async def test_sync_by_id_deactivates_products_that_no_longer_exist(monkeypatch) -> None:
+    """Deleted products are deactivated and published to the catalog caches."""
+    published, stale = [], []
+
+    class FakeSession(SavepointSession):
+        async def execute(self, query, params):
+            returned = [
+                SimpleNamespace(external_product_id=product_id, stock=3, price_cents=500)
+                for product_id in params["product_ids"]
+            ]
+            return SimpleNamespace(fetchall=lambda: returned)
+
+        async def commit(self):
+            pass
+
+    async def get_products(product_ids):
+        return [{"id": "a", "name": "A"}]
+
+    async def upsert(products):
+        return ProductUpsertResult(updated=1, stale_ids=["a"], cache_updates=[("a", 0, 100, True)])
+
+    async def publish(updates):
+        published.extend(updates)
+
+    monkeypatch.setattr(product_sync, "publish_catalog_updates", publish)
+    service = ProductSyncService(FakeSession())
+    service.get_ecommerce_products_by_id = get_products
+    service.upsert_products = upsert
+
+    summary = await service.sync_products_by_id(["a", "gone", "a"], on_stale=stale.extend)
+
+    assert published == [("a", 0, 100, True), ("gone", 3, 500, False)]
+    assert stale == ["a"]
+    assert (summary["updated"], summary["deactivated"]) == (1, 1)
@@ -0,0 +1,226 @@
+"""Unit tests for user preference aggregation: bulk rebuild and online updates."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from recommendation_service.core.metrics import PREFERENCE_DIRTY_USERS
+from recommendation_service.infrastructure.vector.ops import (
+    as_vector,
+    normalize,
+    unpack_vectors,
+    weighted_mean,
+)
+from recommendation_service.services import user_preference
+from recommendation_service.services.user_preference import (
+    ProductMatrix,
+    UserPreferenceService,
+)
+
+
+def _products() -> ProductMatrix:
+    return ProductMatrix(
+        index={"p1": 0, "p2": 1, "p3": 2},
+        vectors=np.array([[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]], dtype=np.float32),
+        categories=["Garden", "Kitchen", "Garden"],
+        price_cents=np.array([1500, 0, 4200]),
+    )
+
+
+def test_reduce_chunk_matches_per_user_aggregation() -> None:
+    """Each user's vector and stats match what the per-user path computes."""
+    service = UserPreferenceService(session=None)
+    products = _products()
+    now = datetime(2026, 1, 31, 12, 0)
+    rows = [
+        SimpleNamespace(
+            external_user_id=user, external_product_id=product,
+            interaction_type=kind, created_at=now - timedelta(days=days, hours=3),
+        )
+        for user, product, kind, days in [
+            ("u1", "p2", "VIEW", 0),
+            ("u1", "missing", "PURCHASE", 1),
+            ("u1", "p1", "PURCHASE", 10),
+            ("u1", "p3", "CART_REMOVE", 40),
+            ("u2", "p2", "WISHLIST_ADD", 2),
+        ]
+    ]
+
+    out: list[dict] = []
+    users = service._reduce_chunk(rows, products, now, out)
+
+    assert users == 2
+    assert [p["user_id"] for p in out] == ["u1", "u2"]
+
+    u1 = out[0]
+    weights = np.array([1.0, 5.0 * np.exp(-10 / 30), -1.0 * np.exp(-40 / 30)])
+    expected = weighted_mean(products.vectors[[1, 0, 2]], weights)
+    np.testing.assert_allclose(as_vector(u1["embedding"]), expected, rtol=1e-5)
+    assert u1["top_categories"] == '["Garden", "Kitchen"]'
+    assert (u1["avg_price_min"], u1["avg_price_max"]) == (15.0, 42.0)
+    assert u1["interaction_count"] == 3
+    assert u1["now"] == now
+    # Positive-weight products form the interests, heaviest first; CART_REMOVE does not
+    centroids = unpack_vectors(u1["interest_centroids"], 2)
+    np.testing.assert_allclose(centroids, [[1.0, 0.0], [0.0, 1.0]], atol=1e-3)
+    np.testing.assert_allclose(json.loads(u1["interest_weights"]), weights[[1, 0]], rtol=1e-4)
+
+    u2 = out[1]
+    np.testing.assert_allclose(as_vector(u2["embedding"]), [0.0, 1.0], atol=1e-6)
+    assert u2["avg_price_min"] is None
+
+
+class FakePreferenceSession:
+    """Answers apply_interaction's two lookups and keeps the upserted row."""
+
+    def __init__(self, products: dict[str, SimpleNamespace]):
+        self.products = products
+        self.row: SimpleNamespace | None = None
+        self.locked: list[str] = []
+
+    async def execute(self, statement, params):
+        sql = str(statement)
+        if "pg_advisory_xact_lock" in sql:
+            self.locked.append(params["user_id"])
+            return None
+        if "FROM recommender.product_embeddings" in sql:
+            product = self.products.get(params["product_id"])
+            return SimpleNamespace(fetchone=lambda: product)
+        if "FOR UPDATE" in sql:
+            assert self.locked, "user row read before taking the user's lock"
+            row = self.row
+            return SimpleNamespace(fetchone=lambda: row)
+        self.row = SimpleNamespace(
+            embedding=params["embedding"],
+            weighted_sum=params["weighted_sum"],
+            total_weight=params["total_weight"],
+            decay_updated_at=params["decay_updated_at"],
+            interest_centroids=params["interest_centroids"],
+            interest_weights=params["interest_weights"],
+            top_categories=json.loads(params["top_categories"]),
+        )
+        return None
+
+    async def commit(self) -> None:
+        pass
+
+
+async def test_apply_interaction_matches_decayed_history() -> None:
+    """Incremental updates equal the decayed weighted sum over the whole history."""
+    session = FakePreferenceSession(
+        {
+            "p1": SimpleNamespace(embedding=[1.0, 0.0], category="Garden", price_cents=1000),
+            "p2": SimpleNamespace(embedding=[0.0, 1.0], category="Kitchen", price_cents=0),
+        }
+    )
+    service = UserPreferenceService(session)
+    t0 = datetime(2026, 1, 1)
+
+    await service.apply_interaction("u1", "p1", "PURCHASE", t0)
+    await service.apply_interaction("u1", "p2", "VIEW", t0 + timedelta(days=15))
+    # Out-of-order event: added with its own decay, state time unchanged
+    await service.apply_interaction("u1", "p2", "CART_ADD", t0 + timedelta(days=5))
+
+    decay = np.exp(-np.array([15.0, 0.0, 10.0]) / 30.0)
+    weights = np.array([5.0, 1.0, 3.0]) * decay
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0], [0.0, 1.0]])
+    expected_sum = weights @ vectors
+
+    np.testing.assert_allclose(as_vector(session.row.weighted_sum), expected_sum, rtol=1e-5)
+    assert session.row.total_weight == pytest.approx(weights.sum(), rel=1e-5)
+    assert session.row.decay_updated_at == t0 + timedelta(days=15)
+    np.testing.assert_allclose(
+        as_vector(session.row.embedding), normalize(expected_sum), rtol=1e-5
+    )
+    assert session.row.top_categories == ["Garden", "Kitchen"]
+    assert session.locked == ["u1", "u1", "u1"]
+
+    # Orthogonal products become separate interests, weighted like the running sum
+    centroids = unpack_vectors(session.row.interest_centroids, 2)
+    np.testing.assert_allclose(centroids, [[1.0, 0.0], [0.0, 1.0]], atol=1e-3)
+    np.testing.assert_allclose(
+        json.loads(session.row.interest_weights), [weights[0], weights[1:].sum()], rtol=1e-4
+    )
+
+
+async def test_update_dirty_users_clears_marks_of_clean_chunks(monkeypatch) -> None:
+    """Dirty users are rebuilt chunk by chunk; only chunks without errors are cleared."""
+
+    class NullSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+    marked_at = datetime(2026, 10, 19, 12, 0)
+    rebuilt: list[list[str]] = []
+    cleared: list[dict[str, datetime]] = []
+
+    async def find_dirty_users(self, shard_index, shard_count):
+        return dict.fromkeys(("u1", "u2", "u3", "u4", "u5"), marked_at)
+
+    async def rebuild_all_users(self, min_interactions, lookback_days, user_ids, products):
+        rebuilt.append(user_ids)
+        return {"updated": len(user_ids), "errors": int("u5" in user_ids), "total_users": len(user_ids)}
+
+    async def clear_dirty_users(self, marks):
+        cleared.append(marks)
+
+    async def load_products(self, session):
+        return _products()
+
+    monkeypatch.setattr(user_preference, "get_session_factory", lambda: NullSession)
+    monkeypatch.setattr(UserPreferenceService, "find_dirty_users", find_dirty_users)
+    monkeypatch.setattr(UserPreferenceService, "rebuild_all_users", rebuild_all_users)
+    monkeypatch.setattr(UserPreferenceService, "clear_dirty_users", clear_dirty_users)
+    monkeypatch.setattr(UserPreferenceService, "_load_product_matrix", load_products)
+
+    service = UserPreferenceService(session=None)
+    stats = await service.update_dirty_users(chunk_size=2, concurrency=2)
+
+    assert sorted(rebuilt) == [["u1", "u2"], ["u3", "u4"], ["u5"]]
+    assert stats == {"dirty_users": 5, "updated": 5, "errors": 1, "total_users": 5}
+    assert sorted(sorted(marks) for marks in cleared) == [["u1", "u2"], ["u3", "u4"]]
+    assert all(t == marked_at for marks in cleared for t in marks.values())
+
+
+async def test_report_dirty_users_sets_gauge_to_backlog(monkeypatch) -> None:
+    """The gauge is set to the size of the dirty-user table."""
+
+    class CountSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def execute(self, query):
+            return SimpleNamespace(scalar=lambda: 42)
+
+    async def stop(seconds):
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(user_preference, "get_session_factory", lambda: CountSession)
+    monkeypatch.setattr(user_preference.asyncio, "sleep", stop)
+
+    with pytest.raises(asyncio.CancelledError):
+        await user_preference.report_dirty_users(60)
+    assert PREFERENCE_DIRTY_USERS._value.get() == 42
+
+
+def test_aggregate_shards_sums_shard_results() -> None:
+    """Shard results are summed into one run summary."""
+    from sync_worker.tasks import update_embeddings
+
+    shards = [
+        {"shard": 0, "dirty_users": 4, "updated": 4, "errors": 0},
+        {"shard": 1, "dirty_users": 2, "updated": 1, "errors": 1},
+    ]
+
+    summary = update_embeddings.aggregate_user_preference_shards(shards, "run-1")
+    assert summary == {"run_id": "run-1", "users_checked": 6, "preferences_updated": 5, "errors": 1}
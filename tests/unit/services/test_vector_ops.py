@@ -0,0 +1,104 @@
+"""Unit tests for vectorised embedding helpers."""
+
+import numpy as np
+import pytest
+
+from recommendation_service.infrastructure.vector import ops
+from recommendation_service.infrastructure.vector.ops import (
+    as_vector,
+    cosine_similarities,
+    pack_vectors,
+    segment_weighted_means,
+    spherical_kmeans,
+    stack_vectors,
+    to_json,
+    top_k_indices,
+    unpack_vectors,
+    weighted_mean,
+)
+
+
+def test_stack_vectors_parses_json_and_skips_bad_rows() -> None:
+    """Stored JSON, lists and arrays stack into one float32 matrix."""
+    values = ["[1.0, 0.0]", None, [0.0, 2.0], "[]", [1.0, 2.0, 3.0], np.array([3.0, 4.0])]
+
+    matrix, positions = stack_vectors(values)
+
+    assert matrix.dtype == np.float32
+    assert matrix.tolist() == [[1.0, 0.0], [0.0, 2.0], [3.0, 4.0]]
+    assert positions.tolist() == [0, 2, 5]
+
+
+def test_to_json_round_trips() -> None:
+    """Vectors serialise to JSON text that parses back to the same values."""
+    vector = np.array([0.25, -1.5, 3.0], dtype=np.float32)
+    assert as_vector(to_json(vector)).tolist() == vector.tolist()
+
+
+def test_weighted_mean_matches_python_aggregation() -> None:
+    """Weighted aggregation equals the weighted sum normalised to unit length."""
+    matrix = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    weights = np.array([3.0, 1.0, -1.0])
+
+    result = weighted_mean(matrix, weights)
+
+    expected = np.array([3.0, 1.0, -1.0]) / np.sqrt(11.0)
+    np.testing.assert_allclose(result, expected, rtol=1e-6)
+
+
+@pytest.mark.parametrize("block_rows", [2048, 2])
+def test_segment_weighted_means_matches_per_segment_mean(monkeypatch, block_rows) -> None:
+    """Each segment reduces exactly like a separate weighted_mean call, in any blocking."""
+    monkeypatch.setattr(ops, "SEGMENT_BLOCK_ROWS", block_rows)
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((6, 4)).astype(np.float32)
+    rows = np.array([0, 3, 3, 5, 1, 2, 4])
+    weights = np.array([1.0, 0.5, 2.0, 3.0, 1.5, 0.2, 1.0])
+    starts = np.array([0, 3, 4])
+
+    result = segment_weighted_means(matrix, rows, weights, starts)
+
+    bounds = [*starts, len(rows)]
+    for j, (start, end) in enumerate(zip(bounds, bounds[1:], strict=False)):
+        expected = weighted_mean(matrix[rows[start:end]], weights[start:end])
+        np.testing.assert_allclose(result[j], expected, rtol=1e-5, atol=1e-6)
+
+
+def test_cosine_similarities_handles_zero_vectors() -> None:
+    """Zero rows score 0 instead of producing NaN."""
+    matrix = np.array([[1.0, 0.0], [0.0, 0.0], [-2.0, 0.0]])
+
+    scores = cosine_similarities(np.array([3.0, 0.0]), matrix)
+
+    assert scores.tolist() == [1.0, 0.0, -1.0]
+
+
+def test_top_k_indices_orders_best_first() -> None:
+    """Top-k returns the highest scores in descending order."""
+    scores = np.array([0.1, 0.9, 0.5, 0.7])
+    assert top_k_indices(scores, 2).tolist() == [1, 3]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 0]
+
+
+def test_spherical_kmeans_separates_interests() -> None:
+    """Two tight groups of directions come back as two centroids, heaviest first."""
+    rng = np.random.default_rng(1)
+    garden, kitchen = np.eye(8)[0], np.eye(8)[1]
+    points = np.vstack(
+        [garden + 0.05 * rng.standard_normal((4, 8)), kitchen + 0.05 * rng.standard_normal((2, 8))]
+    )
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+
+    centroids, weights = spherical_kmeans(points, np.array([1, 1, 1, 1, 3, 3]), k=2)
+
+    assert weights.tolist() == [6.0, 4.0]
+    assert centroids[0] @ kitchen > 0.99
+    assert centroids[1] @ garden > 0.99
+
+
+def test_pack_vectors_round_trips_as_float16() -> None:
+    """Packed centroids take two bytes per component and survive to float16 precision."""
+    matrix = np.array([[0.6, -0.8, 0.0], [1.0, 0.0, 0.0]], dtype=np.float32)
+    data = pack_vectors(matrix)
+    assert len(data) == matrix.size * 2
+    np.testing.assert_allclose(unpack_vectors(data, 3), matrix, atol=1e-3)
@@ -1,7 +1,17 @@
 """Unit tests for interaction endpoints."""
 
+import gzip
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+import pytest
 from fastapi.testclient import TestClient
 
+from recommendation_service.api.v1 import interactions
+from recommendation_service.services import event_dedup, interaction_bulk, interaction_history
+from recommendation_service.services.interaction_buffer import InteractionBuffer
+
 
 def test_track_interaction_view(
     client: TestClient,
@@ -32,6 +42,18 @@ def test_track_interaction_requires_product_id_for_view(
     assert response.status_code == 400
 
 
+def test_track_interaction_rejects_values_longer_than_their_columns(
+    client: TestClient,
+    sample_interaction_data: dict,
+) -> None:
+    """Over-long values are rejected up front instead of failing the COPY batch."""
+    for field, length in (("user_id", 256), ("recommendation_context", 51)):
+        response = client.post(
+            "/api/v1/interactions", json={**sample_interaction_data, field: "x" * length}
+        )
+        assert response.status_code == 422
+
+
 def test_track_interaction_search_requires_query(
     client: TestClient,
     sample_user_id: str,
@@ -95,3 +117,204 @@ def test_batch_track_empty_list_fails(client: TestClient) -> None:
         json={"interactions": []},
     )
     assert response.status_code == 400
+
+
+def test_track_interaction_schedules_preference_update(
+    client: TestClient,
+    sample_interaction_data: dict,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Weighted product interactions update preferences after the response."""
+    applied = []
+
+    async def record(user_id, product_id, interaction_type, occurred_at) -> None:
+        applied.append((user_id, product_id, interaction_type))
+
+    monkeypatch.setattr(interactions, "_apply_preference_update", record)
+
+    client.post(
+        "/api/v1/interactions", json={**sample_interaction_data, "interaction_type": "purchase"}
+    )
+    client.post(
+        "/api/v1/interactions",
+        json={"user_id": "u", "interaction_type": "search", "search_query": "lamp"},
+    )
+
+    assert applied == [
+        (sample_interaction_data["user_id"], sample_interaction_data["product_id"], "PURCHASE")
+    ]
+
+
+def test_track_interaction_returns_503_when_buffer_is_full(
+    client: TestClient,
+    sample_interaction_data: dict,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ingestion backpressure surfaces as a retryable 503."""
+    full = InteractionBuffer(max_size=0, flush_size=1, flush_interval=1)
+    monkeypatch.setattr(interactions, "get_interaction_buffer", lambda: full)
+
+    response = client.post("/api/v1/interactions", json=sample_interaction_data)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_bulk_upload_streams_gzipped_ndjson_and_reports_bad_lines(
+    client: TestClient,
+    sample_interaction_data: dict,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Valid lines are written with their timestamps; bad lines are reported by number."""
+    written = []
+
+    async def writer(records) -> list:
+        written.extend(records)
+        return list(records)
+
+    monkeypatch.setattr(interaction_bulk, "copy_interactions", writer)
+    lines = [
+        orjson.dumps({**sample_interaction_data, "occurred_at": "2026-01-05T10:00:00"}),
+        b"{not json",
+        b"",
+        orjson.dumps({**sample_interaction_data, "interaction_type": "teleport"}),
+        orjson.dumps({"user_id": "user-2", "interaction_type": "view"}),
+        orjson.dumps({**sample_interaction_data, "interaction_type": "purchase"}),
+    ]
+
+    response = client.post(
+        "/api/v1/interactions/bulk",
+        content=gzip.compress(b"\n".join(lines) + b"\n"),
+        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["line_count"], data["recorded_count"], data["failed_count"]) == (6, 2, 3)
+    assert [e["line"] for e in data["errors"]] == [2, 4, 5]
+    assert [r[2] for r in written] == ["VIEW", "PURCHASE"]
+    assert written[0][-1] == datetime(2026, 1, 5, 10, 0)
+
+
+def test_bulk_upload_isolates_lines_the_database_rejects(
+    client: TestClient,
+    sample_interaction_data: dict,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Over-long values fail validation; a line the COPY rejects is split out and reported."""
+
+    class UntranslatableCharacterError(Exception):
+        sqlstate = "22P05"
+
+    written = []
+
+    async def writer(records) -> list:
+        if any("\x00" in r[0] for r in records):
+            raise UntranslatableCharacterError("unsupported Unicode escape sequence")
+        written.extend(records)
+        return list(records)
+
+    monkeypatch.setattr(interaction_bulk, "copy_interactions", writer)
+    lines = [
+        orjson.dumps({**sample_interaction_data, "user_id": f"user-{i}"}) for i in range(4)
+    ]
+    lines[1] = orjson.dumps({**sample_interaction_data, "user_id": "bad\x00user"})
+    lines.append(orjson.dumps({**sample_interaction_data, "product_id": "p" * 256}))
+
+    response = client.post(
+        "/api/v1/interactions/bulk",
+        content=b"\n".join(lines),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["recorded_count"], data["failed_count"]) == (3, 2)
+    assert sorted(e["line"] for e in data["errors"]) == [2, 5]
+    assert sorted(r[0] for r in written) == ["user-0", "user-2", "user-3"]
+
+
+def test_track_interaction_short_circuits_duplicate_event_ids(
+    client: TestClient,
+    sample_interaction_data: dict,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A confirmed retry is acknowledged without being recorded again."""
+    buffer = InteractionBuffer(max_size=10, flush_size=10, flush_interval=1)
+    monkeypatch.setattr(interactions, "get_interaction_buffer", lambda: buffer)
+
+    async def is_registered(event_id: str) -> bool:
+        return True
+
+    monkeypatch.setattr(event_dedup, "is_registered", is_registered)
+    payload = {**sample_interaction_data, "event_id": "evt-retry-1"}
+
+    first = client.post("/api/v1/interactions", json=payload).json()
+    retry = client.post("/api/v1/interactions", json=payload).json()
+
+    assert (first["duplicate"], retry["duplicate"]) == (False, True)
+    assert retry["interaction_id"] == "evt-retry-1"
+    assert len(buffer) == 1
+
+
+def test_history_pages_with_opaque_cursor(
+    client: TestClient,
+    sample_user_id: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """History is keyset-paginated on (created_at, id) and streamed as JSON."""
+    rows = [
+        SimpleNamespace(
+            id=i,
+            external_product_id=f"prod-{i}",
+            interaction_type="VIEW",
+            search_query=None,
+            recommendation_context=None,
+            recommendation_position=None,
+            session_id=None,
+            event_id=None,
+            created_at=datetime(2026, 10, 1, 12, 0, i),
+        )
+        for i in range(5, 0, -1)
+    ]
+    calls = []
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def stream(self, query, params):
+            calls.append(params)
+            after = (params.get("created_at"), params.get("id"))
+            matching = [r for r in rows if after[0] is None or (r.created_at, r.id) < after]
+
+            async def result():
+                for row in matching[: params["fetch"]]:
+                    yield row
+
+            return result()
+
+    monkeypatch.setattr(interaction_history, "get_session_factory", lambda: FakeSession)
+
+    first = client.get(f"/api/v1/interactions/user/{sample_user_id}/history?limit=3")
+    assert first.status_code == 200
+    page = first.json()
+    assert [i["interaction_id"] for i in page["interactions"]] == [5, 4, 3]
+    assert page["interactions"][0]["interaction_type"] == "view"
+    assert page["next_cursor"]
+
+    second = client.get(
+        f"/api/v1/interactions/user/{sample_user_id}/history",
+        params={"limit": 3, "cursor": page["next_cursor"]},
+    ).json()
+    assert [i["interaction_id"] for i in second["interactions"]] == [2, 1]
+    assert second["next_cursor"] is None
+    assert calls[1]["id"] == 3 and calls[1]["fetch"] == 4
+
+    bad = client.get(
+        f"/api/v1/interactions/user/{sample_user_id}/history", params={"cursor": "not-a-cursor"}
+    )
+    assert bad.status_code == 400
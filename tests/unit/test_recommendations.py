@@ -0,0 +1,64 @@
+"""Unit tests for recommendation response serialisation."""
+
+import json
+
+import numpy as np
+
+from recommendation_service.api.v1.recommendations import (
+    RecommendationResponse,
+    RecommendedProduct,
+    render_recommendations,
+)
+
+
+def test_fast_path_matches_response_model() -> None:
+    """The orjson payload is the document the pydantic models would produce."""
+    result = {
+        "recommendations": [
+            {
+                "product_id": "p-1",
+                "external_product_id": "p-1",
+                "name": "Kettle",
+                "category": "Kitchen",
+                "price": 12,
+                "stock": 3,
+                "image_url": None,
+                "score": np.float32(0.75),
+                "signal": "content",
+                "position": 1,
+            },
+            {
+                "product_id": "p-2",
+                "external_product_id": "p-2",
+                "name": "Mug",
+                "category": "Kitchen",
+                "price": 4.5,
+                "image_url": "https://example.com/mug.jpg",
+                "score": 0.5,
+                "collaborative_score": 1.0,
+                "position": 2,
+            },
+        ],
+        "request_id": "req-1",
+        "context": "homepage",
+        "user_id": None,
+        "generated_at": "2026-10-19T11:00:00+00:00",
+    }
+    expected = RecommendationResponse(
+        recommendations=[
+            RecommendedProduct(**{**p, "score": float(p["score"])})
+            for p in result["recommendations"]
+        ],
+        request_id=result["request_id"],
+        context=result["context"],
+        user_id=result["user_id"],
+        generated_at=result["generated_at"],
+    ).model_dump(mode="json")
+
+    response = render_recommendations(result)
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == expected
+    assert list(json.loads(response.body)["recommendations"][0]) == list(
+        RecommendedProduct.model_fields
+    )
@@ -0,0 +1,61 @@
+"""Unit tests for startup warmup and lazy heavy imports."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from recommendation_service.core import warmup
+from recommendation_service.core.warmup import WarmupState, run_warmup
+
+HEAVY_MODULES = ("sentence_transformers", "torch", "transformers", "onnxruntime", "pinecone")
+
+
+async def test_run_warmup_records_failures_without_stopping() -> None:
+    """A failing step is recorded and the remaining steps still run."""
+    calls = []
+
+    async def ok() -> None:
+        calls.append("ok")
+
+    async def broken() -> None:
+        raise RuntimeError("model not available")
+
+    state = await run_warmup({"ok": ok, "broken": broken}, timeout=1.0)
+
+    assert calls == ["ok"]
+    assert state.completed
+    assert state.steps == {"ok": "ok", "broken": "failed"}
+
+
+def test_readiness_waits_for_warmup(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Readiness reports not-ready until warmup has completed."""
+    monkeypatch.setattr(warmup, "_state", WarmupState())
+    response = client.get("/api/v1/health/ready")
+    assert response.json()["checks"]["warmup"] is False
+    assert response.json()["ready"] is False
+
+    monkeypatch.setattr(warmup, "_state", WarmupState(completed=True))
+    response = client.get("/api/v1/health/ready")
+    assert response.json()["checks"]["warmup"] is True
+
+
+@pytest.mark.parametrize(
+    "module", ["recommendation_service.main", "sync_worker.main", "email_worker.main"]
+)
+def test_entry_points_do_not_import_heavy_modules(module: str) -> None:
+    """Importing an entry point leaves model and client libraries unloaded."""
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == ""